@@ -1,19 +1,80 @@
+import io
+import uuid
 from collections import defaultdict
+from itertools import islice
 
-from django.db.models import Q
+from django.db import connection
 
-from pulpcore.plugin.models import ProgressBar
+from pulpcore.plugin.models import Content, ProgressBar
 
 from .api import Stage
 
 
+class _PkSet:
+    """
+    A compact set of integer primary keys, stored as a bitmap of one bit per pk.
+
+    The bitmap starts at the smallest pk added, so its size is proportional to the range of the
+    primary keys rather than to the largest one.
+    """
+
+    def __init__(self):
+        self._bits = bytearray()
+        # the pk of the first bit, a multiple of 8
+        self._offset = 0
+
+    def add(self, pk):
+        """
+        Args:
+            pk (int): The primary key to add.
+        """
+        start = pk & ~7
+        if not self._bits:
+            self._offset = start
+        elif start < self._offset:
+            self._bits[:0] = bytes((self._offset - start) >> 3)
+            self._offset = start
+        index = (pk - self._offset) >> 3
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index + 1 - len(self._bits)))
+        self._bits[index] |= 1 << (pk & 7)
+
+    def __contains__(self, pk):
+        index = (pk - self._offset) >> 3
+        return 0 <= index < len(self._bits) and bool(self._bits[index] & (1 << (pk & 7)))
+
+    def __iter__(self):
+        for index, byte in enumerate(self._bits):
+            if byte:
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield self._offset + (index << 3) + bit
+
+    def chunks(self, size):
+        """
+        Args:
+            size (int): The maximum number of primary keys of each chunk.
+
+        Yields:
+            list: Of the primary keys in ascending order, `size` at most.
+        """
+        pks = iter(self)
+        while True:
+            chunk = list(islice(pks, size))
+            if not chunk:
+                return
+            yield chunk
+
+
 class ContentUnitAssociation(Stage):
     """
     A Stages API stage that associates content units with `new_version`.
 
-    This stage stores all content unit types and unit keys in memory before running. This is done to
-    compute the units already associated but not received from `in_q`. These units are passed via
-    `out_q` to the next stage as a :class:`django.db.models.query.QuerySet`.
+    This stage records the primary key of each content unit received from `in_q` in a bitmap. When
+    the stream ends, the bitmap is copied to a temporary table in chunks, and the content of
+    `new_version` is anti-joined with it in the database to compute the units already associated
+    but not received from `in_q`. These units are read through a server-side cursor and passed via
+    `out_q` to the next stage as :class:`django.db.models.query.QuerySet` as they are read.
 
     This stage creates a ProgressBar named 'Associating Content' that counts the number of units
     associated. Since it's a stream the total count isn't known until it's finished.
@@ -25,13 +86,13 @@ class ContentUnitAssociation(Stage):
         kwargs: unused keyword arguments passed along to :class:`~pulpcore.plugin.stages.Stage`.
     """
 
+    # The maximum number of units of each QuerySet put to `out_q`.
+    UNASSOCIATE_CHUNK_SIZE = 10000
+
     def __init__(self, new_version, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.new_version = new_version
-        self.unit_keys_by_type = defaultdict(set)
-        for unit in self.new_version.content.all():
-            unit = unit.cast()
-            self.unit_keys_by_type[type(unit)].add(unit.natural_key())
+        self.seen = _PkSet()
 
     async def __call__(self, in_q, out_q):
         """
@@ -43,43 +104,90 @@ class ContentUnitAssociation(Stage):
                 to be associated.
             out_q (:class:`asyncio.Queue`): Each item is a :class:`django.db.models.query.QuerySet`
                 of :class:`~pulpcore.plugin.models.Content` subclass that are already associated but
-                not included in the stream of items from `in_q`. One
-                :class:`django.db.models.query.QuerySet` is put for each
-                :class:`~pulpcore.plugin.models.Content` type.
+                not included in the stream of items from `in_q`. Each
+                :class:`django.db.models.query.QuerySet` is of a single
+                :class:`~pulpcore.plugin.models.Content` type and of at most
+                `UNASSOCIATE_CHUNK_SIZE` units.
 
         Returns:
             The coroutine for this stage.
         """
         with ProgressBar(message='Associating Content') as pb:
             async for batch in self.batches(in_q):
-                content_q_by_type = defaultdict(lambda: Q(pk=None))
+                pks = []
                 for declarative_content in batch:
-                    try:
-                        unit_key = declarative_content.content.natural_key()
-                        self.unit_keys_by_type[type(declarative_content.content)].remove(unit_key)
-                    except KeyError:
-                        model_type = type(declarative_content.content)
-                        unit_key_dict = declarative_content.content.natural_key_dict()
-                        unit_q = Q(**unit_key_dict)
-                        content_q_by_type[model_type] = content_q_by_type[model_type] | unit_q
-
-                for model_type, q_object in content_q_by_type.items():
-                    queryset = model_type.objects.filter(q_object)
-                    self.new_version.add_content(queryset)
-                    pb.done = pb.done + queryset.count()
-                    pb.save()
+                    self.seen.add(declarative_content.content.pk)
+                    pks.append(declarative_content.content.pk)
+                pb.done = pb.done + self.new_version.add_content(pks)
+                pb.save()
 
-            for unit_type, ids in self.unit_keys_by_type.items():
-                if ids:
-                    units_to_unassociate = Q()
-                    for unit_key in self.unit_keys_by_type[unit_type]:
-                        query_dict = {}
-                        for i, key_name in enumerate(unit_type.natural_key_fields()):
-                            query_dict[key_name] = unit_key[i]
-                        units_to_unassociate |= Q(**query_dict)
-                    await out_q.put(unit_type.objects.filter(units_to_unassociate))
+            for queryset in self._unseen():
+                await out_q.put(queryset)
             await out_q.put(None)
 
+    def _unseen(self):
+        """
+        Compute the units of `new_version` not received from `in_q`.
+
+        The received primary keys are copied from the bitmap to a temporary table,
+        `UNASSOCIATE_CHUNK_SIZE` at a time. The units of the version without a match are selected by
+        a single anti-join and fetched from a server-side cursor in chunks, so that memory use is
+        bounded by the chunk size.
+
+        Yields:
+            :class:`django.db.models.query.QuerySet`: Of the units of a type which were not
+                received, `UNASSOCIATE_CHUNK_SIZE` units at most.
+        """
+        detail_models = defaultdict(list)
+        for (app_label, content_type), model in Content.detail_models().items():
+            detail_models[content_type].append(model)
+        # a TYPE shared by the detail models of several apps is removed by the master model
+        detail_models = {content_type: models[0] for content_type, models in detail_models.items()
+                         if len(models) == 1}
+
+        table = 'seen_{}'.format(uuid.uuid4().hex)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY TABLE {table} (id integer PRIMARY KEY)'.format(
+                table=table))
+            try:
+                for pks in self.seen.chunks(self.UNASSOCIATE_CHUNK_SIZE):
+                    data = io.StringIO('\n'.join(map(str, pks)))
+                    cursor.copy_from(data, table, columns=('id',))
+                cursor.execute('ANALYZE {table}'.format(table=table))
+                yield from self._anti_join(table, detail_models)
+            finally:
+                cursor.execute('DROP TABLE IF EXISTS {table}'.format(table=table))
+
+    def _anti_join(self, table, detail_models):
+        """
+        Select the units of `new_version` not in the table of received primary keys.
+
+        Args:
+            table (str): The name of the temporary table of the received primary keys.
+            detail_models (dict): Of detail models keyed by content TYPE.
+
+        Yields:
+            :class:`django.db.models.query.QuerySet`: Of the units of a type which were not
+                received, `UNASSOCIATE_CHUNK_SIZE` units at most.
+        """
+        query, params = self.new_version.content.values_list('pk', 'type').query.sql_with_params()
+        sql = (
+            'SELECT content.id, content.type FROM ({query}) AS content (id, type)'
+            ' WHERE NOT EXISTS (SELECT 1 FROM {table} AS seen WHERE seen.id = content.id)'
+            ' ORDER BY content.type, content.id'
+        ).format(query=query, table=table)
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                unseen = cursor.fetchmany(self.UNASSOCIATE_CHUNK_SIZE)
+                if not unseen:
+                    return
+                pks_by_type = defaultdict(list)
+                for pk, content_type in unseen:
+                    pks_by_type[content_type].append(pk)
+                for content_type, pks in pks_by_type.items():
+                    yield detail_models.get(content_type, Content).objects.filter(pk__in=pks)
+
 
 class ContentUnitUnassociation(Stage):
     """
@@ -4,7 +4,8 @@ from pulpcore.app import models
 from pulpcore.exceptions import exception_to_dict
 
 # Support plugins dispatching tasks
-from pulpcore.tasking.tasks import enqueue_with_reservation  # noqa
+from pulpcore.constants import TASK_PRIORITIES  # noqa
+from pulpcore.tasking.tasks import enqueue_with_reservation, submit_task_group  # noqa
 
 # Support plugins working with the working directory.
 from pulpcore.tasking.services.storage import WorkingDirectory  # noqa
@@ -0,0 +1,86 @@
+import asyncio
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from pulpcore.app.models import Task
+from pulpcore.plugin.models import Content, Repository, RepositoryVersion
+from pulpcore.plugin.stages import ContentUnitAssociation, DeclarativeContent
+from pulpcore.plugin.stages.association_stages import _PkSet
+
+
+class TestPkSet(TestCase):
+
+    def test_contains(self):
+        pks = _PkSet()
+        for pk in (1, 8, 1000):
+            pks.add(pk)
+        self.assertIn(8, pks)
+        self.assertIn(1000, pks)
+        self.assertNotIn(9, pks)
+        self.assertNotIn(100000, pks)
+        self.assertEqual(list(pks), [1, 8, 1000])
+
+    def test_offset(self):
+        """Tests that the bitmap starts at the smallest pk, also when added last."""
+        pks = _PkSet()
+        for pk in (1000005, 1000017, 1000001):
+            pks.add(pk)
+        self.assertEqual(list(pks), [1000001, 1000005, 1000017])
+        self.assertNotIn(5, pks)
+        self.assertLess(len(pks._bits), 4)
+
+    def test_chunks(self):
+        pks = _PkSet()
+        for pk in (3, 1, 20, 7, 9):
+            pks.add(pk)
+        self.assertEqual(list(pks.chunks(2)), [[1, 3], [7, 9], [20]])
+
+
+class TestContentUnitAssociation(TestCase):
+
+    def setUp(self):
+        task = Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job', return_value=task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.content = [Content.objects.create(type='test') for i in range(4)]
+        repository = Repository.objects.create(name='association')
+        with RepositoryVersion.create(repository) as version:
+            version.add_content(self.content[:2])
+        self.new_version = RepositoryVersion.create(repository)
+
+    def _associate(self, received, chunk_size=None):
+        """Run the stage for the received units and return its output queue."""
+        in_q = asyncio.Queue()
+        out_q = asyncio.Queue()
+        for content in received:
+            in_q.put_nowait(DeclarativeContent(content=content))
+        in_q.put_nowait(None)
+
+        stage = ContentUnitAssociation(self.new_version)
+        if chunk_size:
+            stage.UNASSOCIATE_CHUNK_SIZE = chunk_size
+        asyncio.get_event_loop().run_until_complete(stage(in_q, out_q))
+        return out_q
+
+    def test_association(self):
+        """Tests that received units are added and the others are put to out_q."""
+        out_q = self._associate(self.content[1:])
+
+        content = set(self.new_version.content.values_list('pk', flat=True))
+        self.assertEqual(content, {c.pk for c in self.content})
+        unassociate = out_q.get_nowait()
+        self.assertEqual(list(unassociate.values_list('pk', flat=True)), [self.content[0].pk])
+        self.assertIsNone(out_q.get_nowait())
+
+    def test_chunks(self):
+        """Tests that the units not received are put to out_q in chunks."""
+        out_q = self._associate(self.content[2:], chunk_size=1)
+        unassociate = [list(out_q.get_nowait().values_list('pk', flat=True)) for i in range(2)]
+        self.assertEqual(unassociate, [[self.content[0].pk], [self.content[1].pk]])
+        self.assertIsNone(out_q.get_nowait())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_class WHERE relname LIKE 'seen\\_%'")
+            self.assertEqual(cursor.fetchone(), (0,))
@@ -1,6 +1,7 @@
 from importlib import import_module
 
 from django import apps
+from django.db.models.signals import post_migrate
 from django.utils.module_loading import module_has_submodule
 
 from pulpcore.exceptions.plugin import MissingPlugin
@@ -139,3 +140,26 @@ class PulpAppConfig(PulpPluginAppConfig):
     # with manage.py, etc. This cannot contain a dot and must not conflict with the name of a
     # package containing a Django app.
     label = 'pulp_app'
+
+    def ready(self):
+        super().ready()
+        post_migrate.connect(_backfill_version_numbers, sender=self)
+
+
+def _backfill_version_numbers(sender, plan=None, **kwargs):
+    """
+    Fill in the version numbers of RepositoryContent once the migrations adding them are applied.
+
+    This runs after every ``migrate`` of the pulpcore app and only updates the associations
+    without numbers, so running it again is harmless.
+
+    Args:
+        sender (PulpAppConfig): The pulpcore app config.
+        plan (list): Of (migration, backwards) tuples applied by the migrate command.
+    """
+    if not any(migration.app_label == sender.label and not backwards
+               for migration, backwards in plan or ()):
+        return
+    # circular import avoidance
+    from pulpcore.app.models import RepositoryContent
+    RepositoryContent.backfill_numbers()
@@ -0,0 +1,156 @@
+"""
+An in-memory trie of distribution base paths.
+
+Matching a request path to a distribution and validating that base paths do not overlap both
+walk the trie, at a cost proportional to the depth of the path and without querying the database.
+Each node keeps what the content app needs to serve the distribution: its primary key, name,
+base path and publication.
+
+The trie is shared by the process. Saving or deleting a Distribution increments a version stamp
+kept in Redis (see :meth:`pulpcore.app.models.Distribution.notify_changed`). The stamp is read at
+most once per ``max_age`` seconds and the trie is rebuilt only when it changed.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from pulpcore.app.models import Distribution
+from pulpcore.tasking.connection import get_redis_connection
+
+
+# The fields of a distribution kept in the trie.
+BasePath = namedtuple('BasePath', ('pk', 'name', 'base_path', 'publication_id'))
+
+
+class _Node:
+    """
+    A node of the trie, one per path component.
+
+    Attributes:
+        children (dict): Of child nodes keyed by path component.
+        distribution (BasePath): The distribution having this node as its base path, if any.
+    """
+
+    __slots__ = ('children', 'distribution')
+
+    def __init__(self):
+        self.children = {}
+        self.distribution = None
+
+    def walk(self):
+        """
+        Yields:
+            BasePath: The distributions of this node and its descendants.
+        """
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            if node.distribution is not None:
+                yield node.distribution
+            nodes.extend(node.children.values())
+
+
+class BasePathTrie:
+    """
+    A trie of Distribution.base_path where each node is a path component.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._stamp = None
+        self._checked = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _components(path):
+        return [c for c in path.strip('/').split('/') if c]
+
+    def refresh(self, max_age=None):
+        """
+        Rebuild the trie when the distributions have changed.
+
+        Args:
+            max_age (float): The number of seconds the trie may be used without checking for
+                changes. Defaults to CONTENT['BASE_PATH_REFRESH_INTERVAL']. Use 0 to always check.
+        """
+        if max_age is None:
+            max_age = settings.CONTENT['BASE_PATH_REFRESH_INTERVAL']
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < max_age:
+            return
+        with self._lock:
+            # read before building so that a change made meanwhile triggers another rebuild
+            stamp = get_redis_connection().get(Distribution.CHANGES_KEY)
+            if self._checked is None or stamp != self._stamp:
+                self._root = self._build()
+                self._stamp = stamp
+            self._checked = now
+
+    def _build(self):
+        """
+        Returns:
+            _Node: The root of a trie built from all of the distributions.
+        """
+        root = _Node()
+        for distribution in Distribution.objects.values_list(*BasePath._fields).iterator():
+            distribution = BasePath(*distribution)
+            node = root
+            for component in self._components(distribution.base_path):
+                node = node.children.setdefault(component, _Node())
+            node.distribution = distribution
+        return root
+
+    def match(self, path):
+        """
+        Match the distribution serving a path.
+
+        Only the directories of the path are matched, the last component being the (requested)
+        published file.
+
+        Args:
+            path (str): The path component of the URL.
+
+        Returns:
+            BasePath: The matched distribution or None.
+        """
+        self.refresh()
+        node = self._root
+        for component in self._components(path)[:-1]:
+            try:
+                node = node.children[component]
+            except KeyError:
+                return None
+            if node.distribution is not None:
+                return node.distribution
+        return None
+
+    def overlapping(self, path, exclude=None):
+        """
+        Find a distribution with a base path that nests, or is nested in, the path.
+
+        Args:
+            path (str): A base path.
+            exclude (pulpcore.app.models.Distribution): A distribution to be ignored.
+
+        Returns:
+            BasePath: An overlapping distribution or None.
+        """
+        exclude_pk = exclude.pk if exclude is not None else None
+        node = self._root
+        for component in self._components(path):
+            try:
+                node = node.children[component]
+            except KeyError:
+                return None
+            if node.distribution is not None and node.distribution.pk != exclude_pk:
+                return node.distribution
+        for distribution in node.walk():
+            if distribution.pk != exclude_pk:
+                return distribution
+        return None
+
+
+# The trie shared by the process.
+base_paths = BasePathTrie()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import time
+from gettext import gettext as _
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+
+from pulpcore.app.views import ContentView
+
+
+class Command(BaseCommand):
+    """
+    Django management command for measuring the throughput of the django content responder.
+    """
+    help = _('Measure the throughput of the django content responder for large files')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path',
+                            help=_('The path to the file to be served. By default, a sparse '
+                                   'file of --size megabytes is created in the '
+                                   'WORKING_DIRECTORY.'))
+        parser.add_argument('--size', type=int, default=4096,
+                            help=_('The size in megabytes of the generated file.'))
+        parser.add_argument('--block-size', type=int, action='append', dest='block_sizes',
+                            help=_('A block size in bytes to be measured. May be repeated. '
+                                   'Defaults to 8192 and CONTENT["BLOCK_SIZE"].'))
+
+    def handle(self, *args, **options):
+        block_sizes = options['block_sizes'] or [8192, settings.CONTENT['BLOCK_SIZE']]
+        path = options['path']
+        if path:
+            self._benchmark(path, block_sizes)
+        else:
+            with tempfile.NamedTemporaryFile(dir=settings.WORKING_DIRECTORY) as fp:
+                os.truncate(fp.name, options['size'] * 1048576)
+                self._benchmark(fp.name, block_sizes)
+
+    def _benchmark(self, path, block_sizes):
+        """
+        Serve the file using the django responder once per block size and print the throughput.
+
+        Args:
+            path (str): The path to the file to be served.
+            block_sizes (list): Of block sizes in bytes.
+        """
+        size = os.path.getsize(path)
+        view = ContentView()
+        view.request = RequestFactory().get('/')
+        for block_size in block_sizes:
+            content = dict(settings.CONTENT, BLOCK_SIZE=block_size)
+            with override_settings(CONTENT=content):
+                started = time.monotonic()
+                response = view._django(path)
+                served = 0
+                for block in response:
+                    served += len(block)
+                response.close()
+                elapsed = time.monotonic() - started
+            if served != size:
+                raise CommandError(_('Served {s} of {t} bytes.').format(s=served, t=size))
+            self.stdout.write(
+                _('block size: {b:>10} bytes  time: {t:8.2f}s  throughput: {r:10.1f} MB/s').format(
+                    b=block_size, t=elapsed, r=size / 1048576 / elapsed))
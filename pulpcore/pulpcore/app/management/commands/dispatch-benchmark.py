@@ -0,0 +1,80 @@
+import time
+import uuid
+from gettext import gettext as _
+
+from django.core.management import BaseCommand
+from django.db import IntegrityError
+
+from pulpcore.app.models import Task, Worker
+from pulpcore.constants import TASK_STATES
+from pulpcore.tasking.constants import TASKING_CONSTANTS
+from pulpcore.tasking.tasks import _acquire_worker
+
+
+class Command(BaseCommand):
+    """
+    Django management command for measuring the throughput of task dispatching.
+    """
+    help = _('Measure the throughput of reserving and releasing the resources of tasks as they '
+             'are dispatched to and completed by workers. The workers and tasks are created for '
+             'the benchmark and deleted afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000,
+                            help=_('The number of tasks dispatched.'))
+        parser.add_argument('--resources', type=int, default=2,
+                            help=_('The number of resources reserved by each task.'))
+        parser.add_argument('--repositories', type=int, default=100,
+                            help=_('The number of distinct resources reserved by the tasks.'))
+        parser.add_argument('--workers', type=int, default=4,
+                            help=_('The number of workers dispatched to.'))
+        parser.add_argument('--running', type=int, default=4,
+                            help=_('The number of tasks holding reservations at the same time.'))
+
+    def handle(self, *args, **options):
+        prefix = '{}-benchmark-{}'.format(TASKING_CONSTANTS.WORKER_PREFIX, uuid.uuid4())
+        workers = [Worker.objects.create(name='{}-{}'.format(prefix, i))
+                   for i in range(options['workers'])]
+        tasks = [Task(state=TASK_STATES.WAITING) for i in range(options['tasks'])]
+        Task.objects.bulk_create(tasks)
+        try:
+            self._benchmark(tasks, options)
+        finally:
+            for task in tasks:
+                task.release_resources()
+            Task.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+            Worker.objects.filter(pk__in=[worker.pk for worker in workers]).delete()
+
+    def _benchmark(self, tasks, options):
+        """
+        Dispatch the tasks, releasing the resources of the oldest running task as needed.
+
+        Args:
+            tasks (list): Of :class:`~pulpcore.app.models.Task` to be dispatched.
+            options (dict): The options of the command.
+        """
+        running = []
+        conflicts = 0
+        started = time.monotonic()
+        for i, task in enumerate(tasks):
+            resources = ['/pulp/api/v3/repositories/{}/'.format((i + j) % options['repositories'])
+                         for j in range(options['resources'])]
+            while True:
+                if len(running) >= options['running']:
+                    running.pop(0).release_resources()
+                try:
+                    worker = _acquire_worker(resources).worker
+                    worker.lock_resources(task, resources)
+                except (Worker.DoesNotExist, Worker.MultipleObjectsReturned, IntegrityError):
+                    conflicts += 1
+                    if not running:
+                        raise
+                else:
+                    running.append(task)
+                    break
+        for task in running:
+            task.release_resources()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            _('tasks: {n}  time: {t:.2f}s  throughput: {r:.1f} tasks/s  conflicts: {c}').format(
+                n=len(tasks), t=elapsed, r=len(tasks) / elapsed, c=conflicts))
@@ -26,9 +26,19 @@ from .repository import (  # noqa
     Repository,
     RepositoryContent,
     RepositoryVersion,
+    RepositoryVersionContentDetails,
 )
 
-from .task import CreatedResource, ReservedResource, Task, TaskReservedResource, Worker  # noqa
+from .task import (  # noqa
+    CreatedResource,
+    ReservedResource,
+    Task,
+    TaskGroup,
+    TaskHistory,
+    TaskPlacement,
+    TaskReservedResource,
+    Worker,
+)
 
 # Moved here to avoid a circular import with Task
 from .progress import ProgressBar, ProgressReport, ProgressSpinner  # noqa
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from django.db import models
 from django.db.models import options
 
@@ -32,6 +34,75 @@ class Model(models.Model):
         return str(self)
 
 
+class MasterModelQuerySet(models.QuerySet):
+    """
+    A QuerySet of a Master model (or of a Detail model of it), able to cast its objects in bulk.
+    """
+
+    def cast(self, batch_size=1000):
+        """
+        Iterate over the "Detail" model instances of the objects of this queryset, in order.
+
+        Calling cast() on each object queries the detail tables once per object. Instead, the
+        objects are grouped by their type and each detail table is queried once per batch.
+
+        Args:
+            batch_size (int): The number of objects cast with each query of a detail table.
+
+        Yields:
+            MasterModel: The "Detail" model instance of each object, or the object itself if it
+                has no more detailed type.
+        """
+        detail_models = self.model.detail_models()
+        batch = []
+        for obj in self.iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) == batch_size:
+                yield from self.cast_objects(batch, detail_models)
+                batch = []
+        yield from self.cast_objects(batch, detail_models)
+
+    def cast_objects(self, objects, detail_models=None):
+        """
+        Cast a list of objects of the model of this queryset, e.g. a page, in bulk.
+
+        The TYPE of a detail model is only unique within its app, so the objects of a TYPE shared
+        by several detail models are looked up in each of their tables. The objects whose type is
+        not the TYPE of any detail model are cast one by one.
+
+        Args:
+            objects (list): Objects of the model of this queryset.
+            detail_models (dict): Detail model classes keyed by their app label and TYPE.
+                Defaults to the detail models of the model of this queryset.
+
+        Returns:
+            list: The "Detail" model instances of the objects, in order.
+        """
+        if detail_models is None:
+            detail_models = self.model.detail_models()
+        models_by_type = defaultdict(list)
+        for (app_label, model_type), model in detail_models.items():
+            models_by_type[model_type].append(model)
+        pks_by_model = defaultdict(list)
+        for obj in objects:
+            models = models_by_type.get(obj.type, ())
+            if type(obj) not in models:
+                for model in models:
+                    pks_by_model[model].append(obj.pk)
+        details = {}
+        for model, pks in pks_by_model.items():
+            details.update(model._base_manager.using(self.db).in_bulk(pks))
+        cast = []
+        for obj in objects:
+            if obj.pk in details:
+                cast.append(details[obj.pk])
+            elif type(obj) in models_by_type.get(obj.type, ()):
+                cast.append(obj)
+            else:
+                cast.append(obj.cast())
+        return cast
+
+
 class MasterModel(Model):
     """Base model for the "Master" model in a "Master-Detail" relationship.
 
@@ -70,9 +141,30 @@ class MasterModel(Model):
     # the TYPE attribute on the Model being saved (seen above).
     type = models.TextField(null=False, default=None)
 
+    objects = MasterModelQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
+    @classmethod
+    def detail_models(cls):
+        """
+        The detail models of this model, by their app label and TYPE.
+
+        Returns:
+            dict: Of the concrete model classes inheriting from this model which define their own
+                TYPE, keyed by a tuple of their app label and TYPE.
+        """
+        detail_models = {}
+        subclasses = cls.__subclasses__()
+        while subclasses:
+            subclass = subclasses.pop(0)
+            if not (subclass._meta.abstract or subclass._meta.proxy) and \
+                    subclass.__dict__.get('TYPE'):
+                detail_models[(subclass._meta.app_label, subclass.TYPE)] = subclass
+            subclasses.extend(subclass.__subclasses__())
+        return detail_models
+
     def save(self, *args, **kwargs):
         # instances of "detail" models that subclass MasterModel are exposed
         # on instances of MasterModel by the string stored in that model's TYPE attr.
@@ -67,18 +67,20 @@ class ProgressReport(Model):
         If the task_id is already set it will not be updated. If it is unset and this is running
         inside of a task it will be auto-set prior to saving.
 
+        The clients waiting for a change of the task are notified once saved.
+
         args (list): positional arguments to be passed on to the real save
         kwargs (dict): keyword arguments to be passed on to the real save
         """
         now = timezone.now()
 
         if self._using_context_manager and self._last_save_time:
-            if now - self._last_save_time >= datetime.timedelta(milliseconds=BATCH_INTERVAL):
-                super().save(*args, **kwargs)
-                self._last_save_time = now
-        else:
-            super().save(*args, **kwargs)
-            self._last_save_time = now
+            if now - self._last_save_time < datetime.timedelta(milliseconds=BATCH_INTERVAL):
+                return
+
+        super().save(*args, **kwargs)
+        self._last_save_time = now
+        Task.notify_changed(self.task_id)
 
     def __enter__(self):
         """
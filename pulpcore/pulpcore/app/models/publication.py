@@ -1,5 +1,7 @@
 from django.db import models, transaction
 
+from pulpcore.tasking.connection import get_redis_connection
+
 from . import storage
 from .base import Model
 from .content import ContentGuard
@@ -106,6 +108,8 @@ class Publication(Model):
         with transaction.atomic():
             CreatedResource.objects.filter(object_id=self.pk).delete()
             super().delete(**kwargs)
+            # the distributions serving it no longer have a publication
+            Distribution.notify_changed()
 
     def __enter__(self):
         return self
@@ -236,5 +240,41 @@ class Distribution(BaseDistribution):
             the distribution.  This is the publication being served by Pulp through
             this relative URL path and settings.
     """
+
+    # The Redis key of the version stamp of the distributions (see notify_changed()).
+    CHANGES_KEY = 'pulp:distributions:version'
+
     class Meta:
         default_related_name = 'distributions'
+
+    @staticmethod
+    def notify_changed():
+        """
+        Increment the version stamp of the distributions once the transaction is committed.
+
+        The content app rebuilds its trie of base paths (see :mod:`pulpcore.app.base_paths`)
+        when the stamp changed.
+        """
+        transaction.on_commit(lambda: get_redis_connection().incr(Distribution.CHANGES_KEY))
+
+    def save(self, *args, **kwargs):
+        """
+        Save the distribution and notify the content app of the change.
+
+        Args:
+            args (list): list of positional arguments for Model.save()
+            kwargs (dict): dictionary of keyword arguments to pass to Model.save()
+        """
+        super().save(*args, **kwargs)
+        self.notify_changed()
+
+    def delete(self, *args, **kwargs):
+        """
+        Delete the distribution and notify the content app of the change.
+
+        Args:
+            args (list): list of positional arguments for Model.delete()
+            kwargs (dict): dictionary of keyword arguments to pass to Model.delete()
+        """
+        super().delete(*args, **kwargs)
+        self.notify_changed()
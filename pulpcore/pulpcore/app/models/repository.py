@@ -1,8 +1,11 @@
 """
 Repository related Django models.
 """
+from collections import defaultdict
 from contextlib import suppress
-from django.db import models
+from gettext import gettext as _
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, models
 from django.db import transaction
 
 from .base import Model, MasterModel
@@ -155,9 +158,21 @@ class RepositoryContent(Model):
     """
     Association between a repository and its contained content.
 
+    The content is contained in the repository versions numbered from `number_added` (inclusive)
+    up to `number_removed` (exclusive). These denormalize the numbers of `version_added` and
+    `version_removed` so that the content of a version is selected by one index range scan.
+
+    The numbers are set for every new association. `number_added` is null only for the
+    associations created before the columns were added, until :meth:`backfill_numbers` fills them
+    in after the migration (see :class:`pulpcore.app.apps.PulpAppConfig`).
+
     Fields:
 
         created (models.DatetimeField): When the association was created.
+        number_added (models.PositiveIntegerField): The number of the RepositoryVersion which
+            added the referenced Content.
+        number_removed (models.PositiveIntegerField): The number of the RepositoryVersion which
+            removed the referenced Content.
 
     Relations:
 
@@ -176,10 +191,52 @@ class RepositoryContent(Model):
     version_removed = models.ForeignKey('RepositoryVersion', null=True,
                                         related_name='removed_memberships',
                                         on_delete=models.CASCADE)
+    number_added = models.PositiveIntegerField(null=True)
+    number_removed = models.PositiveIntegerField(null=True)
 
     class Meta:
         unique_together = (('repository', 'content', 'version_added'),
                            ('repository', 'content', 'version_removed'))
+        indexes = [
+            models.Index(fields=['repository', 'number_added', 'number_removed']),
+            models.Index(fields=['repository', 'number_removed']),
+        ]
+
+    @staticmethod
+    def in_version(repository, number):
+        """
+        Get the associations of the content contained in a repository version.
+
+        Args:
+            repository (pulpcore.app.models.Repository): The repository.
+            number (int): The repository version number.
+
+        Returns:
+            django.db.models.QuerySet: The RepositoryContent of the version.
+        """
+        return RepositoryContent.objects.filter(
+            models.Q(number_removed__gt=number) | models.Q(number_removed=None),
+            repository=repository,
+            number_added__lte=number)
+
+    @staticmethod
+    def backfill_numbers():
+        """
+        Set the version numbers of the associations created before the columns were added.
+
+        Returns:
+            int: The number of associations updated.
+        """
+        def number(field):
+            versions = RepositoryVersion.objects.filter(pk=models.OuterRef(field))
+            return models.Subquery(versions.values('number')[:1])
+
+        with transaction.atomic():
+            added = RepositoryContent.objects.filter(number_added=None).update(
+                number_added=number('version_added_id'))
+            RepositoryContent.objects.filter(number_removed=None).exclude(
+                version_removed=None).update(number_removed=number('version_removed_id'))
+        return added
 
 
 class RepositoryVersion(Model):
@@ -206,6 +263,9 @@ class RepositoryVersion(Model):
         action  (models.TextField): The action that produced the version.
         complete (models.BooleanField): If true, the RepositoryVersion is visible. This field is set
             to true when the task that creates the RepositoryVersion is complete.
+        deleting (models.BooleanField): If true, the RepositoryVersion is being squashed into the
+            next version, or its squash failed and has to be run again. It is hidden and no new
+            version of the repository can be created meanwhile.
 
     Relations:
 
@@ -214,9 +274,15 @@ class RepositoryVersion(Model):
     repository = models.ForeignKey(Repository, on_delete=models.CASCADE)
     number = models.PositiveIntegerField(db_index=True)
     complete = models.BooleanField(db_index=True, default=False)
+    deleting = models.BooleanField(default=False)
     base_version = models.ForeignKey('Repositoryversion', null=True,
                                      on_delete=models.SET_NULL)
 
+    # The number of content units of a list inserted by each statement of add_content().
+    ADD_CHUNK_SIZE = 10000
+    # The number of RepositoryContent changed by each transaction of delete().
+    SQUASH_CHUNK_SIZE = 10000
+
     class Meta:
         default_related_name = 'versions'
         unique_together = ('repository', 'number')
@@ -242,11 +308,8 @@ class RepositoryVersion(Model):
             >>>     ...
             >>>
         """
-        relationships = RepositoryContent.objects.filter(
-            repository=self.repository, version_added__number__lte=self.number).exclude(
-            version_removed__number__lte=self.number
-        )
-        return Content.objects.filter(version_memberships__in=relationships)
+        relationships = RepositoryContent.in_version(self.repository_id, self.number)
+        return Content.objects.filter(pk__in=relationships.values('content_id'))
 
     def contains(self, content):
         """
@@ -262,12 +325,71 @@ class RepositoryVersion(Model):
         """
         The contained content summary.
 
+        The counts stored when the version was completed are used when available.
+
+        Returns:
+            dict: of {<type>: <count>}
+        """
+        return self._summary(RepositoryVersionContentDetails.PRESENT, lambda: self.content)
+
+    @property
+    def content_added_summary(self):
+        """
+        The summary of the content added by this version.
+
+        Returns:
+            dict: of {<type>: <count>}
+        """
+        return self._summary(RepositoryVersionContentDetails.ADDED, self.added)
+
+    @property
+    def content_removed_summary(self):
+        """
+        The summary of the content removed by this version.
+
+        Returns:
+            dict: of {<type>: <count>}
+        """
+        return self._summary(RepositoryVersionContentDetails.REMOVED, self.removed)
+
+    def _summary(self, count_type, content):
+        """
+        Args:
+            count_type (str): One of the RepositoryVersionContentDetails count types.
+            content (callable): Returns the content to be counted when there are no stored counts.
+
         Returns:
             dict: of {<type>: <count>}
         """
-        annotated = self.content.values('type').annotate(count=models.Count('type'))
+        # Iterate over all() rather than filter() to make use of prefetched counts.
+        counts = self.counts.all()
+        if self.complete and counts:
+            return {c.content_type: c.count for c in counts if c.count_type == count_type}
+        annotated = content().values('type').annotate(count=models.Count('type'))
         return {c['type']: c['count'] for c in annotated}
 
+    def _compute_counts(self):
+        """
+        Compute and store the counts of the content in, added and removed by this version.
+        """
+        self.counts.all().delete()
+        counts = []
+        for count_type, content in (
+                (RepositoryVersionContentDetails.PRESENT, self.content),
+                (RepositoryVersionContentDetails.ADDED, self.added()),
+                (RepositoryVersionContentDetails.REMOVED, self.removed())):
+            annotated = content.values('type').annotate(count=models.Count('type'))
+            for c in annotated:
+                counts.append(
+                    RepositoryVersionContentDetails(
+                        repository_version=self,
+                        content_type=c['type'],
+                        count_type=count_type,
+                        count=c['count']
+                    )
+                )
+        RepositoryVersionContentDetails.objects.bulk_create(counts)
+
     @classmethod
     def create(cls, repository, base_version=None):
         """
@@ -281,9 +403,15 @@ class RepositoryVersion(Model):
 
         Returns:
             pulpcore.app.models.RepositoryVersion: The Created RepositoryVersion
+
+        Raises:
+            ValueError: If a version of the repository is being deleted.
         """
 
         with transaction.atomic():
+            if repository.versions.filter(deleting=True).exists():
+                raise ValueError(_('A version of repository {name} is being deleted. Its deletion '
+                                   'must complete first.').format(name=repository.name))
             version = cls(
                 repository=repository,
                 number=int(repository.last_version) + 1,
@@ -293,15 +421,59 @@ class RepositoryVersion(Model):
             version.save()
 
             if base_version:
-                # first remove the content that isn't in the base version
-                version.remove_content(version.content.exclude(pk__in=base_version.content))
-                # now add any content that's in the base_version but not in version
-                version.add_content(base_version.content.exclude(pk__in=version.content))
+                version._copy(base_version)
 
             resource = CreatedResource(content_object=version)
             resource.save()
             return version
 
+    def _copy(self, base_version):
+        """
+        Make the content of this new version the content of another version.
+
+        The content to be removed and added are each selected with an anti-join and applied with
+        a single UPDATE and INSERT ... SELECT, so that no content is loaded in memory.
+
+        Args:
+            base_version (pulpcore.app.models.RepositoryVersion): The version to be copied.
+        """
+        current = RepositoryContent.in_version(self.repository_id, self.number)
+        base = RepositoryContent.in_version(base_version.repository_id, base_version.number)
+
+        # first remove the content that isn't in the base version
+        in_base = base.filter(content_id=models.OuterRef('content_id'))
+        current.annotate(in_base=models.Exists(in_base)).filter(in_base=False).update(
+            version_removed=self, number_removed=self.number)
+
+        # now add any content that's in the base_version but not in version
+        in_current = current.filter(content_id=models.OuterRef('content_id'))
+        added = base.annotate(in_current=models.Exists(in_current)).filter(in_current=False)
+        self._insert(added.values('content_id'))
+
+    def _insert(self, content_ids):
+        """
+        Add content to this version with a single INSERT ... SELECT statement.
+
+        Args:
+            content_ids (django.db.models.QuerySet): Selecting the pk of each Content to add.
+                The content must not already be in this version.
+
+        Returns:
+            int: The number of content units added.
+        """
+        try:
+            query, params = content_ids.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        sql = (
+            'INSERT INTO {table} '
+            '(created, last_updated, repository_id, content_id, version_added_id, number_added) '
+            'SELECT NOW(), NOW(), %s, content.id, %s, %s FROM ({query}) AS content (id)'
+        ).format(table=RepositoryContent._meta.db_table, query=query)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.repository_id, self.pk, self.number] + list(params))
+            return cursor.rowcount
+
     @staticmethod
     def latest(repository):
         """
@@ -315,22 +487,54 @@ class RepositoryVersion(Model):
 
         """
         with suppress(RepositoryVersion.DoesNotExist):
-            model = repository.versions.exclude(complete=False).latest()
+            model = repository.versions.exclude(complete=False).exclude(deleting=True).latest()
             return model
 
-    def added(self):
+    def added(self, base_version=None):
         """
+        Args:
+            base_version (pulpcore.app.models.RepositoryVersion): An optional version to compare
+                with, of any repository. Defaults to the previous version.
+
         Returns:
             QuerySet: The Content objects that were added by this version.
         """
-        return Content.objects.filter(version_memberships__version_added=self)
+        if base_version is None:
+            return Content.objects.filter(version_memberships__version_added=self)
+        return self._difference(self, base_version)
 
-    def removed(self):
+    def removed(self, base_version=None):
         """
+        Args:
+            base_version (pulpcore.app.models.RepositoryVersion): An optional version to compare
+                with, of any repository. Defaults to the previous version.
+
         Returns:
             QuerySet: The Content objects that were removed by this version.
         """
-        return Content.objects.filter(version_memberships__version_removed=self)
+        if base_version is None:
+            return Content.objects.filter(version_memberships__version_removed=self)
+        return self._difference(base_version, self)
+
+    @staticmethod
+    def _difference(version, other):
+        """
+        Select the content of a version which is not in another one with an anti-join of the
+        RepositoryContent of both versions.
+
+        Args:
+            version (pulpcore.app.models.RepositoryVersion): A version.
+            other (pulpcore.app.models.RepositoryVersion): The version to be subtracted.
+
+        Returns:
+            QuerySet: The Content objects in `version` and not in `other`.
+        """
+        in_other = RepositoryContent.in_version(other.repository_id, other.number).filter(
+            content_id=models.OuterRef('content_id'))
+        relationships = RepositoryContent.in_version(version.repository_id, version.number)
+        relationships = relationships.annotate(in_other=models.Exists(in_other)).filter(
+            in_other=False)
+        return Content.objects.filter(pk__in=relationships.values('content_id'))
 
     def next(self):
         """
@@ -352,8 +556,15 @@ class RepositoryVersion(Model):
         """
         Add a content unit to this version.
 
+        The content not already in this version is inserted by the database with a single
+        INSERT ... SELECT statement. A list is added in chunks of ADD_CHUNK_SIZE units.
+
         Args:
-           content (django.db.models.QuerySet): Set of Content to add
+           content (django.db.models.QuerySet): Set of Content to add. A list of Content or
+                of Content primary keys is also accepted.
+
+        Returns:
+            int: The number of content units added, not counting those already in this version.
 
         Raise:
             pulpcore.exception.ResourceImmutableError: if add_content is called on a
@@ -362,17 +573,27 @@ class RepositoryVersion(Model):
         if self.complete:
             raise ResourceImmutableError(self)
 
-        repo_content = []
-        for content_pk in content.exclude(pk__in=self.content).values_list('pk', flat=True):
-            repo_content.append(
-                RepositoryContent(
-                    repository=self.repository,
-                    content_id=content_pk,
-                    version_added=self
-                )
-            )
+        if isinstance(content, models.QuerySet):
+            return self._add(content)
+
+        pks = [getattr(c, 'pk', c) for c in content]
+        added = 0
+        for i in range(0, len(pks), self.ADD_CHUNK_SIZE):
+            added += self._add(Content.objects.filter(pk__in=pks[i:i + self.ADD_CHUNK_SIZE]))
+        return added
 
-        RepositoryContent.objects.bulk_create(repo_content)
+    def _add(self, content):
+        """
+        Args:
+           content (django.db.models.QuerySet): Set of Content to add.
+
+        Returns:
+            int: The number of content units added.
+        """
+        in_version = RepositoryContent.in_version(self.repository_id, self.number).filter(
+            content_id=models.OuterRef('pk'))
+        added = content.annotate(in_version=models.Exists(in_version)).filter(in_version=False)
+        return self._insert(added.values('pk'))
 
     def remove_content(self, content):
         """
@@ -393,38 +614,84 @@ class RepositoryVersion(Model):
             repository=self.repository,
             content_id__in=content,
             version_removed=None)
-        q_set.update(version_removed=self)
+        q_set.update(version_removed=self, number_removed=self.number)
 
-    def _squash(self, repo_relations, next_version):
+    def _chunked(self, relations, apply, progress=None):
         """
-        Squash a complete repo version into the next version
-        """
-        # delete any relationships added in the version being deleted and removed in the next one.
-        repo_relations.filter(version_added=self, version_removed=next_version).delete()
+        Apply a change to RepositoryContent in chunks, each in its own transaction.
 
-        # If the same content is deleted in version, but added back in next_version
-        # set version_removed field in relation to None, and remove relation adding the content
-        # in next_version
-        content_added = repo_relations.filter(version_added=next_version).values_list('content_id')
+        Chunks are selected by ascending pk so that each statement uses an index and row locks are
+        held for one chunk at a time.
 
-        # use list() to force the evaluation of the queryset, otherwise queryset is affected
-        # by the update() operation before delete() is ran
-        content_removed_and_readded = list(repo_relations.filter(version_removed=self,
-                                                                 content_id__in=content_added)
-                                           .values_list('content_id'))
+        Args:
+            relations (django.db.models.QuerySet): The RepositoryContent to be changed.
+            apply (callable): Called with a QuerySet of each chunk of relations.
+            progress (pulpcore.app.models.ProgressBar): Incremented by the size of each chunk.
+        """
+        last = 0
+        while True:
+            pks = list(relations.filter(pk__gt=last).order_by('pk').values_list(
+                'pk', flat=True)[:self.SQUASH_CHUNK_SIZE])
+            if not pks:
+                return
+            with transaction.atomic():
+                apply(RepositoryContent.objects.filter(pk__in=pks))
+            last = pks[-1]
+            if progress is not None:
+                progress.done += len(pks)
+                progress.save()
 
-        repo_relations.filter(version_removed=self,
-                              content_id__in=content_removed_and_readded)\
-            .update(version_removed=None)
+    def _squash(self, repo_relations, next_version, progress=None):
+        """
+        Squash a complete repo version into the next version
+        """
+        number, next_number = self.number, next_version.number
 
-        repo_relations.filter(version_added=next_version,
-                              content_id__in=content_removed_and_readded).delete()
+        # delete any relationships added in the version being deleted and removed in the next one.
+        self._chunked(
+            repo_relations.filter(number_added=number, number_removed=next_number),
+            lambda chunk: chunk.delete(),
+            progress)
+
+        # If the same content is deleted in version, but added back in next_version, the
+        # relationship removed in version takes over the removal of the relationship added in
+        # next_version, which is deleted.
+        def merge(chunk):
+            readded = repo_relations.filter(
+                number_added=next_number,
+                content_id__in=chunk.values('content_id')
+            )
+            removals = list(
+                readded.values_list('content_id', 'version_removed_id', 'number_removed'))
+            readded.delete()
+            content_ids = defaultdict(list)
+            for content_id, version_removed_id, number_removed in removals:
+                content_ids[(version_removed_id, number_removed)].append(content_id)
+            for (version_removed_id, number_removed), ids in content_ids.items():
+                chunk.filter(content_id__in=ids).update(
+                    version_removed_id=version_removed_id, number_removed=number_removed)
+
+        readded = repo_relations.filter(number_added=next_number,
+                                        content_id=models.OuterRef('content_id'))
+        self._chunked(
+            repo_relations.filter(number_removed=number).annotate(
+                readded=models.Exists(readded)).filter(readded=True),
+            merge,
+            progress)
 
         # "squash" by moving other additions and removals forward to the next version
-        repo_relations.filter(version_added=self).update(version_added=next_version)
-        repo_relations.filter(version_removed=self).update(version_removed=next_version)
+        def move(chunk):
+            chunk.filter(number_added=number).update(version_added=next_version,
+                                                     number_added=next_number)
+            chunk.filter(number_removed=number).update(version_removed=next_version,
+                                                       number_removed=next_number)
+
+        self._chunked(
+            repo_relations.filter(models.Q(number_added=number) | models.Q(number_removed=number)),
+            move,
+            progress)
 
-    def delete(self, **kwargs):
+    def delete(self, progress=None, **kwargs):
         """
         Deletes a RepositoryVersion
 
@@ -432,26 +699,54 @@ class RepositoryVersion(Model):
         the successor. If version is incomplete, delete and and clean up RepositoryContent,
         CreatedResource, and Repository objects.
 
+        RepositoryContent of a complete RepositoryVersion are changed in chunks, each in its own
+        transaction, so that deleting a version of a large repository does not hold row locks
+        for long. The content of the other versions is the same after each chunk, only the
+        content added and removed by the next version is in flux until the squash is done. The
+        version is flagged as `deleting` first, so that it is hidden and no new version is created
+        meanwhile. Each step only selects the RepositoryContent it did not change yet, so if the
+        deletion fails, running it again completes it.
+
         Deletion of a complete RepositoryVersion should be done in a RQ Job.
+
+        Args:
+            progress (pulpcore.app.models.ProgressBar): Optional progress of the changed
+                RepositoryContent.
         """
         if self.complete:
+            if not self.deleting:
+                self.deleting = True
+                self.save(update_fields=['deleting'])
             repo_relations = RepositoryContent.objects.filter(repository=self.repository)
+            if progress is not None:
+                progress.total = repo_relations.filter(
+                    models.Q(number_added=self.number) | models.Q(number_removed=self.number)
+                ).count()
+                progress.save()
             try:
                 next_version = self.next()
-                self._squash(repo_relations, next_version)
+                self._squash(repo_relations, next_version, progress)
+                with transaction.atomic():
+                    next_version._compute_counts()
+                    super().delete(**kwargs)
 
             except RepositoryVersion.DoesNotExist:
                 # version is the latest version so simply update repo contents
                 # and delete the version
-                repo_relations.filter(version_added=self).delete()
-                repo_relations.filter(version_removed=self).update(version_removed=None)
-            super().delete(**kwargs)
+                self._chunked(repo_relations.filter(number_added=self.number),
+                              lambda chunk: chunk.delete(),
+                              progress)
+                self._chunked(repo_relations.filter(number_removed=self.number),
+                              lambda chunk: chunk.update(version_removed=None,
+                                                         number_removed=None),
+                              progress)
+                super().delete(**kwargs)
 
         else:
             with transaction.atomic():
                 RepositoryContent.objects.filter(version_added=self).delete()
                 RepositoryContent.objects.filter(version_removed=self) \
-                    .update(version_removed=None)
+                    .update(version_removed=None, number_removed=None)
                 CreatedResource.objects.filter(object_id=self.pk).delete()
                 self.repository.last_version = self.number - 1
                 self.repository.save()
@@ -473,5 +768,43 @@ class RepositoryVersion(Model):
         if exc_value:
             self.delete()
         else:
+            self._compute_counts()
             self.complete = True
             self.save()
+
+
+class RepositoryVersionContentDetails(Model):
+    """
+    The count of a type of content in, added or removed by a repository version.
+
+    Counts are computed when the version is completed so that summarizing a version does not
+    aggregate its content.
+
+    Fields:
+
+        content_type (models.TextField): The type of the counted content.
+        count_type (models.CharField): Whether the content is present in, added or removed by
+            the version.
+        count (models.PositiveIntegerField): The number of content units.
+
+    Relations:
+
+        repository_version (models.ForeignKey): The counted repository version.
+    """
+    ADDED = 'A'
+    PRESENT = 'P'
+    REMOVED = 'R'
+    COUNT_TYPE_CHOICES = (
+        (ADDED, 'added'),
+        (PRESENT, 'present'),
+        (REMOVED, 'removed'),
+    )
+
+    repository_version = models.ForeignKey(RepositoryVersion, related_name='counts',
+                                           on_delete=models.CASCADE)
+    content_type = models.TextField()
+    count_type = models.CharField(max_length=1, choices=COUNT_TYPE_CHOICES)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('repository_version', 'content_type', 'count_type')
@@ -1,12 +1,21 @@
 import os
 import errno
 
+from gettext import gettext as _
 from uuid import uuid4
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files import File
 from django.core.files.storage import FileSystemStorage
 
+try:
+    from storages.backends.s3boto3 import S3Boto3Storage
+    from storages.utils import setting
+except ImportError:
+    # django-storages is only required when storing files in S3.
+    S3Boto3Storage = None
+
 
 class FileSystem(FileSystemStorage):
     """
@@ -114,6 +123,64 @@ class FileSystem(FileSystemStorage):
                 raise
 
 
+class S3(S3Boto3Storage or object):
+    """
+    Storage of files in S3 (compatible) object storage, with the save() behavior of FileSystem.
+
+    Requires django-storages and boto3. It is configured by the django-storages AWS_* settings,
+    e.g. AWS_STORAGE_BUCKET_NAME, AWS_S3_ENDPOINT_URL (for S3 compatible stores) and
+    AWS_QUERYSTRING_EXPIRE (the lifetime in seconds of the pre-signed URLs returned by url()).
+
+    Files are stored with keys relative to MEDIA_ROOT, e.g. artifact/<sha256[0:2]>/<sha256[2:]>,
+    and are private by default. Combined with the `s3` content responder, clients are redirected
+    to pre-signed URLs and Pulp never proxies the content.
+
+    Like FileSystem, a file is not uploaded when a file with the same name already exists.
+    """
+
+    if S3Boto3Storage:
+        default_acl = setting('AWS_DEFAULT_ACL', 'private')
+
+    def __init__(self, *args, **kwargs):
+        if S3Boto3Storage is None:
+            raise ImproperlyConfigured(
+                _('The S3 storage backend requires django-storages and boto3 to be installed.'))
+        super().__init__(*args, **kwargs)
+
+    def _clean_name(self, name):
+        """
+        Get the key of a file relative to MEDIA_ROOT.
+
+        Args:
+            name (str): The file name, usually an absolute path within MEDIA_ROOT.
+
+        Returns:
+            str: The cleaned name.
+        """
+        if os.path.isabs(name) and name.startswith(settings.MEDIA_ROOT):
+            name = os.path.relpath(name, settings.MEDIA_ROOT)
+        return super()._clean_name(name)
+
+    def save(self, name, content, max_length=None):
+        """
+        Saves the file if it doesn't already exist
+
+        Args:
+            name (str): Target path to which the file is uploaded.
+            content (File): Source file object.
+            max_length (int): Maximum supported length of file name.
+
+        Returns:
+            str: Final storage path.
+        """
+        if name is None:
+            name = content.name
+
+        if self.exists(name):
+            return self._clean_name(name)
+        return super().save(name, content, max_length=max_length)
+
+
 def get_artifact_path(sha256digest):
     """
     Determine the absolute path where a file backing the Artifact should be stored.
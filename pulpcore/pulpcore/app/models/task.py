@@ -7,14 +7,23 @@ import logging
 import traceback
 import uuid
 
-from django.db import models, transaction
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.functional import cached_property
 from rq.job import get_current_job
 
 from pulpcore.app.models import Model, GenericRelationModel
 from pulpcore.app.fields import JSONField
-from pulpcore.constants import TASK_FINAL_STATES, TASK_CHOICES, TASK_STATES
+from pulpcore.constants import (
+    TASK_CHOICES,
+    TASK_FINAL_STATES,
+    TASK_INCOMPLETE_STATES,
+    TASK_PRIORITIES,
+    TASK_STATES,
+)
 from pulpcore.exceptions import exception_to_dict
+from pulpcore.tasking.connection import get_redis_connection
 from pulpcore.tasking.constants import TASKING_CONSTANTS
 
 
@@ -88,6 +97,29 @@ class WorkerManager(models.Manager):
         except IndexError:
             raise self.model.DoesNotExist()
 
+    def with_load(self):
+        """
+        Returns a queryset of online workers processing end-user Tasks, annotated with their load
+
+        Each worker is annotated with:
+
+        * ``reserved``: Whether the worker holds any :class:`~pulpcore.app.models.ReservedResource`.
+        * ``tasks_queued``: The number of its tasks that are waiting or running.
+        * ``cost_queued``: The total expected cost of these tasks, as recorded by their
+          :class:`~pulpcore.app.models.TaskPlacement`.
+
+        Returns:
+            :class:`django.db.models.query.QuerySet`:  A query set of the annotated Worker objects.
+        """
+        incomplete = models.Q(tasks__state__in=TASK_INCOMPLETE_STATES)
+        reservations = ReservedResource.objects.filter(worker=models.OuterRef('pk'))
+        workers_qs = self.online_workers().filter(name__startswith=TASKING_CONSTANTS.WORKER_PREFIX)
+        return workers_qs.annotate(
+            reserved=models.Exists(reservations),
+            tasks_queued=models.Count('tasks', filter=incomplete),
+            cost_queued=Coalesce(models.Sum('tasks__placement__cost', filter=incomplete), 0),
+        )
+
     def online_workers(self):
         """
         Returns a queryset of workers meeting the criteria to be considered 'online'
@@ -160,7 +192,8 @@ class WorkerManager(models.Manager):
             Worker.DoesNotExist: If no worker has all resources locked
             Worker.MultipleObjectsReturned: More than one worker holds reservations
         """
-        return self.filter(reservations__resource__in=resources).distinct().get()
+        reservations = ReservedResource.objects.filter(resource__in=resources)
+        return self.filter(pk__in=reservations.values('worker_id')).get()
 
 
 class Worker(Model):
@@ -232,20 +265,97 @@ class Worker(Model):
         """
         Attempt to lock all resources by their urls. Must be atomic to prevent deadlocks.
 
+        The reservations are created, or reused if this worker already holds them, and associated
+        with the task by a single INSERT ... ON CONFLICT statement which also returns the resources
+        reserved by other workers.
+
         Arguments:
             task (pulpcore.app.models.Task): task to lock the resource for
             resource_urls (List): a list of resource urls to be locked
 
         Raises:
-            django.db.IntegrityError: If the reservation already exists
+            django.db.IntegrityError: If the reservation already exists for another worker
         """
-        with transaction.atomic():
-            for resource in resource_urls:
-                if self.reservations.filter(resource=resource).exists():
-                    reservation = self.reservations.get(resource=resource)
-                else:
-                    reservation = ReservedResource.objects.create(worker=self, resource=resource)
-                TaskReservedResource.objects.create(resource=reservation, task=task)
+        resource_urls = sorted(set(resource_urls))
+        if not resource_urls:
+            return
+        sql = (
+            'WITH reserved AS ('
+            ' INSERT INTO {reservations} AS reservation'
+            ' (created, last_updated, resource, worker_id)'
+            ' SELECT NOW(), NOW(), resource, %(worker)s FROM unnest(%(resources)s::text[]) resource'
+            ' ON CONFLICT (resource) DO UPDATE SET last_updated = NOW()'
+            ' WHERE reservation.worker_id = EXCLUDED.worker_id'
+            ' RETURNING id, resource'
+            '), associated AS ('
+            ' INSERT INTO {task_reservations} (created, last_updated, resource_id, task_id)'
+            ' SELECT NOW(), NOW(), id, %(task)s FROM reserved'
+            ')'
+            ' SELECT resource FROM unnest(%(resources)s::text[]) resource'
+            ' WHERE resource NOT IN (SELECT resource FROM reserved)'
+        ).format(reservations=ReservedResource._meta.db_table,
+                 task_reservations=TaskReservedResource._meta.db_table)
+        params = {'worker': self.pk, 'task': str(task.pk), 'resources': resource_urls}
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            conflicts = [resource for resource, in cursor.fetchall()]
+            if conflicts:
+                raise IntegrityError(
+                    _('Resources are reserved by another worker: {}').format(', '.join(conflicts)))
+
+
+class TaskQuerySet(models.QuerySet):
+    """
+    A QuerySet of tasks, able to move them into the task history.
+    """
+
+    def archive(self, batch_size=1000):
+        """
+        Move the tasks of this queryset which are in a final state into the task history.
+
+        Each batch of tasks is copied into :class:`~pulpcore.app.models.TaskHistory` by a single
+        INSERT ... SELECT statement and then deleted, along with their progress reports, created
+        resources and placement. The tasks of a batch are locked, skipping those already locked by
+        a concurrent archival.
+
+        Tasks still associated with a reserved resource are kept, and so are the dependencies of
+        tasks which are not in a final state, which would otherwise be dispatched regardless. The
+        tasks of a group are only archived once all of them can be, so that the state of the group
+        stays right.
+
+        The newest tasks are archived first, so that spawned tasks are archived before their
+        parent and still record its ID.
+
+        Args:
+            batch_size (int): The number of tasks archived by each transaction.
+
+        Yields:
+            int: The number of tasks archived by each batch.
+        """
+        tasks = self.filter(state__in=TASK_FINAL_STATES).exclude(
+            pk__in=TaskReservedResource.objects.values('task_id')).exclude(
+            dependents__state__in=TASK_INCOMPLETE_STATES)
+        kept = self.model.objects.exclude(pk__in=tasks.values('pk'))
+        tasks = tasks.exclude(task_group__tasks__in=kept).order_by('-created')
+        sql = (
+            'INSERT INTO {history}'
+            ' (id, created, last_updated, state, started_at, finished_at, error, worker, parent)'
+            ' SELECT task.id, task.created, NOW(), task.state, task.started_at, task.finished_at,'
+            ' task.error, worker.name, task.parent_id'
+            ' FROM {tasks} task LEFT JOIN {workers} worker ON worker.id = task.worker_id'
+            ' WHERE task.id = ANY(%(tasks)s::uuid[])'
+        ).format(history=TaskHistory._meta.db_table, tasks=self.model._meta.db_table,
+                 workers=Worker._meta.db_table)
+        while True:
+            with transaction.atomic():
+                task_ids = tasks.select_for_update(skip_locked=True).values_list('pk', flat=True)
+                task_ids = [str(pk) for pk in task_ids[:batch_size]]
+                if not task_ids:
+                    return
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, {'tasks': task_ids})
+                self.model.objects.filter(pk__in=task_ids).delete()
+            yield len(task_ids)
 
 
 class Task(Model):
@@ -265,6 +375,9 @@ class Task(Model):
 
         parent (models.ForeignKey): Task that spawned this task (if any)
         worker (models.ForeignKey): The worker that this task is in
+        task_group (models.ForeignKey): The group the task was submitted in (if any)
+        dependencies (models.ManyToManyField): The tasks which must complete before this task is
+            dispatched
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     state = models.TextField(choices=TASK_CHOICES)
@@ -279,6 +392,18 @@ class Task(Model):
                                on_delete=models.SET_NULL)
     worker = models.ForeignKey("Worker", null=True, related_name="tasks",
                                on_delete=models.SET_NULL)
+    task_group = models.ForeignKey("TaskGroup", null=True, related_name="tasks",
+                                   on_delete=models.SET_NULL)
+    dependencies = models.ManyToManyField("Task", symmetrical=False, related_name="dependents")
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'finished_at']),
+            models.Index(fields=['worker', 'state']),
+            models.Index(fields=['parent', 'created']),
+        ]
 
     @staticmethod
     def current():
@@ -294,17 +419,37 @@ class Task(Model):
             task = Task.objects.get(pk=task_id)
         return task
 
+    @staticmethod
+    def notify_changed(task_id):
+        """
+        Notify the clients waiting for a change of the state or progress of a task.
+
+        Args:
+            task_id (uuid.UUID): The ID of the task.
+        """
+        channel = TASKING_CONSTANTS.TASK_CHANGES_CHANNEL.format(task_id)
+        get_redis_connection().publish(channel, 1)
+
     def set_running(self):
         """
         Set this Task to the running state, save it, and log output in warning cases.
 
-        This updates the :attr:`started_at` and sets the :attr:`state` to :attr:`RUNNING`.
+        This updates the :attr:`started_at` and sets the :attr:`state` to :attr:`RUNNING`, unless
+        the task reached a final state meanwhile, e.g. it was canceled.
+
+        Returns:
+            bool: False if the task is in a final state, otherwise True.
         """
         if self.state != TASK_STATES.WAITING:
             _logger.warning(_('Task __call__() occurred but Task %s is not at WAITING') % self.id)
+        now = timezone.now()
+        tasks = Task.objects.filter(pk=self.pk).exclude(state__in=TASK_FINAL_STATES)
+        if not tasks.update(state=TASK_STATES.RUNNING, started_at=now, last_updated=now):
+            return False
         self.state = TASK_STATES.RUNNING
-        self.started_at = timezone.now()
-        self.save()
+        self.started_at = now
+        self.notify_changed(self.pk)
+        return True
 
     def set_completed(self):
         """
@@ -324,6 +469,7 @@ class Task(Model):
             _logger.warning(msg % self.id)
 
         self.save()
+        self.notify_changed(self.pk)
 
     def set_failed(self, exc, tb):
         """
@@ -341,16 +487,151 @@ class Task(Model):
         tb_str = ''.join(traceback.format_tb(tb))
         self.error = exception_to_dict(exc, tb_str)
         self.save()
+        self.notify_changed(self.pk)
 
     def release_resources(self):
         """
         Release the reserved resources that are reserved by this task. If a reserved resource no
         longer has any tasks reserving it, delete it.
+
+        The reserved resources are locked first, so that tasks releasing the same resource
+        concurrently do so one after the other, and the last one sees that no other task reserves
+        it anymore. The reservations are then released by a single DELETE statement.
+
+        Returns:
+            list: The urls of the resources which are not reserved anymore.
         """
-        for reservation in self.reserved_resources.all():
-            TaskReservedResource.objects.filter(task=self.id).delete()
-            if not reservation.tasks.exists():
-                reservation.delete()
+        lock = (
+            'SELECT reservation.id FROM {reservations} reservation'
+            ' JOIN {task_reservations} task_reservation'
+            ' ON task_reservation.resource_id = reservation.id'
+            ' WHERE task_reservation.task_id = %(task)s'
+            ' ORDER BY reservation.id FOR UPDATE OF reservation'
+        ).format(reservations=ReservedResource._meta.db_table,
+                 task_reservations=TaskReservedResource._meta.db_table)
+        sql = (
+            'WITH released AS ('
+            ' DELETE FROM {task_reservations} WHERE task_id = %(task)s RETURNING resource_id'
+            ')'
+            ' DELETE FROM {reservations} reservation'
+            ' WHERE id IN (SELECT resource_id FROM released)'
+            ' AND NOT EXISTS (SELECT 1 FROM {task_reservations} task_reservation'
+            '  WHERE task_reservation.resource_id = reservation.id'
+            '  AND task_reservation.task_id <> %(task)s)'
+            ' RETURNING reservation.resource'
+        ).format(reservations=ReservedResource._meta.db_table,
+                 task_reservations=TaskReservedResource._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(lock, {'task': str(self.pk)})
+            cursor.execute(sql, {'task': str(self.pk)})
+            return [resource for resource, in cursor.fetchall()]
+
+
+class TaskHistory(Model):
+    """
+    The compact record of a task in a final state, moved out of the task table
+
+    Fields:
+
+        id (models.UUIDField): The ID the task had.
+        state (models.TextField): The final state of the task.
+        started_at (models.DateTimeField): The time the task started executing
+        finished_at (models.DateTimeField): The time the task finished executing
+        error (pulpcore.app.fields.JSONField): Fatal errors generated by the task
+        worker (models.TextField): The name of the worker which executed the task, if any.
+        parent (models.UUIDField): The ID of the task that spawned the task, if any.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    state = models.TextField(choices=TASK_CHOICES)
+
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True, db_index=True)
+
+    error = JSONField(null=True)
+
+    worker = models.TextField(null=True)
+    parent = models.UUIDField(null=True)
+
+
+class TaskGroup(Model):
+    """
+    A group of tasks submitted together, with dependencies between them
+
+    Fields:
+
+        description (models.TextField): An optional description of the group.
+
+    Relations:
+
+        tasks (models.ForeignKey): The tasks of the group.
+    """
+    description = models.TextField(null=True)
+
+    @cached_property
+    def task_states(self):
+        """
+        The number of tasks of the group in each state.
+
+        Returns:
+            dict: The number of tasks keyed by state, for all of the states.
+        """
+        counts = self.tasks.order_by().values('state').annotate(count=models.Count('pk'))
+        counts = {count['state']: count['count'] for count in counts}
+        return {state: counts.get(state, 0) for state, label in TASK_CHOICES}
+
+    @property
+    def state(self):
+        """
+        The state of the group as a whole.
+
+        The group is waiting until any of its tasks started and running until all of its tasks are
+        in a final state. Then it is completed if all of its tasks completed and failed otherwise.
+
+        Returns:
+            str: The state of the group, one of :data:`pulpcore.constants.TASK_STATES`.
+        """
+        task_states = self.task_states
+        if any(task_states[state] for state in TASK_INCOMPLETE_STATES):
+            if task_states[TASK_STATES.WAITING] == sum(task_states.values()):
+                return TASK_STATES.WAITING
+            return TASK_STATES.RUNNING
+        if task_states[TASK_STATES.COMPLETED] == sum(task_states.values()):
+            return TASK_STATES.COMPLETED
+        return TASK_STATES.FAILED
+
+
+class TaskPlacement(Model):
+    """
+    The record of the decision to dispatch a task to a worker
+
+    Fields:
+
+        policy (models.TextField): The name of the placement policy which selected the worker, or
+            "reservation" if the worker already held a reservation the task needed.
+        cost (models.PositiveIntegerField): The expected cost of the task.
+        load (models.PositiveIntegerField): The total expected cost of the tasks queued for the
+            worker when it was selected. Null if the worker held a reservation the task needed.
+        priority (models.TextField): The priority class of the task.
+        tenant (models.TextField): The tenant the task was scheduled for, if any.
+
+    Relations:
+
+        task (models.OneToOneField): The task dispatched.
+        worker (models.ForeignKey): The worker the task was dispatched to.
+    """
+    policy = models.TextField()
+    cost = models.PositiveIntegerField(default=1)
+    load = models.PositiveIntegerField(null=True)
+    priority = models.TextField(default=TASK_PRIORITIES.NORMAL)
+    tenant = models.TextField(null=True)
+
+    task = models.OneToOneField("Task", related_name="placement", on_delete=models.CASCADE)
+    worker = models.ForeignKey("Worker", related_name="placements", on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'created']),
+        ]
 
 
 class CreatedResource(GenericRelationModel):
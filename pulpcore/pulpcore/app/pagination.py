@@ -1,4 +1,7 @@
+from collections import OrderedDict
+
 from rest_framework import pagination
+from rest_framework.response import Response
 
 
 class IDPagination(pagination.PageNumberPagination):
@@ -28,3 +31,50 @@ class NamePagination(pagination.PageNumberPagination):
     ordering = 'name'
     page_size_query_param = 'page_size'
     max_page_size = 5000
+
+
+class IDCursorPagination(pagination.CursorPagination):
+    """
+    Paginate an API view by seeking to the objects with an ID greater than the last one of the
+    previous page (keyset pagination).
+
+    Unlike `IDPagination`, which uses an offset, the cost of a page does not grow with its position,
+    so iterating over a large collection is linear overall. The objects are only counted when the
+    'count' query parameter is 'true', otherwise the count is null.
+
+    Views paginated by page number can offer it to the clients opting in with the 'pagination'
+    query parameter set to 'cursor', see `requested()`.
+
+    The same assumptions on the 'id' field as for `IDPagination` apply.
+
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
+    count_query_param = 'count'
+    pagination_query_param = 'pagination'
+
+    @classmethod
+    def requested(cls, request):
+        """
+        Args:
+            request (rest_framework.request.Request): The request of a page.
+
+        Returns:
+            bool: Whether the client opted in to cursor pagination.
+        """
+        return request.query_params.get(cls.pagination_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() == 'true':
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
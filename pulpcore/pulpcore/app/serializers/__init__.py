@@ -32,5 +32,13 @@ from .repository import (  # noqa
     RepositoryVersionSerializer,
     RepositoryVersionCreateSerializer
 )
-from .task import MinimalTaskSerializer, TaskSerializer, WorkerSerializer  # noqa
+from .task import (  # noqa
+    MinimalTaskSerializer,
+    TaskGroupOperationResponseSerializer,
+    TaskGroupSerializer,
+    TaskGroupSubmissionSerializer,
+    TaskHistorySerializer,
+    TaskSerializer,
+    WorkerSerializer
+)
 from .user import UserSerializer  # noqa
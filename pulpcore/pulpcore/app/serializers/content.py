@@ -1,6 +1,7 @@
 from gettext import gettext as _
 import hashlib
 
+from django.db.models import Manager, prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
@@ -11,6 +12,31 @@ from pulpcore.app.serializers import base, fields
 UNIQUE_ALGORITHMS = ['sha256', 'sha384', 'sha512']
 
 
+class ContentListSerializer(serializers.ListSerializer):
+    """
+    Serializes a list (e.g. a page) of Content.
+
+    The Content is cast and its ContentArtifacts fetched for the whole list at once, instead of
+    querying the database for each Content.
+    """
+
+    def to_representation(self, data):
+        """
+        Args:
+            data (django.db.models.QuerySet or list): The Content to be serialized.
+
+        Returns:
+            list: Of the representation of each Content.
+        """
+        if isinstance(data, Manager):
+            data = data.all()
+        content = list(data)
+        if content and isinstance(content[0], models.Content):
+            content = models.Content.objects.cast_objects(content)
+            prefetch_related_objects(content, 'contentartifact_set')
+        return super().to_representation(content)
+
+
 class ContentSerializer(base.MasterModelSerializer):
     _href = base.DetailIdentityField()
 
@@ -28,6 +54,7 @@ class ContentSerializer(base.MasterModelSerializer):
     class Meta:
         model = models.Content
         fields = base.MasterModelSerializer.Meta.fields + ('notes', 'artifacts')
+        list_serializer_class = ContentListSerializer
 
 
 class ArtifactSerializer(base.ModelSerializer):
@@ -1,7 +1,9 @@
+from functools import lru_cache
 from gettext import gettext as _
 import os
 
 from django.conf import settings
+from django.urls import get_script_prefix
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 from rest_framework_nested.relations import NestedHyperlinkedRelatedField
@@ -93,14 +95,31 @@ class ContentArtifactsField(serializers.DictField):
         ret = {}
         for content_artifact in value:
             if content_artifact.artifact_id:
-                url = reverse('artifacts-detail', kwargs={'pk': content_artifact.artifact_id},
-                              request=None)
+                url = _artifact_href_template(get_script_prefix()).replace(
+                    _PK_PLACEHOLDER, str(content_artifact.artifact_id))
             else:
                 url = None
             ret[content_artifact.relative_path] = url
         return ret
 
 
+_PK_PLACEHOLDER = '__pk__'
+
+
+@lru_cache()
+def _artifact_href_template(script_prefix):
+    """
+    The Artifact URL with a placeholder for the pk, to avoid reversing the URL of each Artifact.
+
+    Args:
+        script_prefix (str): The script prefix the URL is reversed with.
+
+    Returns:
+        str: The URL of an Artifact, with the pk replaced by _PK_PLACEHOLDER.
+    """
+    return reverse('artifacts-detail', kwargs={'pk': _PK_PLACEHOLDER}, request=None)
+
+
 class LatestVersionField(NestedHyperlinkedRelatedField):
     parent_lookup_kwargs = {'repository_pk': 'repository__pk'}
     lookup_field = 'number'
@@ -131,7 +150,7 @@ class LatestVersionField(NestedHyperlinkedRelatedField):
                 are no versions, returns None
         """
         try:
-            version = obj.exclude(complete=False).latest()
+            version = obj.exclude(complete=False).exclude(deleting=True).latest()
         except obj.model.DoesNotExist:
             return None
 
@@ -1,12 +1,12 @@
 from gettext import gettext as _
 
 from django.core import validators
-from django.db.models import Q
 
 from rest_framework import serializers, fields
 from rest_framework.validators import UniqueValidator
 
 from pulpcore.app import models
+from pulpcore.app.base_paths import base_paths
 from pulpcore.app.serializers import (
     BaseURLField,
     DetailIdentityField,
@@ -322,21 +322,10 @@ class DistributionSerializer(ModelSerializer):
         )
 
     def _validate_path_overlap(self, path):
-        # look for any base paths nested in path
-        search = path.split("/")[0]
-        q = Q(base_path=search)
-        for subdir in path.split("/")[1:]:
-            search = "/".join((search, subdir))
-            q |= Q(base_path=search)
-
-        # look for any base paths that nest path
-        q |= Q(base_path__startswith='{}/'.format(path))
-        qs = models.Distribution.objects.filter(q)
-
-        if self.instance is not None:
-            qs = qs.exclude(pk=self.instance.pk)
-
-        match = qs.first()
+        # look for any base paths nested in path or that nest path, including the
+        # distributions changed by other processes
+        base_paths.refresh(max_age=0)
+        match = base_paths.overlapping(path, exclude=self.instance)
         if match:
             raise serializers.ValidationError(detail=_("Overlaps with existing distribution '"
                                                        "{}'").format(match.name))
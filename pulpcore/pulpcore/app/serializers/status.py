@@ -38,6 +38,25 @@ class RedisConnectionSerializer(serializers.Serializer):
     )
 
 
+class TaskQueueSerializer(serializers.Serializer):
+    """
+    Serializer for the waiting tasks of a priority class
+    """
+
+    priority = serializers.CharField(
+        help_text=_("Priority class of the tasks")
+    )
+
+    waiting = serializers.IntegerField(
+        help_text=_("Number of tasks waiting to be dispatched to a worker")
+    )
+
+    oldest_waiting_since = serializers.DateTimeField(
+        help_text=_("Timestamp of the creation of the task waiting the longest, if any"),
+        allow_null=True
+    )
+
+
 class StatusSerializer(serializers.Serializer):
     """
     Serializer for the status information of the app
@@ -68,3 +87,9 @@ class StatusSerializer(serializers.Serializer):
     redis_connection = RedisConnectionSerializer(
         help_text=_("Redis connection information")
     )
+
+    task_queues = TaskQueueSerializer(
+        help_text=_("Tasks waiting to be dispatched to a worker, by priority class. Tasks of a "
+                    "class are dispatched before those of the following classes"),
+        many=True
+    )
@@ -72,6 +72,17 @@ class TaskSerializer(ModelSerializer):
         read_only=True,
         view_name='tasks-detail'
     )
+    task_group = RelatedField(
+        help_text=_("The group this task was submitted in, if any."),
+        read_only=True,
+        view_name='task-groups-detail'
+    )
+    dependencies = RelatedField(
+        help_text=_("The tasks which must complete before this task is dispatched."),
+        many=True,
+        read_only=True,
+        view_name='tasks-detail'
+    )
     progress_reports = ProgressReportSerializer(
         many=True,
         read_only=True
@@ -87,8 +98,8 @@ class TaskSerializer(ModelSerializer):
         model = models.Task
         fields = ModelSerializer.Meta.fields + ('state', 'started_at', 'finished_at',
                                                 'non_fatal_errors', 'error', 'worker', 'parent',
-                                                'spawned_tasks', 'progress_reports',
-                                                'created_resources')
+                                                'spawned_tasks', 'task_group', 'dependencies',
+                                                'progress_reports', 'created_resources')
 
 
 class MinimalTaskSerializer(TaskSerializer):
@@ -99,6 +110,158 @@ class MinimalTaskSerializer(TaskSerializer):
                                                 'worker', 'parent')
 
 
+class TaskHistorySerializer(ModelSerializer):
+    _href = IdentityField(view_name='task-history-detail')
+    state = serializers.CharField(
+        help_text=_("The final state of the task."),
+        read_only=True
+    )
+    started_at = serializers.DateTimeField(
+        help_text=_("Timestamp of the when this task started execution."),
+        read_only=True
+    )
+    finished_at = serializers.DateTimeField(
+        help_text=_("Timestamp of the when this task stopped execution."),
+        read_only=True
+    )
+    error = serializers.JSONField(
+        help_text=_("A JSON Object of a fatal error encountered during the execution of this "
+                    "task."),
+        read_only=True
+    )
+    worker = serializers.CharField(
+        help_text=_("The name of the worker which executed this task, if any."),
+        read_only=True
+    )
+    parent = serializers.UUIDField(
+        help_text=_("The ID of the task that spawned this task, if any."),
+        read_only=True
+    )
+
+    class Meta:
+        model = models.TaskHistory
+        fields = ModelSerializer.Meta.fields + ('state', 'started_at', 'finished_at', 'error',
+                                                'worker', 'parent')
+
+
+class TaskGroupSerializer(ModelSerializer):
+    _href = IdentityField(view_name='task-groups-detail')
+    description = serializers.CharField(
+        help_text=_("A description of the group."),
+        read_only=True
+    )
+    state = serializers.CharField(
+        help_text=_("The state of the group as a whole. It is 'waiting' until any of its tasks "
+                    "started and 'running' until all of its tasks are in a final state. Then it "
+                    "is 'completed' if all of its tasks completed and 'failed' otherwise."),
+        read_only=True
+    )
+    task_states = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text=_("The number of tasks of the group in each state."),
+        read_only=True
+    )
+    tasks = RelatedField(
+        help_text=_("The tasks of the group."),
+        many=True,
+        read_only=True,
+        view_name='tasks-detail'
+    )
+
+    class Meta:
+        model = models.TaskGroup
+        fields = ModelSerializer.Meta.fields + ('description', 'state', 'task_states', 'tasks')
+
+
+class TaskGroupOperationSerializer(serializers.Serializer):
+    """
+    Serializer for an operation of a task group submission.
+    """
+    name = serializers.CharField(
+        help_text=_("A name for the operation, unique within the submission, used to list it in "
+                    "the dependencies of the following operations.")
+    )
+    method = serializers.ChoiceField(
+        help_text=_("The HTTP method of the operation."),
+        choices=('post', 'put', 'patch', 'delete')
+    )
+    path = serializers.CharField(
+        help_text=_("The path of the API endpoint of the operation, e.g. the sync endpoint of a "
+                    "remote.")
+    )
+    body = serializers.DictField(
+        help_text=_("The body of the request of the operation."),
+        required=False,
+        default=dict
+    )
+    dependencies = serializers.ListField(
+        child=serializers.CharField(),
+        help_text=_("The names of the operations whose tasks must complete before the tasks of "
+                    "this operation are dispatched."),
+        required=False,
+        default=list
+    )
+
+
+class TaskGroupSubmissionSerializer(serializers.Serializer):
+    """
+    Serializer for the submission of a group of tasks.
+    """
+    description = serializers.CharField(
+        help_text=_("A description of the group."),
+        required=False
+    )
+    operations = TaskGroupOperationSerializer(
+        help_text=_("The operations dispatching the tasks of the group. Each operation may only "
+                    "depend on the operations before it."),
+        many=True
+    )
+
+    def validate_operations(self, operations):
+        """
+        Validate that the names of the operations are unique and their dependencies precede them.
+
+        Args:
+            operations (list): The validated operations.
+
+        Returns:
+            list: The operations.
+
+        Raises:
+            rest_framework.exceptions.ValidationError: If a name is not unique, or a dependency
+                is not the name of a preceding operation.
+        """
+        names = set()
+        for operation in operations:
+            if operation['name'] in names:
+                raise serializers.ValidationError(
+                    _("The name '{name}' is not unique.").format(name=operation['name']))
+            unknown = set(operation['dependencies']) - names
+            if unknown:
+                raise serializers.ValidationError(
+                    _("The operation '{name}' depends on unknown or following operations: "
+                      "{unknown}").format(name=operation['name'],
+                                          unknown=', '.join(sorted(unknown))))
+            names.add(operation['name'])
+        return operations
+
+
+class TaskGroupOperationResponseSerializer(serializers.Serializer):
+    """
+    Serializer for the response of a task group submission.
+    """
+    task_group = RelatedField(
+        help_text=_("The href of the task group."),
+        read_only=True,
+        view_name='task-groups-detail'
+    )
+    tasks = serializers.DictField(
+        child=serializers.ListField(child=serializers.CharField()),
+        help_text=_("The hrefs of the tasks dispatched by each operation, by name."),
+        read_only=True
+    )
+
+
 class WorkerSerializer(ModelSerializer):
     _href = IdentityField(view_name='workers-detail')
 
@@ -209,12 +209,34 @@ WORKING_DIRECTORY = '/var/lib/pulp/tmp'
 CONTENT = {
     'HOST': None,
     'WEB_SERVER': 'django',
+    'BLOCK_SIZE': 1048576,  # 1 megabyte
+    'BASE_PATH_REFRESH_INTERVAL': 2,  # seconds
+    'STREAM_TIMEOUT': 60,  # seconds
     'REDIRECT': {
         'HOST': None,
         'PORT': 443,
         'PATH_PREFIX': '/streamer/',
         'ENABLED': False,
-    }
+    },
+    'NEGATIVE_CACHE': {
+        'ENABLED': True,
+        'TTL': 10,  # seconds
+        'MAX_ENTRIES': 10000,
+    },
+}
+
+WORKER_PLACEMENT = {
+    # 'random' waits for a worker holding no reservations, the other policies fall back to queueing
+    # behind the tasks of a worker holding unrelated reservations, see pulpcore.tasking.placement
+    'POLICY': 'random',
+    'CAPACITY': 10,
+}
+
+WORKER_EXECUTOR = {
+    'PERSISTENT': False,
+    'MAX_JOBS': 100,
 }
 
+TASK_RETENTION_DAYS = 30
+
 PROFILE_STAGES_API = False
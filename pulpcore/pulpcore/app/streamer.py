@@ -0,0 +1,305 @@
+"""
+On-demand (streamed) retrieval of artifacts that have not been downloaded yet.
+
+When a published file is backed by a ContentArtifact without an Artifact, the bytes are
+downloaded from the remote that created the associated RemoteArtifact. The data is written
+to a file in the WORKING_DIRECTORY and, at the same time, streamed to every client that
+requested it. Once the download completes and validates, the file is saved as a new Artifact
+and the ContentArtifact is updated to reference it, so later requests are served locally.
+
+Concurrent requests for the same ContentArtifact (within one process) share a single
+download.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+
+from gettext import gettext as _
+from logging import getLogger
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from pulpcore.app.models import Artifact, ContentArtifact
+
+
+log = getLogger(__name__)
+
+
+class Stream:
+    """
+    A download of a RemoteArtifact that is shared by all clients requesting it.
+
+    The stream is the file object handed to the downloader (see ``custom_file_object``
+    in :class:`~pulpcore.plugin.download.BaseDownloader`). Every chunk written is appended to
+    the download file and the readers waiting for more data are notified.
+
+    Attributes:
+        remote_artifact (pulpcore.app.models.RemoteArtifact): The remote artifact downloaded.
+        path (str): The absolute path to the download file.
+        written (int): The number of bytes written to the download file so far.
+        done (bool): The download has finished (successfully or not).
+        error (Exception): The exception raised by the download.
+    """
+
+    def __init__(self, remote_artifact):
+        """
+        Args:
+            remote_artifact (pulpcore.app.models.RemoteArtifact): The remote artifact to
+                be downloaded.
+        """
+        self.remote_artifact = remote_artifact
+        self.written = 0
+        self.done = False
+        self.error = None
+        self._file = tempfile.NamedTemporaryFile(dir=settings.WORKING_DIRECTORY, delete=False)
+        self.path = self._file.name
+        self._source = os.open(self.path, os.O_RDONLY)
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        """
+        Returns:
+            int: The expected size of the artifact in bytes or None when unknown.
+        """
+        return self.remote_artifact.size
+
+    def write(self, data):
+        """
+        Write a chunk of downloaded data and notify the readers.
+
+        Args:
+            data (bytes): The downloaded data.
+        """
+        self._file.write(data)
+        self._file.flush()
+        with self._condition:
+            self.written += len(data)
+            self._condition.notify_all()
+
+    def flush(self):
+        self._file.flush()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+
+    def reader(self):
+        """
+        Get an iterator of the streamed data for one client.
+
+        The reader duplicates the descriptor opened with the download file so that it is
+        unaffected by the file being moved into artifact storage once the download completes.
+        The reader gives up when no data is received for ``CONTENT['STREAM_TIMEOUT']`` seconds.
+
+        Returns:
+            generator: Yields blocks of bytes. When the download fails or times out, the
+                exception is raised so that the response is aborted rather than silently
+                truncated.
+        """
+        fd = os.dup(self._source)
+        block_size = settings.CONTENT['BLOCK_SIZE']
+        timeout = settings.CONTENT['STREAM_TIMEOUT']
+
+        def read():
+            position = 0
+            try:
+                while True:
+                    with self._condition:
+                        received = self._condition.wait_for(
+                            lambda: self.written > position or self.done, timeout)
+                        available = self.written - position
+                        done = self.done
+                        error = self.error
+                    if not received:
+                        _unregister(self)
+                        raise TimeoutError(
+                            _('No data received from {url} for {timeout} seconds.').format(
+                                url=self.remote_artifact.url, timeout=timeout))
+                    if error:
+                        raise error
+                    if available:
+                        block = os.pread(fd, min(available, block_size), position)
+                        position += len(block)
+                        yield block
+                    elif done:
+                        return
+            finally:
+                os.close(fd)
+
+        return read()
+
+    def start(self):
+        """
+        Start the download in a separate thread.
+        """
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def _run(self):
+        """
+        Download the remote artifact and save the artifact.
+
+        Runs in its own thread with its own event loop and database connection. The readers
+        are notified as soon as the download has been validated; saving the artifact does not
+        delay the responses. The stream is unregistered only once the artifact is saved so that
+        no duplicate download is started in the meantime.
+        """
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            downloader = self._downloader()
+            try:
+                result = loop.run_until_complete(downloader.run())
+            finally:
+                self._close_session(loop, downloader)
+        except Exception as e:
+            log.exception(_('Streaming of {url} failed.').format(url=self.remote_artifact.url))
+            self.finish(e)
+        else:
+            self.finish()
+            try:
+                self._save(result.artifact_attributes)
+            except Exception:
+                log.exception(_('Saving the artifact downloaded from {url} failed.').format(
+                    url=self.remote_artifact.url))
+        finally:
+            _unregister(self)
+            os.close(self._source)
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            loop.close()
+            connection.close()
+
+    def finish(self, error=None):
+        """
+        Mark the download as finished and notify the readers.
+
+        Args:
+            error (Exception): The exception raised by the download, if any.
+        """
+        if not self._file.closed:
+            self._file.close()
+        with self._condition:
+            self.error = error
+            self.done = True
+            self._condition.notify_all()
+
+    def _downloader(self):
+        """
+        Build a downloader for the remote artifact using the detail remote.
+
+        Returns:
+            subclass of :class:`~pulpcore.plugin.download.BaseDownloader`: A downloader that
+            is configured with the remote settings and writes to this stream.
+        """
+        remote_artifact = self.remote_artifact
+        remote = remote_artifact.remote.cast()
+        validation_kwargs = {}
+        expected_digests = {}
+        for digest_name in Artifact.DIGEST_FIELDS:
+            digest_value = getattr(remote_artifact, digest_name)
+            if digest_value:
+                expected_digests[digest_name] = digest_value
+        if expected_digests:
+            validation_kwargs['expected_digests'] = expected_digests
+        if remote_artifact.size:
+            validation_kwargs['expected_size'] = remote_artifact.size
+        return remote.get_downloader(
+            remote_artifact.url,
+            custom_file_object=self,
+            **validation_kwargs)
+
+    @staticmethod
+    def _close_session(loop, downloader):
+        """
+        Close the aiohttp session (if any) created for the downloader.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The loop used by the download.
+            downloader (pulpcore.plugin.download.BaseDownloader): The downloader.
+        """
+        session = getattr(downloader, 'session', None)
+        if session is None:
+            return
+        closed = session.close()
+        if asyncio.iscoroutine(closed) or asyncio.isfuture(closed):
+            loop.run_until_complete(closed)
+
+    def _save(self, artifact_attributes):
+        """
+        Save the downloaded file as an Artifact and associate it with the ContentArtifact.
+
+        The Artifact may have been created concurrently (by another process or a sync) in which
+        case the existing Artifact is used.
+
+        Args:
+            artifact_attributes (dict): The size and digests of the downloaded file.
+        """
+        artifact = Artifact(file=self.path, **artifact_attributes)
+        try:
+            with transaction.atomic():
+                artifact.save()
+        except IntegrityError:
+            artifact = Artifact.objects.get(sha256=artifact_attributes['sha256'])
+        ContentArtifact.objects.filter(
+            pk=self.remote_artifact.content_artifact_id,
+            artifact=None).update(artifact=artifact)
+
+
+# The in-progress streams keyed by ContentArtifact.pk.
+_streams = {}
+_lock = threading.Lock()
+
+
+def _unregister(stream):
+    """
+    Remove a stream from the in-progress streams so that new clients no longer join it.
+
+    Args:
+        stream (Stream): The stream to remove.
+    """
+    with _lock:
+        key = stream.remote_artifact.content_artifact_id
+        if _streams.get(key) is stream:
+            del _streams[key]
+
+
+def stream(content_artifact):
+    """
+    Get a stream of the artifact for a ContentArtifact that has not been downloaded.
+
+    An in-progress download is joined when one exists. Otherwise, a download is started using
+    a RemoteArtifact of the content artifact. The RemoteArtifact is queried without holding the
+    lock, so requests for other content artifacts are not serialized.
+
+    Args:
+        content_artifact (pulpcore.app.models.ContentArtifact): A content artifact without
+            an artifact.
+
+    Returns:
+        tuple: Of (Stream, generator) where the generator yields the data for one client.
+            None when there is no RemoteArtifact to download from.
+    """
+    with _lock:
+        in_progress = _streams.get(content_artifact.pk)
+        if in_progress is not None:
+            return in_progress, in_progress.reader()
+    remote_artifact = content_artifact.remoteartifact_set.select_related(
+        'remote').order_by('pk').first()
+    if remote_artifact is None:
+        return None
+    with _lock:
+        # Another request may have started the download while the remote artifact was queried.
+        in_progress = _streams.get(content_artifact.pk)
+        started = in_progress is None
+        if started:
+            in_progress = _streams[content_artifact.pk] = Stream(remote_artifact)
+        reader = in_progress.reader()
+    if started:
+        in_progress.start()
+    return in_progress, reader
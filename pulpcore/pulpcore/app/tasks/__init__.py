@@ -1,3 +1,4 @@
 from pulpcore.app.tasks import base, repository  # noqa
 
+from .archive import archive_tasks  # noqa
 from .orphan import orphan_cleanup  # noqa
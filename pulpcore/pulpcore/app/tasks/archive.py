@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from pulpcore.app.models import ProgressBar, Task
+
+
+def archive_tasks():
+    """
+    Move the tasks which finished more than ``TASK_RETENTION_DAYS`` ago into the task history.
+    """
+    finished_before = timezone.now() - timedelta(days=settings.TASK_RETENTION_DAYS)
+    tasks = Task.objects.filter(finished_at__lt=finished_before)
+    progress_bar = ProgressBar(message='Archive finished tasks', total=tasks.count(), done=0,
+                               state='running')
+    progress_bar.save()
+    for archived in tasks.archive():
+        progress_bar.done += archived
+        progress_bar.save()
+
+    progress_bar.state = 'completed'
+    progress_bar.save()
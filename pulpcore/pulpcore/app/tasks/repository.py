@@ -1,8 +1,6 @@
 from gettext import gettext as _
 from logging import getLogger
 
-from django.db import transaction
-
 from pulpcore.app import models
 from pulpcore.app import serializers
 
@@ -47,6 +45,9 @@ def delete_version(pk):
     change would create a new one of the same number, which would violate the immutability
     guarantee.
 
+    The version is hidden while it is squashed. If the task fails, deleting the version again
+    completes the squash, see :meth:`pulpcore.app.models.RepositoryVersion.delete`.
+
     Args:
         pk (int): the primary key for a RepositoryVersion to delete
 
@@ -54,17 +55,17 @@ def delete_version(pk):
         models.RepositoryVersion.DoesNotExist: if there is not a newer version to squash into.
             TODO: something more friendly
     """
-    with transaction.atomic():
-        try:
-            version = models.RepositoryVersion.objects.get(pk=pk)
-        except models.RepositoryVersion.DoesNotExist:
-            log.info(_('The repository version was not found. Nothing to do.'))
-            return
+    try:
+        version = models.RepositoryVersion.objects.get(pk=pk)
+    except models.RepositoryVersion.DoesNotExist:
+        log.info(_('The repository version was not found. Nothing to do.'))
+        return
 
-        log.info(_('Deleting and squashing version %(v)d of repository %(r)s'),
-                 {'v': version.number, 'r': version.repository.name})
+    log.info(_('Deleting and squashing version %(v)d of repository %(r)s'),
+             {'v': version.number, 'r': version.repository.name})
 
-        version.delete()
+    with models.ProgressBar(message=_('Squashing repository version')) as progress:
+        version.delete(progress=progress)
 
 
 def add_and_remove(repository_pk, add_content_units, remove_content_units, base_version_pk=None):
@@ -1,11 +1,15 @@
+import mimetypes
 import os
+import time
 
 from gettext import gettext as _
 from logging import getLogger, DEBUG
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
+from django.core.files.storage import default_storage
 from django.http import (
+    FileResponse,
     HttpResponse,
     HttpResponseRedirect,
     HttpResponseForbidden,
@@ -15,7 +19,9 @@ from django.views.generic import View
 
 from wsgiref.util import FileWrapper
 
-from pulpcore.app.models import Distribution, ContentArtifact
+from pulpcore.app import streamer
+from pulpcore.app.base_paths import base_paths
+from pulpcore.app.models import ContentArtifact, Publication
 
 
 log = getLogger(__name__)
@@ -35,8 +41,75 @@ class PathNotResolved(Exception):
 class ArtifactNotFound(Exception):
     """
     The artifact associated with a published-artifact does not exist.
+
+    Attributes:
+        content_artifact (pulpcore.app.models.ContentArtifact): The matched content artifact
+            that has no associated artifact.
     """
-    pass
+
+    def __init__(self, path, content_artifact=None):
+        super().__init__(path)
+        self.content_artifact = content_artifact
+
+
+class NegativeCache:
+    """
+    A short lived, in-memory record of paths that could not be resolved.
+
+    Entries are keyed on (distribution, publication, relative path) so that changing the
+    publication of a distribution (in any process) implicitly invalidates its entries. Paths
+    that did not match a distribution are keyed on the path alone and expire with the TTL.
+
+    Configured by CONTENT['NEGATIVE_CACHE'].
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    @property
+    def _settings(self):
+        return settings.CONTENT['NEGATIVE_CACHE']
+
+    def __contains__(self, key):
+        """
+        Args:
+            key (tuple): The cache key.
+
+        Returns:
+            bool: True when the key was recorded and has not expired.
+        """
+        if not self._settings['ENABLED']:
+            return False
+        try:
+            expires = self._entries[key]
+        except KeyError:
+            return False
+        if expires > time.monotonic():
+            return True
+        self._entries.pop(key, None)
+        return False
+
+    def add(self, key):
+        """
+        Record a path that could not be resolved.
+
+        When the cache is full, expired entries are purged. If it is still full, the cache
+        is cleared.
+
+        Args:
+            key (tuple): The cache key.
+        """
+        if not self._settings['ENABLED']:
+            return
+        now = time.monotonic()
+        if len(self._entries) >= self._settings['MAX_ENTRIES']:
+            self._entries = {k: e for k, e in self._entries.items() if e > now}
+            if len(self._entries) >= self._settings['MAX_ENTRIES']:
+                self._entries = {}
+        self._entries[key] = now + self._settings['TTL']
+
+    def clear(self):
+        self._entries = {}
 
 
 class ContentView(View):
@@ -53,30 +126,15 @@ class ContentView(View):
     2. Match: PublishedArtifact.relative_path
     3. Match: PublishedMetadata.relative_path
     4. Match: ContentArtifact.relative_path (pass-through publications only).
+
+    Paths that could not be matched are remembered for a short time (see NegativeCache) so
+    that repeated requests for them do not query the database.
     """
 
     BASE_PATH = 'pulp/content'
 
-    @staticmethod
-    def _base_paths(path):
-        """
-        Get a list of base paths used to match a distribution.
-
-        Args:
-            path (str): The path component of the URL.
-
-        Returns:
-            list: Of base paths.
-
-        """
-        tree = []
-        while True:
-            base = os.path.split(path.strip('/'))[0]
-            if not base:
-                break
-            tree.append(base)
-            path = base
-        return tree
+    # Paths recently not resolved.
+    NOT_FOUND = NegativeCache()
 
     def _published_path(self, request):
         """
@@ -96,25 +154,26 @@ class ContentView(View):
 
     def _match_distribution(self, path):
         """
-        Match a distribution using a list of base paths.
+        Match a distribution using the trie of distribution base paths.
 
         Args:
             path (str): The path component of the URL.
 
         Returns:
-            Distribution: The matched distribution.
+            pulpcore.app.base_paths.BasePath: The matched distribution.
 
         Raises:
             PathNotResolved: when not matched.
         """
-        base_paths = self._base_paths(path)
-        try:
-            return Distribution.objects.get(base_path__in=base_paths)
-        except ObjectDoesNotExist:
-            log.debug(_('Distribution not matched for {path} using: {base_paths}').format(
-                path=path, base_paths=base_paths)
-            )
+        key = (path,)
+        if key in self.NOT_FOUND:
+            raise PathNotResolved(path)
+        distribution = base_paths.match(path)
+        if distribution is None:
+            log.debug(_('Distribution not matched for {path}').format(path=path))
+            self.NOT_FOUND.add(key)
             raise PathNotResolved(path)
+        return distribution
 
     def _match(self, path):
         """
@@ -133,12 +192,19 @@ class ContentView(View):
 
         """
         distribution = self._match_distribution(path)
-        publication = distribution.publication
-        if not publication:
+        if not distribution.publication_id:
             raise PathNotResolved(path)
         rel_path = path.lstrip('/')
         rel_path = rel_path[len(distribution.base_path):]
         rel_path = rel_path.lstrip('/')
+        key = (distribution.pk, distribution.publication_id, rel_path)
+        if key in self.NOT_FOUND:
+            raise PathNotResolved(path)
+        try:
+            publication = Publication.objects.get(pk=distribution.publication_id)
+        except ObjectDoesNotExist:
+            # the publication was deleted since the trie was built
+            raise PathNotResolved(path)
 
         # published artifact
         try:
@@ -150,7 +216,7 @@ class ContentView(View):
             if artifact:
                 return artifact.file.name
             else:
-                raise ArtifactNotFound(path)
+                raise ArtifactNotFound(path, pa.content_artifact)
 
         # published metadata
         try:
@@ -181,8 +247,9 @@ class ContentView(View):
                 if artifact:
                     return artifact.file.name
                 else:
-                    raise ArtifactNotFound(path)
+                    raise ArtifactNotFound(path, ca)
 
+        self.NOT_FOUND.add(key)
         raise PathNotResolved(path)
 
     def _django(self, path):
@@ -191,6 +258,11 @@ class ContentView(View):
 
         Stream the bits.
 
+        When the WSGI server provides a `wsgi.file_wrapper` capable of platform-specific file
+        transmission (e.g. sendfile), the file is handed over to it. Otherwise, the file is read
+        and streamed in blocks of CONTENT['BLOCK_SIZE'] bytes. Either way, the content type is
+        guessed from the file name, defaulting to application/octet-stream.
+
         Args:
             path (str): The fully qualified path to the file to be served.
 
@@ -199,12 +271,19 @@ class ContentView(View):
 
         """
         try:
-            file = FileWrapper(open(path, 'rb'))
+            file = open(path, 'rb')
         except FileNotFoundError:
             return HttpResponseNotFound()
         except PermissionError:
             return HttpResponseForbidden()
-        response = StreamingHttpResponse(file)
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        file_wrapper = self.request.META.get('wsgi.file_wrapper')
+        if file_wrapper is None or file_wrapper is FileWrapper:
+            # The wsgiref file wrapper only iterates the file in small blocks.
+            response = StreamingHttpResponse(FileWrapper(file, settings.CONTENT['BLOCK_SIZE']),
+                                             content_type=content_type)
+        else:
+            response = FileResponse(file, content_type=content_type)
         response['Content-Length'] = os.path.getsize(path)
         response['Content-Disposition'] = \
             'attachment; filename={n}'.format(n=os.path.basename(path))
@@ -238,6 +317,43 @@ class ContentView(View):
         response['X-Accel-Redirect'] = path
         return response
 
+    def _s3(self, path):
+        """
+        The content is stored in S3 (compatible) object storage.
+
+        Requires DEFAULT_FILE_STORAGE to be `pulpcore.app.models.storage.S3`.
+
+        Args:
+            path (str): The storage path of the file to be served.
+
+        Returns:
+            HttpResponseRedirect: Redirect to a time-limited pre-signed URL.
+        """
+        return HttpResponseRedirect(default_storage.url(path))
+
+    def _stream(self, content_artifact):
+        """
+        Stream the artifact from the remote while it is downloaded and saved.
+
+        Args:
+            content_artifact (pulpcore.app.models.ContentArtifact): The matched content
+                artifact that has no associated artifact.
+
+        Returns:
+            StreamingHttpResponse: Stream the requested content.
+            None: when there is no remote artifact to download.
+        """
+        streamed = streamer.stream(content_artifact)
+        if streamed is None:
+            return None
+        stream, reader = streamed
+        response = StreamingHttpResponse(reader)
+        if stream.size:
+            response['Content-Length'] = stream.size
+        response['Content-Disposition'] = \
+            'attachment; filename={n}'.format(n=os.path.basename(content_artifact.relative_path))
+        return response
+
     def _redirect(self, request):
         """
         Get redirect-to-streamer response.
@@ -284,7 +400,7 @@ class ContentView(View):
             django.http.StreamingHttpResponse: on found.
             django.http.HttpResponseNotFound: on not-found.
             django.http.HttpResponseForbidden: on forbidden.
-            django.http.HttpResponseRedirect: on redirect to the streamer.
+            django.http.HttpResponseRedirect: on redirect to the streamer or object storage.
         """
         server = settings.CONTENT['WEB_SERVER']
 
@@ -303,18 +419,18 @@ class ContentView(View):
             request (django.http.HttpRequest): A request for a content artifact.
 
         Returns:
-            django.http.StreamingHttpResponse: on found.
+            django.http.StreamingHttpResponse: on found or streamed from the remote.
             django.http.HttpResponseNotFound: on not-found.
             django.http.HttpResponseForbidden: on forbidden.
-            django.http.HttpResponseRedirect: on redirect to the streamer.
+            django.http.HttpResponseRedirect: on redirect to the streamer or object storage.
         """
         try:
             path = self._published_path(request)
             storage_path = self._match(path)
         except PathNotResolved:
             return HttpResponseNotFound()
-        except ArtifactNotFound:
-            return self._redirect(request)
+        except ArtifactNotFound as e:
+            return self._stream(e.content_artifact) or self._redirect(request)
         else:
             return self._dispatch(storage_path)
 
@@ -323,4 +439,5 @@ class ContentView(View):
         'django': _django,
         'apache': _apache,
         'nginx': _nginx,
+        's3': _s3,
     }
@@ -8,6 +8,7 @@ from pulpcore.app.models.task import Worker
 from pulpcore.app.serializers.status import StatusSerializer
 from pulpcore.app.settings import INSTALLED_PULP_PLUGINS
 from pulpcore.tasking.connection import get_redis_connection
+from pulpcore.tasking.tasks import task_queues
 
 
 _logger = logging.getLogger(__name__)
@@ -25,7 +26,8 @@ class StatusView(APIView):
     def get(self, request, format=None):
         """
         Returns app information including the version of pulpcore and loaded pulp plugins,
-        known workers, database connection status, and messaging connection status
+        known workers, database connection status, messaging connection status, and the tasks
+        waiting to be dispatched
         """
         components = ['pulpcore'] + INSTALLED_PULP_PLUGINS
         versions = [{
@@ -45,12 +47,18 @@ class StatusView(APIView):
         except Exception:
             missing_workers = None
 
+        try:
+            queues = task_queues()
+        except Exception:
+            queues = None
+
         data = {
             'versions': versions,
             'online_workers': online_workers,
             'missing_workers': missing_workers,
             'database_connection': db_status,
-            'redis_connection': redis_status
+            'redis_connection': redis_status,
+            'task_queues': queues
         }
 
         context = {'request': request}
@@ -15,5 +15,5 @@ from .repository import (  # noqa
     RepositoryViewSet,
     RepositoryVersionViewSet
 )
-from .task import TaskViewSet, WorkerViewSet  # noqa
+from .task import TaskGroupViewSet, TaskHistoryViewSet, TaskViewSet, WorkerViewSet  # noqa
 from .user import UserViewSet  # noqa
@@ -7,6 +7,7 @@ from pulpcore.app import tasks
 from pulpcore.app.models import MasterModel
 from pulpcore.app.response import OperationPostponedResponse
 from pulpcore.app.serializers import AsyncOperationResponseSerializer
+from pulpcore.constants import TASK_PRIORITIES
 from pulpcore.tasking.tasks import enqueue_with_reservation
 
 from django.urls import resolve, Resolver404
@@ -299,7 +300,8 @@ class AsyncUpdateMixin:
         async_result = enqueue_with_reservation(
             tasks.base.general_update, [instance],
             args=(pk, app_label, serializer.__class__.__name__),
-            kwargs={'data': request.data, 'partial': partial}
+            kwargs={'data': request.data, 'partial': partial},
+            priority=TASK_PRIORITIES.INTERACTIVE, tenant=request.user.username
         )
         return OperationPostponedResponse(async_result, request)
 
@@ -326,7 +328,8 @@ class AsyncRemoveMixin:
         app_label = instance._meta.app_label
         async_result = enqueue_with_reservation(
             tasks.base.general_delete, [instance],
-            args=(pk, app_label, serializer.__class__.__name__)
+            args=(pk, app_label, serializer.__class__.__name__),
+            priority=TASK_PRIORITIES.INTERACTIVE, tenant=request.user.username
         )
         return OperationPostponedResponse(async_result, request)
 
@@ -70,6 +70,12 @@ class ContentViewSet(NamedModelViewSet,
     serializer_class = ContentSerializer
     filterset_class = ContentFilter
 
+    def get_queryset(self):
+        """
+        Prefetch the ContentArtifacts serialized with each Content.
+        """
+        return super().get_queryset().prefetch_related('contentartifact_set')
+
     @transaction.atomic
     def create(self, request):
         """
@@ -1,8 +1,9 @@
 from gettext import gettext as _
-import itertools
 
+from django.db.models import Q
 from django_filters.rest_framework import filters, DjangoFilterBackend
 from django_filters import Filter
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
 from rest_framework import decorators, mixins, serializers
@@ -20,7 +21,7 @@ from pulpcore.app.models import (
     RepositoryContent,
     RepositoryVersion
 )
-from pulpcore.app.pagination import IDPagination, NamePagination
+from pulpcore.app.pagination import IDCursorPagination, IDPagination, NamePagination
 from pulpcore.app.response import OperationPostponedResponse
 from pulpcore.app.serializers import (
     AsyncOperationResponseSerializer,
@@ -42,6 +43,7 @@ from pulpcore.app.viewsets import (
 )
 from pulpcore.app.viewsets.custom_filters import IsoDateTimeFilter
 from pulpcore.app.viewsets.base import NAME_FILTER_OPTIONS, DATETIME_FILTER_OPTIONS
+from pulpcore.constants import TASK_PRIORITIES
 from pulpcore.tasking.tasks import enqueue_with_reservation
 
 
@@ -79,7 +81,8 @@ class RepositoryViewSet(NamedModelViewSet,
         async_result = enqueue_with_reservation(
             tasks.repository.update, [instance],
             args=(instance.id, ),
-            kwargs={'data': request.data, 'partial': partial}
+            kwargs={'data': request.data, 'partial': partial},
+            priority=TASK_PRIORITIES.INTERACTIVE, tenant=request.user.username
         )
         return OperationPostponedResponse(async_result, request)
 
@@ -93,7 +96,8 @@ class RepositoryViewSet(NamedModelViewSet,
         repo = self.get_object()
         async_result = enqueue_with_reservation(
             tasks.repository.delete, [repo],
-            kwargs={'repo_id': repo.id}
+            kwargs={'repo_id': repo.id},
+            priority=TASK_PRIORITIES.INTERACTIVE, tenant=request.user.username
         )
         return OperationPostponedResponse(async_result, request)
 
@@ -104,9 +108,7 @@ class RepositoryVersionContentFilter(Filter):
 
     Given a content_href, this filter will:
         1. Get the RepositoryContent that the content can be found in
-        2. Get a list of version_added and version_removed where the content was
-           changed on the repository
-        3. Calculate and return the versions that the content can be found on
+        2. Filter the versions within the range of version numbers of each RepositoryContent
     """
 
     def __init__(self, *args, **kwargs):
@@ -135,38 +137,19 @@ class RepositoryVersionContentFilter(Filter):
 
         # Get the repository from the parent request.
         repository_pk = self.parent.request.parser_context['kwargs']['repository_pk']
-        repository = Repository.objects.get(pk=repository_pk)
 
-        repository_content_set = RepositoryContent.objects.filter(content=content,
-                                                                  repository=repository)
+        # Each association is a range of versions in which the content is present.
+        ranges = RepositoryContent.objects.filter(content=content, repository_id=repository_pk)
+        versions = Q()
+        for added, removed in ranges.values_list('number_added', 'number_removed'):
+            if removed is None:
+                versions |= Q(number__gte=added)
+            else:
+                versions |= Q(number__gte=added, number__lt=removed)
 
-        # Get the sorted list of version_added and version_removed.
-        version_added = list(repository_content_set.values_list('version_added__number', flat=True))
-
-        # None values have to be filtered out from version_removed,
-        # in order for zip_longest to pass it a default fillvalue
-        version_removed = list(filter(None.__ne__, repository_content_set
-                                      .values_list('version_removed__number', flat=True)))
-
-        # The range finding should work as long as both lists are sorted
-        # Why it works: https://gist.github.com/werwty/6867f83ae5adbae71e452c28ecd9c444
-        version_added.sort()
-        version_removed.sort()
-
-        # Match every version_added to a version_removed, if len(version_removed)
-        # is shorter than len(version_added), pad out the remaining space with the current
-        # repository version +1 (the +1 is to the current version gets included when we
-        # calculate range)
-        version_tuples = itertools.zip_longest(version_added, version_removed,
-                                               fillvalue=repository.last_version + 1)
-
-        # Get the ranges between paired version_added and version_removed to get all
-        # the versions the content is present in.
-        versions = [list(range(added, removed)) for (added, removed) in version_tuples]
-        # Flatten the list of lists
-        versions = list(itertools.chain.from_iterable(versions))
-
-        return qs.filter(number__in=versions)
+        if not versions:
+            return qs.none()
+        return qs.filter(versions)
 
 
 class RepositoryVersionFilter(BaseFilterSet):
@@ -189,6 +172,24 @@ class RepositoryVersionFilter(BaseFilterSet):
         }
 
 
+pagination_parameter = openapi.Parameter(
+    'pagination',
+    openapi.IN_QUERY,
+    description=_("Set to 'cursor' to paginate by keyset: the pages are linked by a 'cursor' "
+                  "parameter instead of 'page', and are only counted with 'count=true'."),
+    type=openapi.TYPE_STRING,
+    enum=['cursor']
+)
+
+base_version_parameter = openapi.Parameter(
+    'base_version',
+    openapi.IN_QUERY,
+    description=_('The number of a version of the repository to compare with, instead of the '
+                  'previous version.'),
+    type=openapi.TYPE_INTEGER
+)
+
+
 class RepositoryVersionViewSet(NamedModelViewSet,
                                mixins.CreateModelMixin,
                                mixins.UpdateModelMixin,
@@ -202,13 +203,26 @@ class RepositoryVersionViewSet(NamedModelViewSet,
     parent_viewset = RepositoryViewSet
     parent_lookup_kwargs = {'repository_pk': 'repository__pk'}
     serializer_class = RepositoryVersionSerializer
-    queryset = RepositoryVersion.objects.exclude(complete=False)
+    queryset = RepositoryVersion.objects.exclude(complete=False).prefetch_related('counts')
     filterset_class = RepositoryVersionFilter
     filter_backends = (OrderingFilter, DjangoFilterBackend)
     ordering = ('-number',)
 
+    def get_queryset(self):
+        """
+        Hide the versions being deleted, unless deleting them again after a failure.
+
+        Returns:
+            django.db.models.query.QuerySet: The complete versions of the repository.
+        """
+        queryset = super().get_queryset()
+        if self.action != 'destroy':
+            queryset = queryset.exclude(deleting=True)
+        return queryset
+
     @swagger_auto_schema(
         operation_description="List Content",
+        manual_parameters=[pagination_parameter],
         responses={'200': ContentSerializer}
     )
     @decorators.detail_route()
@@ -217,30 +231,64 @@ class RepositoryVersionViewSet(NamedModelViewSet,
 
     @swagger_auto_schema(
         operation_description="List added Content",
+        manual_parameters=[base_version_parameter, pagination_parameter],
         responses={'200': ContentSerializer}
     )
     @decorators.detail_route()
     def added_content(self, request, repository_pk, number):
         """
-        Display content added since the previous Repository Version.
+        Display content added since the previous Repository Version, or since the version
+        numbered by the `base_version` query parameter.
         """
-        return self._paginated_response(self.get_object().added(), request)
+        version = self.get_object()
+        content = version.added(base_version=self._get_base_version(request))
+        return self._paginated_response(content, request)
 
     @swagger_auto_schema(
         operation_description="List removed Content",
+        manual_parameters=[base_version_parameter, pagination_parameter],
         responses={'200': ContentSerializer}
     )
     @decorators.detail_route()
     def removed_content(self, request, repository_pk, number):
         """
-        Display content removed since the previous Repository Version.
+        Display content removed since the previous Repository Version, or since the version
+        numbered by the `base_version` query parameter.
+        """
+        version = self.get_object()
+        content = version.removed(base_version=self._get_base_version(request))
+        return self._paginated_response(content, request)
+
+    def _get_base_version(self, request):
+        """
+        Get the version numbered by the `base_version` query parameter.
+
+        Args:
+            request (rest_framework.request.Request): the current HTTP request being handled
+
+        Returns:
+            pulpcore.app.models.RepositoryVersion: The version of the same repository, or None
+                if the parameter is not given.
+
+        Raises:
+            rest_framework.exceptions.ValidationError: if there is no such complete version.
         """
-        return self._paginated_response(self.get_object().removed(), request)
+        number = request.query_params.get('base_version')
+        if number is None:
+            return None
+        try:
+            return self.get_queryset().get(number=int(number))
+        except (ValueError, RepositoryVersion.DoesNotExist):
+            raise serializers.ValidationError(
+                detail=_('Repository version {n} not found.').format(n=number))
 
     def _paginated_response(self, content, request):
         """
         a helper method to make a paginated response for content list views.
 
+        The content is paginated by page number, or by keyset when requested with
+        `?pagination=cursor`, as versions may contain a large number of units.
+
         Args:
             content (django.db.models.QuerySet): the Content to render
             request (rest_framework.request.Request): the current HTTP request being handled
@@ -248,7 +296,10 @@ class RepositoryVersionViewSet(NamedModelViewSet,
         Returns:
             rest_framework.response.Response: a paginated response for the corresponding content
         """
-        paginator = IDPagination()
+        if IDCursorPagination.requested(request):
+            paginator = IDCursorPagination()
+        else:
+            paginator = IDPagination()
         page = paginator.paginate_queryset(content, request)
         serializer = ContentSerializer(page, many=True, context={'request': request})
         return paginator.get_paginated_response(serializer.data)
@@ -263,7 +314,8 @@ class RepositoryVersionViewSet(NamedModelViewSet,
         version = self.get_object()
         async_result = enqueue_with_reservation(
             tasks.repository.delete_version,
-            [version.repository], kwargs={'pk': version.pk}
+            [version.repository], kwargs={'pk': version.pk},
+            priority=TASK_PRIORITIES.INTERACTIVE, tenant=request.user.username
         )
         return OperationPostponedResponse(async_result, request)
 
@@ -300,7 +352,8 @@ class RepositoryVersionViewSet(NamedModelViewSet,
                 'base_version_pk': base_version_pk,
                 'add_content_units': add_content_units,
                 'remove_content_units': remove_content_units
-            }
+            },
+            priority=TASK_PRIORITIES.INTERACTIVE, tenant=request.user.username
         )
         return OperationPostponedResponse(result, request)
 
@@ -1,17 +1,44 @@
+import hashlib
+import json
+from functools import partial
+from gettext import gettext as _
+from io import BytesIO
+from urllib.parse import urlparse
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import resolve, Resolver404
 from django_filters.rest_framework import filters, DjangoFilterBackend
+from drf_yasg import openapi
+from drf_yasg.utils import no_body, swagger_auto_schema
 from rest_framework import status, mixins
-from rest_framework.decorators import detail_route
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.decorators import detail_route, list_route
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
-from pulpcore.constants import TASK_INCOMPLETE_STATES
+from pulpcore.constants import API_ROOT, TASK_FINAL_STATES, TASK_INCOMPLETE_STATES
 
-from pulpcore.app.models import Task, Worker
-from pulpcore.app.serializers import MinimalTaskSerializer, TaskSerializer, WorkerSerializer
+from pulpcore.app.models import Task, TaskGroup, TaskHistory, Worker
+from pulpcore.app.response import OperationPostponedResponse
+from pulpcore.app.serializers import (
+    AsyncOperationResponseSerializer,
+    MinimalTaskSerializer,
+    TaskGroupOperationResponseSerializer,
+    TaskGroupSerializer,
+    TaskGroupSubmissionSerializer,
+    TaskHistorySerializer,
+    TaskSerializer,
+    WorkerSerializer
+)
+from pulpcore.app.tasks import archive_tasks
 from pulpcore.app.viewsets import BaseFilterSet, NamedModelViewSet
 from pulpcore.app.viewsets.base import NAME_FILTER_OPTIONS, DATETIME_FILTER_OPTIONS
 from pulpcore.app.viewsets.custom_filters import HyperlinkRelatedFilter, IsoDateTimeFilter
-from pulpcore.tasking.util import cancel as cancel_task
+from pulpcore.tasking.constants import TASKING_CONSTANTS
+from pulpcore.tasking.tasks import enqueue_with_reservation, submit_task_group
+from pulpcore.tasking.util import cancel as cancel_task, cancel_tasks, task_changes
 
 
 class TaskFilter(BaseFilterSet):
@@ -20,6 +47,7 @@ class TaskFilter(BaseFilterSet):
     started_at = IsoDateTimeFilter(field_name='started_at')
     finished_at = IsoDateTimeFilter(field_name='finished_at')
     parent = HyperlinkRelatedFilter()
+    task_group = HyperlinkRelatedFilter()
 
     class Meta:
         model = Task
@@ -28,7 +56,8 @@ class TaskFilter(BaseFilterSet):
             'worker': ['exact', 'in'],
             'started_at': DATETIME_FILTER_OPTIONS,
             'finished_at': DATETIME_FILTER_OPTIONS,
-            'parent': ['exact']
+            'parent': ['exact'],
+            'task_group': ['exact']
         }
 
 
@@ -44,12 +73,90 @@ class TaskViewSet(NamedModelViewSet,
     filter_backends = (OrderingFilter, DjangoFilterBackend)
     ordering = ('-created')
 
+    def get_queryset(self):
+        """
+        Prefetch the relations serialized with each Task.
+        """
+        queryset = super().get_queryset()
+        serialized = self.action in ('list', 'retrieve', 'wait')
+        if serialized and self.get_serializer_class() is TaskSerializer:
+            queryset = queryset.prefetch_related(
+                'spawned_tasks', 'dependencies', 'progress_reports',
+                'created_resources__content_object')
+        return queryset
+
     @detail_route(methods=('post',))
     def cancel(self, request, pk=None):
         task = self.get_object()
         cancel_task(task.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @swagger_auto_schema(
+        operation_description="Cancel the tasks matching the filters given as query parameters, "
+                              "e.g. `?state=waiting`. At least one filter is required.",
+        responses={200: openapi.Response('The number of tasks canceled', openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={'canceled': openapi.Schema(type=openapi.TYPE_INTEGER)}))})
+    @list_route(methods=('post',), url_path='cancel')
+    def bulk_cancel(self, request):
+        if not set(request.query_params) & set(self.filterset_class.base_filters):
+            raise ValidationError(_('At least one filter is required to cancel tasks.'))
+        canceled = cancel_tasks(self.filter_queryset(self.get_queryset()))
+        return Response({'canceled': canceled})
+
+    @swagger_auto_schema(
+        operation_description="Wait for a change of the state or progress of a task. The "
+                              "response has an ETag header. If the If-None-Match header of the "
+                              "request matches the task, the response is delayed until the task "
+                              "changes, or is 304 Not Modified once the timeout elapsed.",
+        manual_parameters=[openapi.Parameter(
+            'timeout', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+            description="The number of seconds to wait at most, {} by default.".format(
+                TASKING_CONSTANTS.TASK_WAIT_TIMEOUT))],
+        responses={200: TaskSerializer, 304: 'The task did not change.'})
+    @detail_route(methods=('get',))
+    def wait(self, request, pk=None):
+        timeout = request.query_params.get('timeout', TASKING_CONSTANTS.TASK_WAIT_TIMEOUT)
+        try:
+            timeout = min(int(timeout), TASKING_CONSTANTS.TASK_WAIT_TIMEOUT)
+        except ValueError:
+            raise ValidationError({'timeout': _('A valid integer is required.')})
+
+        task = self.get_object()
+        seen = request.META.get('HTTP_IF_NONE_MATCH')
+        with task_changes(task.pk) as changed:
+            data, etag = self._tagged(task)
+            if etag == seen and task.state not in TASK_FINAL_STATES and changed(timeout):
+                data, etag = self._tagged(self.get_object())
+
+        if etag == seen:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(data, headers={'ETag': etag})
+
+    def _tagged(self, task):
+        """
+        Serialize a task and compute its entity tag.
+
+        Args:
+            task (pulpcore.app.models.Task): The task.
+
+        Returns:
+            tuple: The serialized task and its entity tag.
+        """
+        data = self.get_serializer(task).data
+        digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode())
+        return data, '"{}"'.format(digest.hexdigest())
+
+    @swagger_auto_schema(
+        operation_description="Trigger an asynchronous task that moves the tasks which finished "
+                              "more than TASK_RETENTION_DAYS ago into the task history.",
+        request_body=no_body,
+        responses={202: AsyncOperationResponseSerializer})
+    @list_route(methods=('post',))
+    def archive(self, request):
+        async_result = enqueue_with_reservation(archive_tasks, [])
+        return OperationPostponedResponse(async_result, request)
+
     def destroy(self, request, pk=None):
         task = self.get_object()
         if task.state in TASK_INCOMPLETE_STATES:
@@ -57,6 +164,130 @@ class TaskViewSet(NamedModelViewSet,
         return super().destroy(request, pk)
 
 
+class TaskHistoryFilter(BaseFilterSet):
+    state = filters.CharFilter()
+    finished_at = IsoDateTimeFilter(field_name='finished_at')
+
+    class Meta:
+        model = TaskHistory
+        fields = {
+            'state': ['exact', 'in'],
+            'finished_at': DATETIME_FILTER_OPTIONS,
+        }
+
+
+class TaskHistoryViewSet(NamedModelViewSet,
+                         mixins.RetrieveModelMixin,
+                         mixins.ListModelMixin):
+    queryset = TaskHistory.objects.all()
+    endpoint_name = 'task-history'
+    filterset_class = TaskHistoryFilter
+    serializer_class = TaskHistorySerializer
+    filter_backends = (OrderingFilter, DjangoFilterBackend)
+    ordering = ('-finished_at',)
+
+
+class SubmitterAuthentication(BaseAuthentication):
+    """
+    Authenticate the operations of a task group submission as the submitter.
+
+    The submitter is already authenticated, authenticating every operation again is costly.
+    """
+
+    def __init__(self, user, auth):
+        self.user = user
+        self.auth = auth
+
+    def authenticate(self, request):
+        return self.user, self.auth
+
+
+class TaskGroupViewSet(NamedModelViewSet,
+                       mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin):
+    queryset = TaskGroup.objects.prefetch_related('tasks')
+    endpoint_name = 'task-groups'
+    serializer_class = TaskGroupSerializer
+    filter_backends = (OrderingFilter,)
+    ordering = ('-created',)
+
+    @swagger_auto_schema(
+        operation_description="Submit a group of tasks with dependencies between them. Each "
+                              "operation is performed like a request to its endpoint, and the "
+                              "tasks it dispatches are held until the tasks of the operations it "
+                              "depends on completed. They are skipped if any of those did not. "
+                              "Either all of the operations are performed or none.",
+        request_body=TaskGroupSubmissionSerializer,
+        responses={202: TaskGroupOperationResponseSerializer})
+    def create(self, request):
+        serializer = TaskGroupSubmissionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        description = serializer.validated_data.get('description')
+
+        tasks = {}
+        with submit_task_group(description) as submission:
+            for operation in serializer.validated_data['operations']:
+                submission.dependencies = [task for name in operation['dependencies']
+                                           for task in tasks[name]]
+                submitted = len(submission.tasks)
+                response = self._perform(request, operation)
+                if response.status_code >= 400:
+                    # roll back the operations performed so far
+                    raise ValidationError({operation['name']: response.data})
+                tasks[operation['name']] = submission.tasks[submitted:]
+
+        data = {
+            'task_group': reverse('task-groups-detail', args=[submission.group.pk], request=None),
+            'tasks': {name: [reverse('tasks-detail', args=[task.pk], request=None)
+                             for task in operation_tasks]
+                      for name, operation_tasks in tasks.items()}
+        }
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    def _perform(self, request, operation):
+        """
+        Perform an operation of a submission by calling the view of its endpoint.
+
+        The view is called with a request for the operation, authenticated as the submitter.
+
+        Args:
+            request (rest_framework.request.Request): The request submitting the operation.
+            operation (dict): The validated operation.
+
+        Returns:
+            rest_framework.response.Response: The response of the view.
+
+        Raises:
+            rest_framework.exceptions.ValidationError: If the path is not another API endpoint.
+        """
+        path = urlparse(operation['path']).path
+        try:
+            match = resolve(path)
+        except Resolver404:
+            match = None
+        view_class = match and getattr(match.func, 'cls', None)
+        valid = view_class and path.startswith('/' + API_ROOT)
+        # the operations can not submit task groups themselves
+        if not valid or view_class is self.__class__:
+            raise ValidationError({operation['name']: _('URI not valid: {u}').format(
+                u=operation['path'])})
+
+        authentication_classes = [partial(SubmitterAuthentication, request.user, request.auth)]
+        initkwargs = dict(match.func.initkwargs, authentication_classes=authentication_classes)
+        if hasattr(match.func, 'actions'):
+            view = view_class.as_view(match.func.actions, **initkwargs)
+        else:
+            view = view_class.as_view(**initkwargs)
+
+        body = json.dumps(operation['body']).encode()
+        method = operation['method'].upper()
+        subrequest = WSGIRequest(dict(request.META, REQUEST_METHOD=method, PATH_INFO=path,
+                                      QUERY_STRING='', CONTENT_TYPE='application/json',
+                                      CONTENT_LENGTH=str(len(body)),
+                                      **{'wsgi.input': BytesIO(body)}))
+        return view(subrequest, *match.args, **match.kwargs)
+
+
 class WorkerFilter(BaseFilterSet):
     name = filters.CharFilter()
     last_heartbeat = IsoDateTimeFilter()
@@ -27,6 +27,17 @@ TASK_FINAL_STATES = (TASK_STATES.SKIPPED, TASK_STATES.COMPLETED, TASK_STATES.FAI
 #: Tasks in an incomplete state have not finished their work yet.
 TASK_INCOMPLETE_STATES = (TASK_STATES.WAITING, TASK_STATES.RUNNING)
 
+#: Task priority classes.
+TASK_PRIORITIES = SimpleNamespace(
+    INTERACTIVE='interactive',
+    NORMAL='normal',
+    BACKGROUND='background'
+)
+
+#: The priority classes in the order their waiting tasks are dispatched.
+TASK_PRIORITY_ORDER = (TASK_PRIORITIES.INTERACTIVE, TASK_PRIORITIES.NORMAL,
+                       TASK_PRIORITIES.BACKGROUND)
+
 SYNC_MODES = SimpleNamespace(
     ADDITIVE='additive',
     MIRROR='mirror'
@@ -10,5 +10,48 @@ TASKING_CONSTANTS = SimpleNamespace(
     # The amount of time (in seconds) between checks
     JOB_MONITORING_INTERVAL=5,
     # The Redis key used to force-kill a job
-    KILL_KEY="rq:jobs:kill"
+    KILL_KEY="rq:jobs:kill",
+    # The Redis channel the IDs of the jobs to force-kill are published to
+    KILL_CHANNEL="rq:jobs:kill",
+    # The Redis key the acknowledgement that a job was killed is pushed to
+    KILL_ACK_KEY="rq:jobs:kill:{}",
+    # The amount of time (in seconds) to wait for the acknowledgement that canceled jobs were killed
+    CANCEL_TIMEOUT=10,
+    # The Redis key of the tasks of a priority class waiting to be dispatched, in order
+    WAITING_KEY="rq:jobs:waiting:priority:{}",
+    # The Redis key of the counter ordering the waiting tasks
+    WAITING_SEQUENCE_KEY="rq:jobs:waiting:sequence",
+    # The Redis key of the waiting tasks needing a resource and not waiting for a dependency, by
+    # priority class and order
+    WAITING_RESOURCE_KEY="rq:jobs:waiting:resource:{}",
+    # The Redis key of the tasks of a priority class and tenant waiting for a free worker, in order
+    WAITING_WORKER_KEY="rq:jobs:waiting:worker:{}:{}",
+    # The Redis key of the tenants having tasks of a priority class waiting for a free worker
+    WAITING_TENANTS_KEY="rq:jobs:waiting:tenants:{}",
+    # The Redis key of the waiting tasks depending on a task
+    WAITING_DEPENDENTS_KEY="rq:jobs:waiting:dependents:{}",
+    # The Redis key of the waiting tasks needing that no resource is reserved, by time queued
+    WAITING_EXCLUSIVE_KEY="rq:jobs:waiting:exclusive",
+    # The Redis key of the keys a waiting task was added to
+    WAITING_ENTRY_KEY="rq:jobs:waiting:entry:{}",
+    # The amount of time (in seconds) a task needing that no resource is reserved lets the tasks
+    # queued after it be dispatched before it
+    EXCLUSIVE_WAIT_TIMEOUT=600,
+    # The Redis keys of the tasks which reached a final state, and of the resources released,
+    # since the waiting tasks were last dispatched
+    DISPATCH_TASKS_KEY="rq:jobs:dispatch:tasks",
+    DISPATCH_RESOURCES_KEY="rq:jobs:dispatch:resources",
+    # The Redis key flagging that all of the waiting tasks are to be tried
+    DISPATCH_ALL_KEY="rq:jobs:dispatch:all",
+    # The Redis key flagging that the resource manager is to dispatch the waiting tasks
+    DISPATCH_QUEUED_KEY="rq:jobs:dispatch:queued",
+    # The amount of time (in seconds) the dispatches of the tasks of a tenant are considered for
+    # its fair share
+    FAIR_SHARE_WINDOW=3600,
+    # The Redis key holding the name of the worker elected to check for missing workers
+    WATCHER_KEY="rq:workers:watcher",
+    # The Redis channel the changes of the state or progress of a task are published to
+    TASK_CHANGES_CHANNEL="rq:tasks:{}",
+    # The maximum amount of time (in seconds) to wait for a change of a task
+    TASK_WAIT_TIMEOUT=30
 )
@@ -0,0 +1,164 @@
+"""
+Policies selecting the worker a task is dispatched to.
+
+A policy is a callable accepting the online workers annotated by
+:meth:`~pulpcore.app.models.task.WorkerManager.with_load`, the urls of the resources the task
+reserves and the expected cost of the task. It returns the selected
+:class:`~pulpcore.app.models.Worker` or raises :class:`~pulpcore.app.models.Worker.DoesNotExist`
+to have the task wait. The policy used is set by the ``WORKER_PLACEMENT['POLICY']`` setting, either
+the name of one of the policies below or the dotted path of a custom policy.
+
+The policies below prefer workers holding no reservations. Except for ``random``, they fall back to
+a worker holding unrelated reservations when every worker holds some, and the task is then queued
+behind the tasks of that worker instead of waiting for a free one.
+"""
+import hashlib
+import random
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from pulpcore.app.models import Worker
+
+
+def random_unreserved(workers, resources, cost):
+    """
+    Select a random worker holding no reservations.
+
+    Args:
+        workers (list): The candidate :class:`~pulpcore.app.models.Worker` objects.
+        resources (list): The urls of the resources reserved by the task.
+        cost (int): The expected cost of the task.
+
+    Returns:
+        :class:`pulpcore.app.models.Worker`: The selected worker.
+
+    Raises:
+        Worker.DoesNotExist: If all workers hold at least one reservation.
+    """
+    unreserved = [worker for worker in workers if not worker.reserved]
+    if not unreserved:
+        raise Worker.DoesNotExist()
+    return random.choice(unreserved)
+
+
+def least_loaded(workers, resources, cost):
+    """
+    Select the worker with the fewest waiting and running tasks, preferring unreserved workers.
+
+    Workers holding no reservations are preferred even if they have more tasks. Ties are broken
+    randomly to distribute load across workers.
+
+    Args:
+        workers (list): The candidate :class:`~pulpcore.app.models.Worker` objects.
+        resources (list): The urls of the resources reserved by the task.
+        cost (int): The expected cost of the task.
+
+    Returns:
+        :class:`pulpcore.app.models.Worker`: The selected worker.
+
+    Raises:
+        Worker.DoesNotExist: If there are no workers.
+    """
+    if not workers:
+        raise Worker.DoesNotExist()
+    workers = random.sample(workers, len(workers))
+    return min(workers, key=lambda worker: (worker.reserved, worker.tasks_queued))
+
+
+def affinity(workers, resources, cost):
+    """
+    Select the same worker for the same resources whenever it is online.
+
+    Workers are ranked for the resources by rendezvous hashing, so the resources of a task land on
+    the worker which processed them last (with a warm working directory and caches) and only the
+    resources of a worker which goes offline move to other workers. The highest ranked worker
+    holding no reservations is selected, or the highest ranked worker if all of them hold
+    reservations.
+
+    Args:
+        workers (list): The candidate :class:`~pulpcore.app.models.Worker` objects.
+        resources (list): The urls of the resources reserved by the task.
+        cost (int): The expected cost of the task.
+
+    Returns:
+        :class:`pulpcore.app.models.Worker`: The selected worker.
+
+    Raises:
+        Worker.DoesNotExist: If there are no workers.
+    """
+    key = '\n'.join(sorted(resources))
+
+    def rank(worker):
+        return hashlib.sha256('{}\n{}'.format(worker.name, key).encode()).digest()
+
+    workers = sorted(workers, key=rank, reverse=True)
+    for worker in workers:
+        if not worker.reserved:
+            return worker
+    try:
+        return workers[0]
+    except IndexError:
+        raise Worker.DoesNotExist()
+
+
+def bin_packing(workers, resources, cost):
+    """
+    Select the most loaded worker which has the capacity for the task (best fit).
+
+    Packing tasks onto as few workers as possible keeps the other workers free for costly tasks.
+    The load of a worker is the total expected cost of its waiting and running tasks, and its
+    capacity is the ``WORKER_PLACEMENT['CAPACITY']`` setting. Only the workers holding no
+    reservations are considered, unless all of them hold reservations. The least loaded worker is
+    selected if none has the capacity for the task.
+
+    Args:
+        workers (list): The candidate :class:`~pulpcore.app.models.Worker` objects.
+        resources (list): The urls of the resources reserved by the task.
+        cost (int): The expected cost of the task.
+
+    Returns:
+        :class:`pulpcore.app.models.Worker`: The selected worker.
+
+    Raises:
+        Worker.DoesNotExist: If there are no workers.
+    """
+    if not workers:
+        raise Worker.DoesNotExist()
+    workers = [worker for worker in workers if not worker.reserved] or workers
+    capacity = settings.WORKER_PLACEMENT['CAPACITY']
+    fitting = [worker for worker in workers if worker.cost_queued + cost <= capacity]
+    if fitting:
+        return max(fitting, key=lambda worker: worker.cost_queued)
+    return min(workers, key=lambda worker: worker.cost_queued)
+
+
+POLICIES = {
+    'random': random_unreserved,
+    'least-loaded': least_loaded,
+    'affinity': affinity,
+    'bin-packing': bin_packing,
+}
+
+
+def select_worker(resources, cost=1):
+    """
+    Select a worker for a task using the configured placement policy.
+
+    Args:
+        resources (list): The urls of the resources reserved by the task.
+        cost (int): The expected cost of the task.
+
+    Returns:
+        :class:`pulpcore.app.models.Worker`: The selected worker, annotated by
+            :meth:`~pulpcore.app.models.task.WorkerManager.with_load`.
+
+    Raises:
+        Worker.DoesNotExist: If the policy selects no worker.
+    """
+    policy = settings.WORKER_PLACEMENT['POLICY']
+    try:
+        policy = POLICIES[policy]
+    except KeyError:
+        policy = import_string(policy)
+    return policy(list(Worker.objects.with_load()), resources, cost)
@@ -1,10 +1,14 @@
 from gettext import gettext as _
 import logging
 
+from django.db.models import Count, Q
+from django.utils import timezone
+
 from pulpcore.app.models import Worker
 from pulpcore.constants import TASK_INCOMPLETE_STATES
+from pulpcore.tasking import connection
 from pulpcore.tasking.constants import TASKING_CONSTANTS
-from pulpcore.tasking.util import cancel
+from pulpcore.tasking.util import cancel_tasks
 
 
 _logger = logging.getLogger(__name__)
@@ -26,32 +30,60 @@ def handle_worker_heartbeat(worker_name):
     """
     This is a generic function for updating worker heartbeat records.
 
-    Existing Worker objects are searched for one to update. If an existing one is found, it is
-    updated. Otherwise a new Worker entry is created. Logging at the info level is also done.
+    The heartbeat of an online worker is recorded with a single UPDATE. Otherwise existing Worker
+    objects are searched for one to update. If an existing one is found, it is updated. Otherwise a
+    new Worker entry is created. Logging at the info level is also done.
 
     Args:
         worker_name (str): The hostname of the worker
     """
-    worker, created = Worker.objects.get_or_create(name=worker_name)
-
-    if created:
-        _logger.info(_("New worker '{name}' discovered").format(name=worker_name))
-    elif worker.online is False:
-        worker.gracefully_stopped = False
-        worker.cleaned_up = False
-        worker.save()
-        _logger.info(_("Worker '{name}' is back online.").format(name=worker_name))
-
-    worker.save_heartbeat()
+    now = timezone.now()
+    online = Worker.objects.online_workers().filter(name=worker_name, cleaned_up=False)
+    if not online.update(last_heartbeat=now):
+        worker, created = Worker.objects.get_or_create(name=worker_name)
+
+        if created:
+            _logger.info(_("New worker '{name}' discovered").format(name=worker_name))
+        else:
+            worker.gracefully_stopped = False
+            worker.cleaned_up = False
+            worker.save()
+            _logger.info(_("Worker '{name}' is back online.").format(name=worker_name))
 
     msg = _("Worker heartbeat from '{name}' at time {timestamp}").format(
-        timestamp=worker.last_heartbeat,
+        timestamp=now,
         name=worker_name
     )
 
     _logger.debug(msg)
 
 
+def elect_watcher(worker_name):
+    """
+    Elect a single worker to check for missing workers, so that not every worker does.
+
+    The name of the elected worker is stored in Redis, expiring after WORKER_TTL. The elected
+    worker renews it on each heartbeat, and once it expires the next worker to heartbeat is
+    elected.
+
+    Args:
+        worker_name (str): The name of the worker
+
+    Returns:
+        bool: True if the worker is the elected watcher, otherwise False
+    """
+    redis_conn = connection.get_redis_connection()
+    key = TASKING_CONSTANTS.WATCHER_KEY
+    if redis_conn.set(key, worker_name, nx=True, ex=TASKING_CONSTANTS.WORKER_TTL):
+        _logger.info(_("Worker '{name}' elected to check for missing workers").format(
+            name=worker_name))
+        return True
+    if redis_conn.get(key) == worker_name.encode():
+        redis_conn.expire(key, TASKING_CONSTANTS.WORKER_TTL)
+        return True
+    return False
+
+
 def check_worker_processes():
     """
     Look for missing Pulp worker processes, log and cleanup as needed.
@@ -75,11 +107,13 @@ def check_worker_processes():
 
         mark_worker_offline(worker.name)
 
-    worker_count = Worker.objects.online_workers().filter(
-        name__startswith=TASKING_CONSTANTS.WORKER_PREFIX).count()
-
-    resource_manager_count = Worker.objects.online_workers().filter(
-        name__startswith=TASKING_CONSTANTS.RESOURCE_MANAGER_WORKER_NAME).count()
+    counts = Worker.objects.online_workers().aggregate(
+        workers=Count('pk', filter=Q(name__startswith=TASKING_CONSTANTS.WORKER_PREFIX)),
+        resource_managers=Count('pk', filter=Q(
+            name__startswith=TASKING_CONSTANTS.RESOURCE_MANAGER_WORKER_NAME)),
+    )
+    worker_count = counts['workers']
+    resource_manager_count = counts['resource_managers']
 
     if resource_manager_count == 0:
         msg = _("There are 0 pulp_resource_manager processes running. Pulp will not operate "
@@ -141,9 +175,10 @@ def mark_worker_offline(worker_name, normal_shutdown=False):
     except Worker.DoesNotExist:
         pass
     else:
-        # Cancel all of the tasks that were assigned to this worker's queue
-        for task_status in worker.tasks.filter(state__in=TASK_INCOMPLETE_STATES):
-            cancel(task_status.pk)
+        # Cancel all of the tasks that were assigned to this worker's queue. No acknowledgement
+        # that they were killed is waited for, as the worker is stopping or dead.
+        cancel_tasks(worker.tasks.filter(state__in=TASK_INCOMPLETE_STATES), timeout=0,
+                     kill=normal_shutdown)
 
         if normal_shutdown:
             worker.gracefully_stopped = True
@@ -1,15 +1,31 @@
 import logging
+import threading
 import time
+from datetime import timedelta
 import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
 from gettext import gettext as _
+from types import SimpleNamespace
 
-from django.db import IntegrityError
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
 from rq import Queue
-from rq.job import get_current_job, Job
+from rq.exceptions import NoSuchJobError
+from rq.job import get_current_job, unpickle, Job
 
-from pulpcore.app.models import Task, ReservedResource, Worker
-from pulpcore.constants import TASK_STATES
-from pulpcore.tasking import connection, util
+from pulpcore.app.models import Task, TaskGroup, TaskPlacement, ReservedResource, Worker
+from pulpcore.constants import (
+    TASK_FINAL_STATES,
+    TASK_INCOMPLETE_STATES,
+    TASK_PRIORITIES,
+    TASK_PRIORITY_ORDER,
+    TASK_STATES,
+)
+from pulpcore.tasking import connection, placement, util
+from pulpcore.tasking.constants import TASKING_CONSTANTS
 
 
 _logger = logging.getLogger(__name__)
@@ -19,33 +35,39 @@ _logger = logging.getLogger(__name__)
 # Pulp tasks should never run more than one Julian year
 TASK_TIMEOUT = 31557600
 
+# the task group being submitted by the current thread, see submit_task_group()
+_submission = threading.local()
 
-def _acquire_worker(resources):
+
+def _acquire_worker(resources, cost=1):
     """
-    Attempts to acquire a worker for a set of resource urls. If no worker has any of those resources
-    reserved, then the first available worker is returned
+    Attempts to acquire a worker for a set of resource urls. If a worker has any of those resources
+    reserved, it is placed there, otherwise the worker is selected by the placement policy.
 
     Arguments:
         resources (list): a list of resource urls
+        cost (int): the expected cost of the task
 
     Returns:
-        :class:`pulpcore.app.models.Worker`: A worker to queue work for
+        :class:`pulpcore.app.models.TaskPlacement`: An unsaved placement of the task on a worker
+            to queue work for
 
     Raises:
         Worker.DoesNotExist: If no worker is found
+        Worker.MultipleObjectsReturned: If the resources are reserved by more than one worker
     """
     # Find a worker who already has this reservation, it is safe to send this work to them
     try:
         worker = Worker.objects.with_reservations(resources)
-    except Worker.MultipleObjectsReturned:
-        raise Worker.DoesNotExist
     except Worker.DoesNotExist:
         pass
     else:
-        return worker
+        return TaskPlacement(worker=worker, policy='reservation', cost=cost)
 
-    # Otherwise, return any available worker
-    return Worker.objects.get_unreserved_worker()
+    # Otherwise, let the placement policy select a worker
+    worker = placement.select_worker(resources, cost)
+    return TaskPlacement(worker=worker, policy=settings.WORKER_PLACEMENT['POLICY'], cost=cost,
+                         load=worker.cost_queued)
 
 
 def _queue_reserved_task(func, inner_task_id, resources, inner_args, inner_kwargs, options):
@@ -57,9 +79,9 @@ def _queue_reserved_task(func, inner_task_id, resources, inner_args, inner_kwarg
     inner_args and inner_kwargs. inner_args is a list, and inner_kwargs is a dictionary passed to
     the inner task as positional and keyword arguments using the * and ** operators.
 
-    The inner task is dispatched into a dedicated queue for a worker that is decided at dispatch
-    time. The logic deciding which queue receives a task is controlled through the
-    find_worker function.
+    The inner task is saved as an RQ job and added to the waiting tasks, see :func:`_wait`. It is
+    dispatched into a dedicated queue for a worker that is decided at dispatch time by
+    :func:`_dispatch_waiting`, as soon as its resources can be reserved.
 
     Args:
         func (basestring): The function to be called
@@ -74,49 +96,631 @@ def _queue_reserved_task(func, inner_task_id, resources, inner_args, inner_kwarg
         options (dict): For all options accepted by enqueue see the RQ docs
     """
     redis_conn = connection.get_redis_connection()
-    task_status = Task.objects.get(pk=inner_task_id)
-    task_name = func.__module__ + '.' + func.__name__
-    while True:
-        if task_name == "pulpcore.app.tasks.orphan.orphan_cleanup":
-            if ReservedResource.objects.exists():
-                # wait until there are no reservations
-                time.sleep(0.25)
-                continue
-            else:
-                task_status.state = TASK_STATES.RUNNING
-                task_status.save()
-                q = Queue('resource_manager', connection=redis_conn, is_async=False)
-                q.enqueue(func, args=inner_args, kwargs=inner_kwargs, job_id=inner_task_id,
-                          timeout=TASK_TIMEOUT, **options)
-                task_status.state = TASK_STATES.COMPLETED
-                task_status.save()
-                return
+    options = dict(options)
+    options.pop('at_front', None)
+    sequence = redis_conn.incr(TASKING_CONSTANTS.WAITING_SEQUENCE_KEY)
+    meta = dict(options.pop('meta', None) or {}, resources=resources, sequence=sequence)
+    job = Job.create(func, args=inner_args, kwargs=inner_kwargs, id=inner_task_id,
+                     timeout=TASK_TIMEOUT, meta=meta, connection=redis_conn, **options)
+    job.meta['exclusive'] = job.func_name == "pulpcore.app.tasks.orphan.orphan_cleanup"
+    job.save()
+    _wait(redis_conn, job.id, job.meta)
+    _dispatch_waiting([job.id])
+
+
+def _wait(redis_conn, job_id, meta):
+    """
+    Add a task to the waiting tasks of its priority class and of its dependencies.
+
+    A task is added to the waiting tasks of its resources once it does not wait for dependencies
+    anymore, see :func:`_try_dispatch`. The keys a task is added to are recorded, so that it is
+    removed from all of them once dispatched, even if its job was deleted, see :func:`_unwait`.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        job_id (str): The ID of the job of the task.
+        meta (dict): The metadata of the job.
+    """
+    pipeline = redis_conn.pipeline()
+    priority = meta.get('priority', TASK_PRIORITIES.NORMAL)
+    _add(pipeline, job_id, TASKING_CONSTANTS.WAITING_KEY.format(priority), meta['sequence'])
+    if meta.get('exclusive'):
+        _add(pipeline, job_id, TASKING_CONSTANTS.WAITING_EXCLUSIVE_KEY, time.time())
+    for task_id in meta.get('dependencies') or ():
+        pipeline.sadd(TASKING_CONSTANTS.WAITING_DEPENDENTS_KEY.format(task_id), job_id)
+    pipeline.execute()
+
+
+def _add(pipeline, job_id, key, score):
+    """
+    Add a waiting task to the sorted set of a key, and record the key.
+
+    Args:
+        pipeline (redis.client.Pipeline): The pipeline the commands are added to.
+        job_id (str): The ID of the job of the task.
+        key (str): The key of the sorted set.
+        score (float): The score of the task in the set, its position kept if already added.
+    """
+    pipeline.zadd(key, {job_id: score}, nx=True)
+    pipeline.sadd(TASKING_CONSTANTS.WAITING_ENTRY_KEY.format(job_id), key)
+
+
+def _discard(pipeline, job_id, key):
+    """
+    Remove a waiting task from the sorted set of a key.
+
+    Args:
+        pipeline (redis.client.Pipeline): The pipeline the commands are added to.
+        job_id (str): The ID of the job of the task.
+        key (str): The key of the sorted set.
+    """
+    pipeline.zrem(key, job_id)
+    pipeline.srem(TASKING_CONSTANTS.WAITING_ENTRY_KEY.format(job_id), key)
+
+
+def _unwait(redis_conn, job_id):
+    """
+    Remove a task from the waiting tasks, once dispatched, skipped or canceled.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        job_id (str): The ID of the job of the task.
+
+    Returns:
+        set: The IDs of the waiting tasks now first in line for the resources of the task.
+    """
+    entry_key = TASKING_CONSTANTS.WAITING_ENTRY_KEY.format(job_id)
+    keys = [key.decode() for key in redis_conn.smembers(entry_key)]
+    pipeline = redis_conn.pipeline()
+    for key in keys:
+        pipeline.zrem(key, job_id)
+    pipeline.delete(entry_key)
+    pipeline.execute()
+    prefix = TASKING_CONSTANTS.WAITING_RESOURCE_KEY.format('')
+    return _first_in_line(redis_conn, [key for key in keys if key.startswith(prefix)])
+
+
+def _first_in_line(redis_conn, keys):
+    """
+    Get the waiting tasks first in line for resources.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        keys (list): The keys of the waiting tasks of the resources.
+
+    Returns:
+        set: The IDs of the waiting tasks first in line for any of the resources.
+    """
+    pipeline = redis_conn.pipeline()
+    for key in keys:
+        pipeline.zrange(key, 0, 0)
+    return {job_id.decode() for first in pipeline.execute() for job_id in first}
+
+
+def _dependents(redis_conn, task_id):
+    """
+    Get the waiting tasks depending on a task which reached a final state.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        task_id (str): The ID of the task.
+
+    Returns:
+        set: The IDs of the waiting tasks depending on the task.
+    """
+    dependents_key = TASKING_CONSTANTS.WAITING_DEPENDENTS_KEY.format(task_id)
+    pipeline = redis_conn.pipeline()
+    pipeline.smembers(dependents_key)
+    pipeline.delete(dependents_key)
+    dependents, deleted = pipeline.execute()
+    return {job_id.decode() for job_id in dependents}
+
+
+def _dispatch_waiting(job_ids=None, free=False):
+    """
+    Dispatch waiting tasks whose resources can be reserved, by priority and fair share.
+
+    The waiting tasks of each priority class are dispatched before those of the next class. Within
+    a class, the tenants take turns, the tenant with the fewest tasks running or else served the
+    longest time ago first, and the tasks of each tenant are dispatched in the order they were
+    queued.
+
+    The waiting tasks needing a resource are kept in line for it, by priority class and in the
+    order they were queued, and a task is not dispatched until it is first in line for all of its
+    resources. Tasks needing other resources are dispatched regardless, so that a task waiting for
+    a busy resource does not hold back unrelated tasks. A task gets in line once its dependencies
+    completed, and is skipped if any of them did not, see :func:`_skip`.
+
+    Only the given tasks are tried, then the tasks getting first in line as others are dispatched,
+    skipped or canceled. So queueing a task, or releasing resources, costs trying the tasks which
+    may be dispatched because of it, however many tasks are waiting. Once no worker is free, the
+    tasks needing resources not already reserved by a worker wait for a free worker, and are tried
+    again once resources are released.
+
+    This runs in the resource manager whenever a task is queued, and as requested by
+    :func:`dispatch_waiting`, so there is no polling while tasks are waiting.
+
+    Args:
+        job_ids (iterable): The IDs of the waiting tasks to try. Defaults to all of them.
+        free (bool): Whether resources were released, so that the tasks waiting for a free worker
+            are tried too.
+    """
+    redis_conn = connection.get_redis_connection()
+    ran, held = _dispatch_exclusive(redis_conn)
+    if held:
+        # all of the waiting tasks are tried once the exclusive tasks ran
+        return
+    if job_ids is None or ran:
+        job_ids = {job_id.decode() for priority in TASK_PRIORITY_ORDER for job_id in
+                   redis_conn.zrange(TASKING_CONSTANTS.WAITING_KEY.format(priority), 0, -1)}
+        free = True
+    dispatch = SimpleNamespace(free=free, reserved=None, dispatched=set())
+    job_ids = set(job_ids)
+    while job_ids or dispatch.free:
+        job_ids = _dispatch_round(redis_conn, job_ids, dispatch)
+        dispatch.free = False
+
+
+def _dispatch_round(redis_conn, job_ids, dispatch):
+    """
+    Try to dispatch waiting tasks, see :func:`_dispatch_waiting`.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        job_ids (set): The IDs of the waiting tasks to try.
+        dispatch (types.SimpleNamespace): The state of the dispatch: whether the tasks waiting
+            for a free worker are tried (`free`), the reserved resources once no worker is free
+            (`reserved`, None until then) and the IDs of the tasks dispatched (`dispatched`).
+
+    Returns:
+        set: The IDs of the waiting tasks to try next, which got first in line for a resource or
+            depend on a skipped task.
+    """
+    waiting, job_ids = _waiting(job_ids)
+    dependency_states = _dependency_states([job for job, task_status in waiting])
+    ready = {priority: [] for priority in TASK_PRIORITY_ORDER}
+    for job, task_status in waiting:
+        pending = _pending_dependencies(job, dependency_states)
+        if pending & set(TASK_FINAL_STATES):
+            job_ids |= _skip(redis_conn, job, task_status)
+        elif not pending and not job.meta.get('exclusive'):
+            ready[job.meta.get('priority', TASK_PRIORITIES.NORMAL)].append((job, task_status))
+
+    for_worker = {priority: _waiting_for_worker(redis_conn, priority) if dispatch.free else {}
+                  for priority in TASK_PRIORITY_ORDER}
+    tenants = {job.meta.get('tenant') for job, task_status in waiting}
+    tenants.update(*for_worker.values())
+    dispatch.running, dispatch.served = _tenant_usage(tenants)
+    for priority in TASK_PRIORITY_ORDER:
+        # the tasks waiting for a free worker were queued before the others
+        if dispatch.reserved is None:
+            for job, task_status in _turns(for_worker[priority], dispatch.running,
+                                           dispatch.served):
+                job_ids |= _try_dispatch(redis_conn, job, task_status, dispatch)
+                if dispatch.reserved is not None:
+                    break
+        ready[priority].sort(key=lambda entry: entry[0].meta['sequence'])
+        for job, task_status in _fair_share(ready[priority], dispatch.running, dispatch.served):
+            job_ids |= _try_dispatch(redis_conn, job, task_status, dispatch)
+    return job_ids
+
+
+def _try_dispatch(redis_conn, job, task_status, dispatch):
+    """
+    Dispatch a waiting task without pending dependencies, if first in line for its resources.
+
+    A task not dispatched for lack of a free worker waits for one, see :func:`_waiting_for_worker`.
+    Otherwise it is tried again once it gets first in line, or its resources are released.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        job (types.SimpleNamespace): The ID and metadata of the job of the task.
+        task_status (pulpcore.app.models.Task): The task.
+        dispatch (types.SimpleNamespace): The state of the dispatch, see :func:`_dispatch_round`.
+
+    Returns:
+        set: The IDs of the waiting tasks which got first in line for a resource.
+    """
+    if job.id in dispatch.dispatched:
+        # tried already as it waited for a free worker
+        return set()
+    resources = set(job.meta['resources'])
+    priority = job.meta.get('priority', TASK_PRIORITIES.NORMAL)
+    tenant = job.meta.get('tenant')
+    worker_key = TASKING_CONSTANTS.WAITING_WORKER_KEY.format(priority, tenant or '')
+    keys = [TASKING_CONSTANTS.WAITING_RESOURCE_KEY.format(resource) for resource in resources]
+    # in line by priority class, then in the order the tasks were queued
+    score = TASK_PRIORITY_ORDER.index(priority) * 10 ** 12 + job.meta['sequence']
+    pipeline = redis_conn.pipeline()
+    for key in keys:
+        _add(pipeline, job.id, key, score)
+    for key in keys:
+        pipeline.zrange(key, 0, 0)
+    first = pipeline.execute()[2 * len(keys):]
+
+    pipeline = redis_conn.pipeline()
+    if any(job_ids != [job.id.encode()] for job_ids in first):
+        # wait for the tasks before it, without holding back the tasks after it
+        _discard(pipeline, job.id, worker_key)
+        pipeline.execute()
+        return set()
+    if dispatch.reserved is not None and not dispatch.reserved & resources:
+        # no worker is free
+        _add(pipeline, job.id, worker_key, job.meta['sequence'])
+        pipeline.sadd(TASKING_CONSTANTS.WAITING_TENANTS_KEY.format(priority), tenant or '')
+        pipeline.execute()
+        return set()
+
+    try:
+        job = Job.fetch(job.id, connection=redis_conn)
+    except NoSuchJobError:
+        # the task was canceled
+        return _unwait(redis_conn, job.id)
+    try:
+        dispatched = _dispatch(job, task_status, resources)
+    except Worker.DoesNotExist:
+        # no worker is free
+        dispatch.reserved = set(ReservedResource.objects.values_list('resource', flat=True))
+        _add(pipeline, job.id, worker_key, job.meta['sequence'])
+        pipeline.sadd(TASKING_CONSTANTS.WAITING_TENANTS_KEY.format(priority), tenant or '')
+        pipeline.execute()
+        return set()
+    if not dispatched:
+        # wait for the resources to be released
+        _discard(pipeline, job.id, worker_key)
+        pipeline.execute()
+        return set()
+
+    if dispatch.reserved is not None:
+        dispatch.reserved |= resources
+    dispatch.dispatched.add(job.id)
+    dispatch.running[tenant] += 1
+    dispatch.served[tenant] = timezone.now()
+    return _unwait(redis_conn, job.id)
+
+
+def _dispatch_exclusive(redis_conn):
+    """
+    Run the waiting tasks needing that no resource is reserved, e.g. orphan cleanup, if none is.
+
+    They are run by the resource manager itself, so that no task is dispatched meanwhile. While
+    resources are reserved, the tasks queued after them are dispatched regardless, until one of
+    them waited for ``EXCLUSIVE_WAIT_TIMEOUT`` seconds, so that it is not delayed forever by a
+    steady flow of tasks. All of the waiting tasks are tried once it ran.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+
+    Returns:
+        tuple: Whether any task was run, and whether the other waiting tasks are held back.
+    """
+    ran = False
+    exclusive = redis_conn.zrange(TASKING_CONSTANTS.WAITING_EXCLUSIVE_KEY, 0, -1, withscores=True)
+    for job_id, queued in exclusive:
+        waiting, canceled = _waiting([job_id.decode()])
+        if not waiting:
+            continue
+        job, task_status = waiting[0]
+        pending = _pending_dependencies(job, _dependency_states([job]))
+        if pending & set(TASK_FINAL_STATES):
+            _skip(redis_conn, job, task_status)
+            continue
+        elif pending:
+            continue
+        elif ReservedResource.objects.exists():
+            return ran, time.time() - queued > TASKING_CONSTANTS.EXCLUSIVE_WAIT_TIMEOUT
 
         try:
-            worker = _acquire_worker(resources)
-        except Worker.DoesNotExist:
-            # no worker is ready so we need to wait
-            time.sleep(0.25)
+            job = Job.fetch(job.id, connection=redis_conn)
+        except NoSuchJobError:
+            # the task was canceled
+            _unwait(redis_conn, job.id)
+            continue
+        _unwait(redis_conn, job.id)
+        task_status.state = TASK_STATES.RUNNING
+        task_status.save()
+        q = Queue('resource_manager', connection=redis_conn, is_async=False)
+        q.enqueue_job(job)
+        task_status.state = TASK_STATES.COMPLETED
+        task_status.save()
+        ran = True
+    return ran, False
+
+
+def _skip(redis_conn, job, task_status):
+    """
+    Skip a waiting task with a dependency which failed, was canceled or skipped.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        job (types.SimpleNamespace): The ID and metadata of the job of the task.
+        task_status (pulpcore.app.models.Task): The task.
+
+    Returns:
+        set: The IDs of the waiting tasks depending on the task, to be skipped too, or which got
+            first in line for a resource.
+    """
+    Task.objects.filter(pk=task_status.pk, state=TASK_STATES.WAITING).update(
+        state=TASK_STATES.SKIPPED, finished_at=timezone.now())
+    Task.notify_changed(task_status.pk)
+    return _unwait(redis_conn, job.id) | _dependents(redis_conn, job.id)
+
+
+def _dependency_states(jobs):
+    """
+    Get the states of the dependencies of waiting tasks, with a single query.
+
+    Args:
+        jobs (list): The jobs of the waiting tasks.
+
+    Returns:
+        dict: The states of the dependencies keyed by their IDs.
+    """
+    dependencies = {task_id for job in jobs for task_id in job.meta.get('dependencies') or ()}
+    if not dependencies:
+        return {}
+    states = Task.objects.filter(pk__in=dependencies).values_list('pk', 'state')
+    return {str(task_id): state for task_id, state in states}
+
+
+def _pending_dependencies(job, dependency_states):
+    """
+    Get the states of the dependencies of a task which did not complete.
+
+    Args:
+        job (rq.job.Job): The job of the task.
+        dependency_states (dict): The states of the dependencies keyed by their IDs, see
+            :func:`_dependency_states`.
+
+    Returns:
+        set: The states of the dependencies which did not complete.
+    """
+    dependencies = job.meta.get('dependencies') or ()
+    states = {dependency_states[task_id] for task_id in dependencies
+              if task_id in dependency_states}
+    return states - {TASK_STATES.COMPLETED}
+
+
+def _waiting(job_ids):
+    """
+    Get waiting tasks.
+
+    The metadata of their jobs are read in a single round trip to Redis and the tasks by a single
+    query. The jobs themselves are only fetched when the tasks are dispatched. The tasks already
+    dispatched or removed are ignored, and those canceled while waiting are removed.
+
+    Args:
+        job_ids (iterable): The IDs of the jobs of the tasks.
+
+    Returns:
+        tuple: A list of tuples of the job ID and metadata of each waiting task, as a
+            :class:`types.SimpleNamespace` with the `id` and `meta` of the job, and its
+            :class:`~pulpcore.app.models.Task`. And a set of the IDs of the waiting tasks which
+            got first in line for a resource as canceled tasks were removed.
+    """
+    redis_conn = connection.get_redis_connection()
+    job_ids = list(job_ids)
+    pipeline = redis_conn.pipeline()
+    for job_id in job_ids:
+        pipeline.hget(Job.key_for(job_id), 'meta')
+        pipeline.exists(TASKING_CONSTANTS.WAITING_ENTRY_KEY.format(job_id))
+    results = pipeline.execute()
+    tasks = Task.objects.filter(pk__in=job_ids, state=TASK_STATES.WAITING)
+    tasks = {str(task_status.pk): task_status for task_status in tasks}
+
+    waiting = []
+    first = set()
+    for job_id, meta, entered in zip(job_ids, results[::2], results[1::2]):
+        if not entered:
+            # the task was dispatched or removed already
+            continue
+        elif meta is None or job_id not in tasks:
+            # the task was canceled
+            first |= _unwait(redis_conn, job_id)
             continue
+        waiting.append((SimpleNamespace(id=job_id, meta=unpickle(meta)), tasks[job_id]))
+    return waiting, first
+
+
+def _waiting_for_worker(redis_conn, priority):
+    """
+    Get the tasks of a priority class waiting for a free worker, by tenant.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        priority (str): The priority class.
+
+    Returns:
+        collections.OrderedDict: Of an iterator of the waiting tasks of each tenant in the order
+            they were queued, see :func:`_first_waiting`, the tenant whose first task was queued
+            first first.
+    """
+    tenants_key = TASKING_CONSTANTS.WAITING_TENANTS_KEY.format(priority)
+    tenants = [tenant.decode() for tenant in redis_conn.smembers(tenants_key)]
+    keys = [TASKING_CONSTANTS.WAITING_WORKER_KEY.format(priority, tenant) for tenant in tenants]
+    pipeline = redis_conn.pipeline()
+    for key in keys:
+        pipeline.zrange(key, 0, 0, withscores=True)
+    first = pipeline.execute()
+    empty = [tenant for tenant, entries in zip(tenants, first) if not entries]
+    if empty:
+        redis_conn.srem(tenants_key, *empty)
+    order = sorted((entries[0][1], tenant, key)
+                   for tenant, key, entries in zip(tenants, keys, first) if entries)
+    return OrderedDict((tenant or None, _first_waiting(redis_conn, key))
+                       for sequence, tenant, key in order)
+
+
+def _first_waiting(redis_conn, key):
+    """
+    Iterate over the tasks waiting for a free worker, reading each as the previous one was tried.
+
+    Args:
+        redis_conn (redis.StrictRedis): The Redis connection.
+        key (str): The key of the tasks of a priority class and tenant waiting for a free worker.
+
+    Yields:
+        tuple: The job of each waiting task and its :class:`~pulpcore.app.models.Task`.
+    """
+    tried = set()
+    while True:
+        first = redis_conn.zrange(key, 0, 0)
+        if not first or first[0] in tried:
+            return
+        tried.add(first[0])
+        waiting, canceled = _waiting([first[0].decode()])
+        yield from waiting
+
+
+def _tenant_usage(tenants):
+    """
+    Get the number of tasks running for each tenant, and when a task of each was last dispatched.
+
+    Only the dispatches within the last ``FAIR_SHARE_WINDOW`` seconds are considered, a tenant
+    served earlier is considered as never served.
+
+    Args:
+        tenants (set): The tenants, None for the tasks without a tenant.
+
+    Returns:
+        tuple: A :class:`collections.Counter` of the tasks running for each tenant, and a dict of
+            when a task of each tenant was last dispatched, if recently.
+    """
+    of_tenants = Q(tenant__in=tenants - {None})
+    if None in tenants:
+        of_tenants |= Q(tenant__isnull=True)
+    placements = TaskPlacement.objects.filter(of_tenants).values('tenant')
+    since = timezone.now() - timedelta(seconds=TASKING_CONSTANTS.FAIR_SHARE_WINDOW)
+
+    usage = placements.filter(task__state__in=TASK_INCOMPLETE_STATES).annotate(running=Count('pk'))
+    running = Counter({tenant['tenant']: tenant['running'] for tenant in usage})
+    usage = placements.filter(created__gte=since).annotate(served=Max('created'))
+    served = {tenant['tenant']: tenant['served'] for tenant in usage}
+    return running, served
+
+
+def _fair_share(waiting, running, served):
+    """
+    Order waiting tasks by fair share across tenants.
+
+    The tenants take turns, the tenant with the fewest tasks running first, then the tenant served
+    the longest time ago, then the tenant whose first task was queued first. The tasks of each
+    tenant keep their order. Since tasks are dispatched while they are being ordered, the usage of
+    each tenant is read before each turn.
+
+    Args:
+        waiting (list): Of tuples of the job of each waiting task and its
+            :class:`~pulpcore.app.models.Task`, in the order they were queued.
+        running (collections.Counter): The number of tasks running for each tenant.
+        served (dict): When a task of each tenant was last dispatched, if ever.
+
+    Returns:
+        iterator: Of tuples of the job of each waiting task and its
+            :class:`~pulpcore.app.models.Task`.
+    """
+    tenants = OrderedDict()
+    for job, task_status in waiting:
+        tenants.setdefault(job.meta.get('tenant'), []).append((job, task_status))
+    return _turns(OrderedDict((tenant, iter(entries)) for tenant, entries in tenants.items()),
+                  running, served)
+
+
+def _turns(tenants, running, served):
+    """
+    Have tenants take turns, see :func:`_fair_share`.
 
+    Args:
+        tenants (collections.OrderedDict): Of an iterator of the waiting tasks of each tenant, the
+            tenant whose first task was queued first first.
+        running (collections.Counter): The number of tasks running for each tenant.
+        served (dict): When a task of each tenant was last dispatched, if ever.
+
+    Yields:
+        tuple: The job of each waiting task and its :class:`~pulpcore.app.models.Task`.
+    """
+    tenants = OrderedDict(tenants)
+
+    def usage(tenant):
+        return running[tenant], served.get(tenant) is not None, served.get(tenant)
+
+    while tenants:
+        tenant = min(tenants, key=usage)
         try:
-            worker.lock_resources(task_status, resources)
-        except IntegrityError:
-            # we have a worker but we can't create the reservations so wait
-            time.sleep(0.25)
-        else:
-            # we have a worker with the locks
-            break
+            entry = next(tenants[tenant])
+        except StopIteration:
+            del tenants[tenant]
+            continue
+        yield entry
 
-    task_status.worker = worker
-    task_status.save()
 
+def _dispatch(job, task_status, resources):
+    """
+    Reserve the resources of a task for a worker and enqueue it to the worker's queue.
+
+    Args:
+        job (rq.job.Job): The job of the task.
+        task_status (pulpcore.app.models.Task): The task.
+        resources (set): The urls of the resources to reserve.
+
+    Returns:
+        bool: Whether the task was dispatched.
+
+    Raises:
+        Worker.DoesNotExist: If no worker is free.
+    """
+    try:
+        task_placement = _acquire_worker(resources, job.meta.get('cost', 1))
+    except Worker.MultipleObjectsReturned:
+        # the resources are reserved by several workers so we need to wait
+        return False
+
+    worker = task_placement.worker
+    try:
+        worker.lock_resources(task_status, resources)
+    except IntegrityError:
+        # we have a worker but we can't create the reservations so wait
+        return False
+
+    if not Task.objects.filter(pk=task_status.pk, state=TASK_STATES.WAITING).update(worker=worker):
+        # the task was canceled meanwhile
+        task_status.release_resources()
+        return True
+    task_placement.task = task_status
+    task_placement.priority = job.meta.get('priority', TASK_PRIORITIES.NORMAL)
+    task_placement.tenant = job.meta.get('tenant')
+    task_placement.save()
+
+    # an interactive task runs ahead of the tasks already queued for the worker, unless any of
+    # them needs its resources, so that the tasks of a resource still run in order
+    at_front = task_placement.priority == TASK_PRIORITIES.INTERACTIVE
+    at_front = at_front and not _queued_with_resources(worker, task_status, resources)
+    q = Queue(worker.name, connection=connection.get_redis_connection())
     try:
-        q = Queue(worker.name, connection=redis_conn)
-        q.enqueue(func, args=inner_args, kwargs=inner_kwargs, job_id=inner_task_id,
-                  timeout=TASK_TIMEOUT, **options)
+        if at_front:
+            # queued first so that it follows the task
+            q.enqueue(_release_resources, args=(job.id, ), at_front=True)
+        q.enqueue_job(job, at_front=at_front)
     finally:
-        q.enqueue(_release_resources, args=(inner_task_id, ))
+        if not at_front:
+            q.enqueue(_release_resources, args=(job.id, ))
+    return True
+
+
+def _queued_with_resources(worker, task_status, resources):
+    """
+    Whether any other task queued for a worker, and not started yet, needs any of the resources.
+
+    Args:
+        worker (pulpcore.app.models.Worker): The worker.
+        task_status (pulpcore.app.models.Task): The task being dispatched.
+        resources (set): The urls of the resources of the task.
+
+    Returns:
+        bool: True if a task queued for the worker reserved any of the resources.
+    """
+    queued = Task.objects.filter(worker=worker, state=TASK_STATES.WAITING,
+                                 reserved_resources__resource__in=resources)
+    return queued.exclude(pk=task_status.pk).exists()
 
 
 def _release_resources(task_id):
@@ -130,21 +734,110 @@ def _release_resources(task_id):
         task_id (basestring): The UUID of the task that requested the reservation
 
     """
+    redis_conn = connection.get_redis_connection()
     try:
         task = Task.objects.get(pk=task_id, state=TASK_STATES.RUNNING)
     except Task.DoesNotExist:
         pass
     else:
-        msg = _('The task {task_id} exited immediately for some reason. Marking as '
-                'failed. Check the logs for more details')
-        _logger.error(msg.format(task_id=task_id))
-        exc = RuntimeError(msg.format(task_id=task_id))
-        task.set_failed(exc, None)
+        # a task killed to be canceled is left to be set canceled
+        if not redis_conn.sismember(TASKING_CONSTANTS.KILL_KEY, task_id):
+            msg = _('The task {task_id} exited immediately for some reason. Marking as '
+                    'failed. Check the logs for more details')
+            _logger.error(msg.format(task_id=task_id))
+            exc = RuntimeError(msg.format(task_id=task_id))
+            task.set_failed(exc, None)
+
+    resources = Task.objects.get(pk=task_id).release_resources()
+    dispatch_waiting(tasks=[task_id], resources=resources)
+
+
+def dispatch_waiting(tasks=(), resources=()):
+    """
+    Have the resource manager dispatch the waiting tasks, e.g. after resources were released.
+
+    Only the waiting tasks which may be dispatched because of the changes are tried: those
+    depending on the tasks, those first in line for the resources, and those waiting for a free
+    worker. The requests are merged until the resource manager handles them, so that a single job
+    handles a burst of them, see :func:`_dispatch_requested`. All of the waiting tasks are tried
+    when no change is given, e.g. once a worker came online.
 
-    Task.objects.get(pk=task_id).release_resources()
+    Args:
+        tasks (iterable): The IDs of the tasks which reached a final state.
+        resources (iterable): The urls of the resources which were released.
+    """
+    redis_conn = connection.get_redis_connection()
+    pipeline = redis_conn.pipeline()
+    tasks = [str(task_id) for task_id in tasks]
+    if tasks:
+        pipeline.sadd(TASKING_CONSTANTS.DISPATCH_TASKS_KEY, *tasks)
+    if resources:
+        pipeline.sadd(TASKING_CONSTANTS.DISPATCH_RESOURCES_KEY, *resources)
+    if not tasks and not resources:
+        pipeline.set(TASKING_CONSTANTS.DISPATCH_ALL_KEY, 1)
+    pipeline.set(TASKING_CONSTANTS.DISPATCH_QUEUED_KEY, 1, nx=True)
+    if pipeline.execute()[-1]:
+        q = Queue('resource_manager', connection=redis_conn)
+        q.enqueue(_dispatch_requested, timeout=TASK_TIMEOUT)
+
+
+def _dispatch_requested():
+    """
+    Dispatch the waiting tasks which may be dispatched since the requests of
+    :func:`dispatch_waiting`.
 
+    The requests are read and cleared at once, so that any request made afterwards queues another
+    job. The tasks canceled while waiting are removed from the waiting tasks.
+    """
+    redis_conn = connection.get_redis_connection()
+    pipeline = redis_conn.pipeline()
+    pipeline.delete(TASKING_CONSTANTS.DISPATCH_QUEUED_KEY)
+    pipeline.smembers(TASKING_CONSTANTS.DISPATCH_TASKS_KEY)
+    pipeline.smembers(TASKING_CONSTANTS.DISPATCH_RESOURCES_KEY)
+    pipeline.get(TASKING_CONSTANTS.DISPATCH_ALL_KEY)
+    pipeline.delete(TASKING_CONSTANTS.DISPATCH_TASKS_KEY, TASKING_CONSTANTS.DISPATCH_RESOURCES_KEY,
+                    TASKING_CONSTANTS.DISPATCH_ALL_KEY)
+    queued, tasks, resources, everything, deleted = pipeline.execute()
+
+    job_ids = _first_in_line(redis_conn, [
+        TASKING_CONSTANTS.WAITING_RESOURCE_KEY.format(resource.decode()) for resource in resources])
+    for task_id in tasks:
+        job_ids |= _unwait(redis_conn, task_id.decode())
+        job_ids |= _dependents(redis_conn, task_id.decode())
+    _dispatch_waiting(None if everything else job_ids, free=bool(resources))
+
+
+def task_queues():
+    """
+    Get the number of waiting tasks of each priority class, and when the oldest was queued.
 
-def enqueue_with_reservation(func, resources, args=None, kwargs=None, options=None):
+    Returns:
+        list: A dict for each priority class, in the order they are dispatched, with the
+            `priority`, the number of `waiting` tasks and the creation time of the oldest waiting
+            task (`oldest_waiting_since`, None if no task is waiting).
+    """
+    redis_conn = connection.get_redis_connection()
+    pipeline = redis_conn.pipeline()
+    for priority in TASK_PRIORITY_ORDER:
+        waiting_key = TASKING_CONSTANTS.WAITING_KEY.format(priority)
+        pipeline.zcard(waiting_key)
+        pipeline.zrange(waiting_key, 0, 0)
+    results = pipeline.execute()
+
+    queues = []
+    for i, priority in enumerate(TASK_PRIORITY_ORDER):
+        waiting, oldest = results[2 * i:2 * i + 2]
+        oldest = oldest and Task.objects.filter(pk=oldest[0].decode()).first()
+        queues.append({
+            'priority': priority,
+            'waiting': waiting,
+            'oldest_waiting_since': oldest.created if oldest else None,
+        })
+    return queues
+
+
+def enqueue_with_reservation(func, resources, args=None, kwargs=None, options=None, cost=1,
+                             priority=TASK_PRIORITIES.NORMAL, tenant=None):
     """
     Enqueue a message to Pulp workers with a reservation.
 
@@ -167,9 +860,24 @@ def enqueue_with_reservation(func, resources, args=None, kwargs=None, options=No
         args (tuple): The positional arguments to pass on to the task.
         kwargs (dict): The keyword arguments to pass on to the task.
         options (dict): The options to be passed on to the task.
+        cost (int): The expected cost of the task, relative to the other tasks, used to place it
+            on a worker. See the ``WORKER_PLACEMENT`` setting.
+        priority (str): The priority class of the task, one of
+            :data:`pulpcore.constants.TASK_PRIORITIES`. Waiting tasks of a class are dispatched
+            before those of the following classes.
+        tenant (str): The tenant the task is scheduled for, e.g. the name of a user or of a group
+            of repositories. Waiting tasks of the same priority class are dispatched in turns
+            across tenants. Defaults to the tenant of the task calling this method, if any.
 
     Returns (rq.job.job): An RQ Job instance as returned by RQ's enqueue function
+
+    Raises:
+        ValueError: If the priority class is not valid.
+
+    See :func:`submit_task_group` to submit tasks with dependencies between them.
     """
+    if priority not in TASK_PRIORITY_ORDER:
+        raise ValueError(_('Unknown task priority: {}').format(priority))
     if not args:
         args = tuple()
     if not kwargs:
@@ -181,12 +889,64 @@ def enqueue_with_reservation(func, resources, args=None, kwargs=None, options=No
     inner_task_id = str(uuid.uuid4())
     redis_conn = connection.get_redis_connection()
     current_job = get_current_job(connection=redis_conn)
-    parent_kwarg = {}
+    task_kwargs = {}
+    meta = dict(options.get('meta') or {}, cost=cost, priority=priority)
     if current_job:
         current_task = Task.objects.get(id=current_job.id)
-        parent_kwarg['parent'] = current_task
-    Task.objects.create(pk=inner_task_id, state=TASK_STATES.WAITING, **parent_kwarg)
-    q = Queue('resource_manager', connection=redis_conn)
+        task_kwargs['parent'] = current_task
+        if tenant is None:
+            tenant = current_job.meta.get('tenant')
+    submission = getattr(_submission, 'current', None)
+    if submission:
+        task_kwargs['task_group'] = submission.group
+        meta['dependencies'] = [str(task.pk) for task in submission.dependencies]
+    options = dict(options, meta=dict(meta, tenant=tenant))
+    task = Task.objects.create(pk=inner_task_id, state=TASK_STATES.WAITING, **task_kwargs)
     task_args = (func, inner_task_id, list(resources), args, kwargs, options)
-    q.enqueue(_queue_reserved_task, args=task_args, timeout=TASK_TIMEOUT)
+    enqueue_kwargs = dict(args=task_args, timeout=TASK_TIMEOUT,
+                          at_front=priority == TASK_PRIORITIES.INTERACTIVE)
+    if submission:
+        task.dependencies.set(submission.dependencies)
+        submission.tasks.append(task)
+        submission.queued.append(enqueue_kwargs)
+    else:
+        q = Queue('resource_manager', connection=redis_conn)
+        q.enqueue(_queue_reserved_task, **enqueue_kwargs)
     return Job(id=inner_task_id, connection=redis_conn)
+
+
+@contextmanager
+def submit_task_group(description=None):
+    """
+    Submit the tasks enqueued within the context as a group, with dependencies between them.
+
+    The tasks enqueued with :func:`enqueue_with_reservation` within the context are added to a new
+    :class:`~pulpcore.app.models.TaskGroup`, and depend on the tasks listed in the `dependencies`
+    of the submission at the time. Each task is dispatched once its dependencies completed, and is
+    skipped if any of them failed, was canceled or skipped.
+
+    The submission happens in a transaction, and the tasks are queued to the resource manager once
+    it is committed, so either all of the tasks are submitted or none.
+
+    Args:
+        description (str): An optional description of the group.
+
+    Yields:
+        types.SimpleNamespace: The submission, with the `group`, the `tasks` enqueued so far and
+            the `dependencies` of the tasks enqueued next.
+    """
+    with transaction.atomic():
+        group = TaskGroup.objects.create(description=description)
+        submission = SimpleNamespace(group=group, tasks=[], dependencies=[], queued=[])
+        _submission.current = submission
+        try:
+            yield submission
+        finally:
+            del _submission.current
+
+        def queue_submitted():
+            q = Queue('resource_manager', connection=connection.get_redis_connection())
+            for enqueue_kwargs in submission.queued:
+                q.enqueue(_queue_reserved_task, **enqueue_kwargs)
+
+        transaction.on_commit(queue_submitted)
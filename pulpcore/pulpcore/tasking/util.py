@@ -1,14 +1,17 @@
 from gettext import gettext as _
 import logging
+import math
 import time
+from contextlib import contextmanager
 
 from django.db import transaction
 from django.urls import reverse
+from django.utils import timezone
 from rq.job import Job
 
 from pulpcore.app.models import Task
 from pulpcore.app.serializers import view_name_for_model
-from pulpcore.constants import TASK_FINAL_STATES, TASK_STATES
+from pulpcore.constants import TASK_FINAL_STATES, TASK_INCOMPLETE_STATES, TASK_STATES
 from pulpcore.exceptions import MissingResource
 from pulpcore.tasking import connection
 from pulpcore.tasking.constants import TASKING_CONSTANTS
@@ -40,22 +43,103 @@ def cancel(task_id):
         _logger.info(msg.format(task_id=task_id, state=task_status.state))
         return
 
+    cancel_tasks(Task.objects.filter(pk=task_id))
+
+
+def cancel_tasks(tasks, timeout=TASKING_CONSTANTS.CANCEL_TIMEOUT, kill=True):
+    """
+    Cancel the tasks of a queryset which are not in a final state.
+
+    The jobs of the tasks are deleted so that they are never run, and the running tasks are killed
+    by publishing their IDs to the kill channel. The states of the tasks are updated once the
+    workers acknowledge that the running tasks were killed, or after the timeout, unless the tasks
+    reached a final state meanwhile. The tasks depending on them are then skipped.
+
+    Args:
+        tasks (django.db.models.QuerySet): The tasks to cancel.
+        timeout (int): The number of seconds to wait for the running tasks to be killed.
+        kill (bool): Whether to kill the running tasks. False if their worker is known to be dead.
+
+    Returns:
+        int: The number of tasks canceled.
+    """
+    task_ids = list(tasks.exclude(state__in=TASK_FINAL_STATES).values_list('pk', flat=True))
     redis_conn = connection.get_redis_connection()
-    job = Job(id=str(task_id), connection=redis_conn)
 
-    if job.is_started:
-        redis_conn.sadd(TASKING_CONSTANTS.KILL_KEY, job.get_id())
-    job.delete()
+    started = []
+    for task_id in task_ids:
+        job = Job(id=str(task_id), connection=redis_conn)
+        if kill and job.is_started:
+            started.append(job.get_id())
+            redis_conn.sadd(TASKING_CONSTANTS.KILL_KEY, job.get_id())
+            redis_conn.publish(TASKING_CONSTANTS.KILL_CHANNEL, job.get_id())
+        job.delete()
+
+    # Wait until the workhorses are killed, so that we aren't deleting resources still being used
+    unacknowledged = {TASKING_CONSTANTS.KILL_ACK_KEY.format(job_id) for job_id in started}
+    deadline = time.monotonic() + timeout
+    while unacknowledged:
+        remaining = int(math.ceil(deadline - time.monotonic()))
+        acknowledgement = remaining > 0 and redis_conn.blpop(list(unacknowledged), remaining)
+        if not acknowledgement:
+            msg = _('Tasks were not killed within {timeout} seconds: {ids}')
+            _logger.warning(msg.format(timeout=timeout, ids=', '.join(sorted(unacknowledged))))
+            break
+        unacknowledged.discard(acknowledgement[0].decode())
+
+    canceled = []
+    for task_id in task_ids:
+        with transaction.atomic():
+            updated = Task.objects.filter(pk=task_id, state__in=TASK_INCOMPLETE_STATES).update(
+                state=TASK_STATES.CANCELED, finished_at=timezone.now())
+            if updated:
+                _delete_incomplete_resources(Task.objects.get(pk=task_id))
+        if updated:
+            # the task did not reach a final state meanwhile
+            Task.notify_changed(task_id)
+            _logger.info(_('Task canceled: {id}.').format(id=task_id))
+            canceled.append(task_id)
+    if started:
+        # once canceled, the killed tasks are not marked as failed by their workers anymore
+        redis_conn.srem(TASKING_CONSTANTS.KILL_KEY, *started)
+
+    if canceled:
+        # circular import avoidance
+        from pulpcore.tasking.tasks import dispatch_waiting
+        # the canceled tasks stop waiting, and the tasks depending on them are skipped
+        dispatch_waiting(tasks=canceled)
+    return len(canceled)
+
+
+@contextmanager
+def task_changes(task_id):
+    """
+    Subscribe to the notifications of the changes of the state or progress of a task.
+
+    Subscribing before reading the task ensures that no change after reading it is missed.
+
+    Args:
+        task_id (uuid.UUID): The ID of the task.
 
-    # A hack to ensure that we aren't deleting resources still being used by the workhorse
-    time.sleep(1.5)
+    Yields:
+        callable: A function waiting for a change of the task, which takes the number of seconds
+            to wait at most and returns True if the task changed, otherwise False.
+    """
+    redis_conn = connection.get_redis_connection()
+    pubsub = redis_conn.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(TASKING_CONSTANTS.TASK_CHANGES_CHANNEL.format(task_id))
 
-    with transaction.atomic():
-        task_status.state = TASK_STATES.CANCELED
-        task_status.save()
-        _delete_incomplete_resources(task_status)
+    def wait(timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if pubsub.get_message(timeout=deadline - time.monotonic()):
+                return True
+        return False
 
-    _logger.info(_('Task canceled: {id}.').format(id=task_id))
+    try:
+        yield wait
+    finally:
+        pubsub.close()
 
 
 def _delete_incomplete_resources(task):
@@ -1,16 +1,21 @@
 import logging
 import os
+import random
+import select
 import signal
 import socket
 import sys
 import threading
 import time
+from contextlib import suppress
 
 # https://github.com/rochacbruno/dynaconf/issues/89
 from dynaconf.contrib import django_dynaconf  # noqa
 
+from django.conf import settings
 from rq import Queue
-from rq.worker import Worker
+from rq.exceptions import NoSuchJobError
+from rq.worker import Worker, WorkerStatus
 
 
 import django  # noqa otherwise E402: module level not at top of file
@@ -21,8 +26,10 @@ from pulpcore.app.models import Task
 
 from pulpcore.tasking.constants import TASKING_CONSTANTS
 from pulpcore.tasking.services.storage import WorkerDirectory
+from pulpcore.tasking.tasks import dispatch_waiting  # noqa E402
 from pulpcore.tasking.services.worker_watcher import (
     check_worker_processes,
+    elect_watcher,
     handle_worker_heartbeat,
     mark_worker_offline
 )
@@ -45,6 +52,7 @@ class PulpWorker(Worker):
         * Sets the worker TTL
         * Supports the killing of a job that is already running
         * Closes the database connection before forking so it is not process shared
+        * Optionally executes jobs in a persistent executor instead of forking for each job
     """
 
     # Do not print "Result is kept for XXX seconds" after each job
@@ -64,20 +72,170 @@ class PulpWorker(Worker):
 
         return super().__init__(queues, **kwargs)
 
-    def execute_job(self, *args, **kwargs):
+    def execute_job(self, job, queue):
         """
-        Close the database connection before forking, so that it is not shared
+        Execute a job in a work horse, either forked for the job or a persistent executor
+
+        Close the database connection before forking, so that it is not shared. Once the job is
+        done, acknowledge that the job was killed if it was canceled.
+
+        Args:
+            job (rq.job.Job): The job to execute
+            queue (rq.queue.Queue): The Queue associated with the job
+        """
+        if settings.WORKER_EXECUTOR['PERSISTENT']:
+            self.set_state(WorkerStatus.BUSY)
+            self._execute_in_executor(job, queue)
+            self.set_state(WorkerStatus.IDLE)
+        else:
+            django.db.connections.close_all()
+            super().execute_job(job, queue)
+        if self.connection.sismember(TASKING_CONSTANTS.KILL_KEY, job.get_id()):
+            ack_key = TASKING_CONSTANTS.KILL_ACK_KEY.format(job.get_id())
+            pipeline = self.connection.pipeline()
+            pipeline.rpush(ack_key, 1)
+            pipeline.expire(ack_key, TASKING_CONSTANTS.CANCEL_TIMEOUT)
+            pipeline.execute()
+
+    def _execute_in_executor(self, job, queue):
+        """
+        Execute a job in the persistent executor
+
+        The ID of the job is written to the executor, which writes a line back once the job is
+        done. The worker keeps sending heartbeats meanwhile. If the executor dies, the job is
+        handled as if the work horse died and a new executor is forked for the next job. The
+        executor is recycled after executing ``WORKER_EXECUTOR['MAX_JOBS']`` jobs.
+
+        Args:
+            job (rq.job.Job): The job to execute
+            queue (rq.queue.Queue): The Queue associated with the job
+        """
+        try:
+            self._send_to_executor(job, queue)
+        except BrokenPipeError:
+            # the executor died while it was idle
+            self._stop_executor()
+            self._send_to_executor(job, queue)
+
+        if self._wait_for_executor():
+            self._executed += 1
+            if self._executed >= settings.WORKER_EXECUTOR['MAX_JOBS']:
+                self._stop_executor()
+        else:
+            # handle the job like rq does when a work horse dies
+            self.monitor_work_horse(job)
+            self._stop_executor()
+
+    def _send_to_executor(self, job, queue):
+        """
+        Send a job to the persistent executor, forking the executor if it is not running
+
+        Args:
+            job (rq.job.Job): The job to execute
+            queue (rq.queue.Queue): The Queue associated with the job
+        """
+        if not self._horse_pid:
+            self._fork_executor()
+        self._executor_jobs.write('{} {}\n'.format(job.get_id(), queue.name))
+        self._executor_jobs.flush()
+
+    def _wait_for_executor(self):
+        """
+        Wait for the executor to finish the job, sending heartbeats while it runs
+
+        Returns:
+            bool: True if the job is done, False if the executor died.
+        """
+        while True:
+            ready, _, _ = select.select([self._executor_results], [], [],
+                                        self.job_monitoring_interval)
+            if ready:
+                return bool(self._executor_results.readline())
+            self.heartbeat(self.job_monitoring_interval + 5)
+
+    def _fork_executor(self):
+        """
+        Fork the persistent executor and connect to it with a pair of pipes
         """
         django.db.connections.close_all()
-        super().execute_job(*args, **kwargs)
+        jobs_read, jobs_write = os.pipe()
+        results_read, results_write = os.pipe()
+        child_pid = os.fork()
+        if child_pid == 0:
+            os.close(jobs_write)
+            os.close(results_read)
+            try:
+                self._main_executor(jobs_read, results_write)
+            finally:
+                # never return to the worker loop from the executor
+                os._exit(1)
+        os.close(jobs_read)
+        os.close(results_write)
+        self._horse_pid = child_pid
+        self._executor_jobs = os.fdopen(jobs_write, 'w')
+        self._executor_results = os.fdopen(results_read)
+        self._executed = 0
+        self.procline('Forked executor {0} at {1}'.format(child_pid, time.time()))
+
+    def _stop_executor(self):
+        """
+        Stop the persistent executor by closing its pipes and wait for it to exit
+        """
+        for pipe in (self._executor_jobs, self._executor_results):
+            with suppress(BrokenPipeError):
+                pipe.close()
+        try:
+            os.waitpid(self._horse_pid, 0)
+        except ChildProcessError:
+            pass
+        self._horse_pid = 0
+
+    def _main_executor(self, jobs_read, results_write):
+        """
+        The entry point of the persistent executor
+
+        Jobs are performed one at a time, as their IDs are read, until the worker closes the pipe.
+        The database connections are kept open between jobs.
+
+        Args:
+            jobs_read (int): The file descriptor the IDs of the jobs to perform are read from.
+            results_write (int): The file descriptor a line is written to after each job.
+        """
+        random.seed()
+        self.setup_work_horse_signals()
+        self._is_horse = True
+
+        with os.fdopen(jobs_read) as jobs, os.fdopen(results_write, 'w') as results:
+            for line in jobs:
+                job_id, queue_name = line.split()
+                try:
+                    job = self.job_class.fetch(job_id, connection=self.connection)
+                except NoSuchJobError:
+                    # the job was canceled
+                    pass
+                else:
+                    queue = self.queue_class(queue_name, connection=self.connection,
+                                             job_class=self.job_class)
+                    self.perform_job(job, queue)
+                    for connection in django.db.connections.all():
+                        if connection.connection is not None and not connection.is_usable():
+                            connection.close()
+                results.write('done\n')
+                results.flush()
+
+        # os._exit() is the way to exit from childs after a fork()
+        os._exit(0)
 
     def perform_job(self, job, queue):
         """
         Set the :class:`pulpcore.app.models.Task` to running and install a kill monitor Thread
 
         This method is called by the worker's work horse thread (the forked child) just before the
-        task begins executing. It creates a Thread which monitors a special Redis key which if
-        created should kill the task with SIGKILL.
+        task begins executing. It creates a Thread which subscribes to a special Redis channel and
+        kills the task with SIGKILL when the ID of the job is published to it, until the job is
+        done. The Thread may outlive the job by up to a second, so the kill and the end of the job
+        are serialized by a lock and nothing is killed once the job is done. The job is not
+        performed if the task was canceled after the job was dequeued.
 
         Args:
             job (rq.job.Job): The job to perform
@@ -88,30 +246,53 @@ class PulpWorker(Worker):
         except Task.DoesNotExist:
             pass
         else:
-            task.set_running()
-
-        def check_kill(conn, id, interval=1):
-            while True:
-                res = conn.srem(TASKING_CONSTANTS.KILL_KEY, id)
-                if res > 0:
-                    os.kill(os.getpid(), signal.SIGKILL)
-                time.sleep(interval)
-
-        t = threading.Thread(target=check_kill, args=(self.connection, job.get_id()))
+            if not task.set_running():
+                # the task was canceled after the job was dequeued
+                return False
+
+        def check_kill(conn, id, done, lock):
+            def kill():
+                # under a persistent executor, the next job may be running once this one is done
+                with lock:
+                    if not done.is_set():
+                        os.kill(os.getpid(), signal.SIGKILL)
+
+            pubsub = conn.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(TASKING_CONSTANTS.KILL_CHANNEL)
+            # the job may have been canceled before subscribing
+            if conn.sismember(TASKING_CONSTANTS.KILL_KEY, id):
+                kill()
+            while not done.is_set():
+                message = pubsub.get_message(timeout=1)
+                if message and message['data'].decode() == id:
+                    kill()
+            pubsub.close()
+
+        done = threading.Event()
+        lock = threading.Lock()
+        t = threading.Thread(target=check_kill, args=(self.connection, job.get_id(), done, lock))
         t.start()
 
-        return super().perform_job(job, queue)
+        try:
+            return super().perform_job(job, queue)
+        finally:
+            with lock:
+                done.set()
 
     def handle_job_failure(self, job, **kwargs):
         """
         Set the :class:`pulpcore.app.models.Task` to failed and record the exception.
 
-        This method is called by rq to handle a job failure.
+        This method is called by rq to handle a job failure. The task is left to be set canceled
+        if the job was killed to cancel it.
 
         Args:
             job (rq.job.Job): The job that experienced the failure
             kwargs (dict): Unused parameters
         """
+        if self.connection.sismember(TASKING_CONSTANTS.KILL_KEY, job.get_id()):
+            return super().handle_job_failure(job, **kwargs)
+
         try:
             task = Task.objects.get(pk=job.get_id())
         except Task.DoesNotExist:
@@ -147,7 +328,7 @@ class PulpWorker(Worker):
         Handle the birth of a RQ worker.
 
         This creates the working directory and removes any vestige records from a previous worker
-        with the same name.
+        with the same name. The tasks waiting for a worker are then dispatched.
 
         Args:
             args (tuple): unused positional arguments
@@ -157,20 +338,26 @@ class PulpWorker(Worker):
         working_dir = WorkerDirectory(self.name)
         working_dir.delete()
         working_dir.create()
-        return super().register_birth(*args, **kwargs)
+        super().register_birth(*args, **kwargs)
+        if self.name.startswith(TASKING_CONSTANTS.WORKER_PREFIX):
+            # tasks may be waiting for a worker
+            handle_worker_heartbeat(self.name)
+            dispatch_waiting()
 
     def heartbeat(self, *args, **kwargs):
         """
         Handle the heartbeat of a RQ worker.
 
-        This writes the heartbeat records to the :class:`pulpcore.app.models.Worker` records.
+        This writes the heartbeat records to the :class:`pulpcore.app.models.Worker` records. The
+        worker elected as the watcher also checks for missing workers.
 
         Args:
             args (tuple): unused positional arguments
             kwargs (dict): unused keyword arguments
         """
         handle_worker_heartbeat(self.name)
-        check_worker_processes()
+        if elect_watcher(self.name):
+            check_worker_processes()
         return super().heartbeat(*args, **kwargs)
 
     def handle_warm_shutdown_request(self, *args, **kwargs):
@@ -30,6 +30,9 @@ setup(
     url='http://www.pulpproject.org',
     python_requires='>=3.6',
     install_requires=requirements,
+    extras_require={
+        's3': ['django-storages[boto3]'],
+    },
     include_package_data=True,
     classifiers=(
         'License :: OSI Approved :: GNU General Public License v2 or later (GPLv2+)',
@@ -34,6 +34,17 @@ STATUS = {
             'type': 'array',
             'items': {'type': 'object'},
         },
+        'task_queues': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'priority': {'type': 'string'},
+                    'waiting': {'type': 'integer'},
+                    'oldest_waiting_since': {'type': ['string', 'null']},
+                }
+            },
+        },
         'versions': {
             'type': 'array',
             'items': {
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.db import connection, models
+from django.test import TestCase
+
+from pulpcore.app.models import Content
+
+
+class CastContent(Content):
+    TYPE = 'cast'
+
+    name = models.TextField()
+
+    class Meta:
+        app_label = 'tests'
+
+
+class CollidingContent(Content):
+    TYPE = 'cast'
+
+    class Meta:
+        app_label = 'other'
+
+
+class MasterModelQuerySetTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with connection.schema_editor() as editor:
+            editor.create_model(CastContent)
+            editor.create_model(CollidingContent)
+
+    def test_detail_models(self):
+        """Tests that detail models are found by their app label and TYPE."""
+        detail_models = Content.detail_models()
+        self.assertIs(detail_models[('tests', 'cast')], CastContent)
+        self.assertIs(detail_models[('other', 'cast')], CollidingContent)
+
+    def test_cast(self):
+        """Tests that objects are cast in order with one query per type and batch."""
+        units = [
+            CastContent.objects.create(name='a'),
+            CastContent.objects.create(name='b'),
+            CastContent.objects.create(name='c'),
+        ]
+        queryset = Content.objects.filter(pk__in=[u.pk for u in units]).order_by('created')
+        # the colliding table is queried too
+        with self.assertNumQueries(3):
+            cast = list(queryset.cast())
+        self.assertEqual([type(c) for c in cast], [CastContent] * 3)
+        self.assertEqual([c.pk for c in cast], [u.pk for u in units])
+        self.assertEqual(cast[1].name, 'b')
+
+        with self.assertNumQueries(5):
+            self.assertEqual(len(list(queryset.cast(batch_size=2))), 3)
+
+    def test_cast_colliding(self):
+        """Tests that objects of detail models sharing a TYPE are cast to their own model."""
+        units = [CastContent.objects.create(name='a'), CollidingContent.objects.create()]
+        queryset = Content.objects.filter(pk__in=[u.pk for u in units]).order_by('created')
+        self.assertEqual([type(c) for c in queryset.cast()], [CastContent, CollidingContent])
+
+    def test_cast_unknown(self):
+        """Tests that objects of an unknown type are cast one by one."""
+        unit = Content.objects.create(type='unknown')
+        with mock.patch.object(Content, 'cast', autospec=True, return_value=unit) as cast:
+            self.assertEqual(Content.objects.filter(pk=unit.pk).cast_objects([unit]), [unit])
+        cast.assert_called_once_with(unit)
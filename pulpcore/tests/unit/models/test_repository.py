@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from pulpcore.app.models import Content, Repository, RepositoryContent, RepositoryVersion, Task
+
+
+class RepositoryVersionTestCase(TestCase):
+
+    def setUp(self):
+        # versions are created by tasks
+        task = Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job', return_value=task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository = Repository.objects.create(name='versions')
+        self.content = [Content.objects.create(type='test') for i in range(3)]
+
+    def _pks(self, content):
+        return set(content.values_list('pk', flat=True))
+
+    def _create(self, add=(), remove=()):
+        with RepositoryVersion.create(self.repository) as version:
+            version.add_content(Content.objects.filter(pk__in=[c.pk for c in add]))
+            version.remove_content(Content.objects.filter(pk__in=[c.pk for c in remove]))
+        return version
+
+    def test_content(self):
+        """Tests that the content of each version is selected by its number range."""
+        one = self._create(add=self.content[:2])
+        two = self._create(add=self.content[2:], remove=self.content[:1])
+        three = self._create(add=self.content[:1])
+
+        self.assertEqual(self._pks(one.content), {c.pk for c in self.content[:2]})
+        self.assertEqual(self._pks(two.content), {c.pk for c in self.content[1:]})
+        self.assertEqual(self._pks(three.content), {c.pk for c in self.content})
+
+        relation = RepositoryContent.objects.get(content=self.content[0], version_added=one)
+        self.assertEqual((relation.number_added, relation.number_removed), (1, 2))
+
+    def test_delete(self):
+        """Tests that deleting a version moves the number ranges to the next version."""
+        one = self._create(add=self.content[:2])
+        two = self._create(remove=self.content[:1])
+        three = self._create(add=self.content[2:])
+
+        two.delete()
+        self.assertEqual(self._pks(one.content), {c.pk for c in self.content[:2]})
+        self.assertEqual(self._pks(three.content), {c.pk for c in self.content[1:]})
+        relation = RepositoryContent.objects.get(content=self.content[0])
+        self.assertEqual((relation.number_added, relation.number_removed), (1, 3))
+        self.assertEqual(three.content_removed_summary, {'test': 1})
+
+        three.delete()
+        self.assertEqual(self._pks(one.content), {c.pk for c in self.content[:2]})
+        relation = RepositoryContent.objects.get(content=self.content[0])
+        self.assertEqual(relation.number_removed, None)
+
+    def test_summary(self):
+        """Tests that the content counts are stored when a version is completed."""
+        self._create(add=self.content[:2])
+        two = self._create(add=self.content[2:], remove=self.content[:1])
+
+        two = RepositoryVersion.objects.prefetch_related('counts').get(pk=two.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(two.content_summary, {'test': 2})
+            self.assertEqual(two.content_added_summary, {'test': 1})
+            self.assertEqual(two.content_removed_summary, {'test': 1})
+
+    def test_create_from_base_version(self):
+        """Tests that a version created from a base version has the content of the base."""
+        one = self._create(add=self.content[:2])
+        self._create(add=self.content[2:], remove=self.content[:1])
+
+        with RepositoryVersion.create(self.repository, base_version=one) as three:
+            pass
+        self.assertEqual(self._pks(three.content), {c.pk for c in self.content[:2]})
+        self.assertEqual(self._pks(three.added()), {self.content[0].pk})
+        self.assertEqual(self._pks(three.removed()), {self.content[2].pk})
+
+    def test_add_content(self):
+        """Tests that content is added once, from a queryset or a list in chunks."""
+        one = self._create(add=self.content[:1])
+        with RepositoryVersion.create(self.repository) as two:
+            two.add_content(Content.objects.filter(pk=self.content[0].pk))
+            with mock.patch.object(RepositoryVersion, 'ADD_CHUNK_SIZE', 1):
+                two.add_content(self.content[1:2] + [self.content[2].pk])
+            two.add_content(self.content)
+
+        self.assertEqual(self._pks(one.content), {self.content[0].pk})
+        self.assertEqual(self._pks(two.content), {c.pk for c in self.content})
+        self.assertEqual(self._pks(two.added()), {c.pk for c in self.content[1:]})
+        self.assertEqual(RepositoryContent.objects.filter(repository=self.repository).count(), 3)
+
+    def test_delete_chunked(self):
+        """Tests that squashing in chunks keeps the content of the other versions."""
+        one = self._create(add=self.content)
+        self._create(remove=self.content[:2])
+        three = self._create(add=self.content[:1])
+        four = self._create(remove=self.content[:1] + self.content[2:])
+        contents = {v.pk: self._pks(v.content) for v in (one, three, four)}
+
+        progress = mock.Mock(done=0)
+        with mock.patch.object(RepositoryVersion, 'SQUASH_CHUNK_SIZE', 1):
+            RepositoryVersion.objects.get(number=2).delete(progress=progress)
+        self.assertEqual({v.pk: self._pks(v.content) for v in (one, three, four)}, contents)
+        self.assertEqual(progress.done, progress.total)
+        self.assertEqual(progress.total, 2)
+
+        relation = RepositoryContent.objects.get(content=self.content[0])
+        self.assertEqual((relation.number_added, relation.number_removed), (1, 4))
+        self.assertEqual(three.content_added_summary, {})
+        self.assertEqual(three.content_removed_summary, {'test': 1})
+
+    def test_delete_again(self):
+        """Tests that a version is hidden while squashed, and deleting it again after a failure
+        completes the squash."""
+        one = self._create(add=self.content)
+        two = self._create(remove=self.content[:2])
+        three = self._create(add=self.content[:1])
+        contents = {v.pk: self._pks(v.content) for v in (one, three)}
+
+        # fail after the first chunk
+        progress = mock.Mock(done=0, **{'save.side_effect': [None, RuntimeError]})
+        with mock.patch.object(RepositoryVersion, 'SQUASH_CHUNK_SIZE', 1):
+            with self.assertRaises(RuntimeError):
+                RepositoryVersion.objects.get(pk=two.pk).delete(progress=progress)
+        self.assertTrue(RepositoryVersion.objects.get(pk=two.pk).deleting)
+        self.assertEqual({v.pk: self._pks(v.content) for v in (one, three)}, contents)
+        with self.assertRaisesRegex(ValueError, 'being deleted'):
+            RepositoryVersion.create(self.repository)
+
+        RepositoryVersion.objects.get(pk=two.pk).delete()
+        self.assertFalse(RepositoryVersion.objects.filter(pk=two.pk).exists())
+        self.assertEqual({v.pk: self._pks(v.content) for v in (one, three)}, contents)
+        relation = RepositoryContent.objects.get(content=self.content[0])
+        self.assertEqual((relation.number_added, relation.number_removed), (1, None))
+        relation = RepositoryContent.objects.get(content=self.content[1])
+        self.assertEqual((relation.number_added, relation.number_removed), (1, 3))
+        self.assertEqual(three.content_removed_summary, {'test': 1})
+        self._create()
+
+    def test_difference(self):
+        """Tests that the content added and removed is computed between any two versions."""
+        one = self._create(add=self.content[:1])
+        self._create(add=self.content[1:2])
+        self._create(remove=self.content[:1])
+        four = self._create(add=self.content[2:])
+
+        self.assertEqual(self._pks(four.added(base_version=one)), {c.pk for c in self.content[1:]})
+        self.assertEqual(self._pks(four.removed(base_version=one)), {self.content[0].pk})
+        self.assertEqual(self._pks(one.added(base_version=four)), {self.content[0].pk})
+        self.assertEqual(self._pks(four.added()), {self.content[2].pk})
+
+    def test_backfill_numbers(self):
+        """Tests that the version numbers of associations created without them are filled in."""
+        self._create(add=self.content[:2])
+        self._create(remove=self.content[:1])
+        RepositoryContent.objects.update(number_added=None, number_removed=None)
+
+        self.assertEqual(RepositoryContent.backfill_numbers(), 2)
+        numbers = RepositoryContent.objects.order_by('content').values_list(
+            'number_added', 'number_removed')
+        self.assertEqual(list(numbers), [(1, 2), (1, None)])
+        self.assertEqual(RepositoryContent.backfill_numbers(), 0)
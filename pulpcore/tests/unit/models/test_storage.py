@@ -0,0 +1,52 @@
+import mock
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, override_settings
+
+from pulpcore.app.models import storage
+from pulpcore.app.views import ContentView
+
+try:
+    import boto3
+    from moto import mock_s3
+except ImportError:
+    mock_s3 = None
+
+
+@unittest.skipIf(storage.S3Boto3Storage is None or mock_s3 is None,
+                 'django-storages, boto3 and moto are required')
+@override_settings(MEDIA_ROOT='/var/lib/pulp/')
+class TestS3(SimpleTestCase):
+
+    def setUp(self):
+        s3 = mock_s3()
+        s3.start()
+        self.addCleanup(s3.stop)
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='pulp')
+        self.storage = storage.S3(bucket_name='pulp')
+
+    def test_save(self):
+        """Tests that files are stored relative to MEDIA_ROOT and never overwritten."""
+        path = storage.get_artifact_path('abcdef')
+        name = self.storage.save(path, ContentFile(b'first'))
+        self.assertEqual(name, 'artifact/ab/cdef')
+        self.assertTrue(self.storage.exists(path))
+
+        name = self.storage.save(path, ContentFile(b'second'))
+        self.assertEqual(name, 'artifact/ab/cdef')
+        with self.storage.open(name) as fp:
+            self.assertEqual(fp.read(), b'first')
+
+    def test_responder(self):
+        """Tests that the s3 responder redirects to a pre-signed URL."""
+        name = self.storage.save('artifact/ab/cdef', ContentFile(b'data'))
+        with mock.patch('pulpcore.app.views.content.default_storage', self.storage):
+            response = ContentView()._s3(name)
+        self.assertEqual(response.status_code, 302)
+        url = urlparse(response['Location'])
+        self.assertTrue(url.path.endswith('/artifact/ab/cdef'))
+        query = parse_qs(url.query)
+        self.assertIn('Signature', query)
+        self.assertIn('Expires', query)
@@ -1,7 +1,20 @@
+import threading
+import time
+
+from django.db import IntegrityError, connection, transaction
 from django.db.models import ProtectedError
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 
-from pulpcore.app.models import ReservedResource, Task, TaskReservedResource, Worker
+from pulpcore.app.models import (
+    ProgressReport,
+    ReservedResource,
+    Task,
+    TaskGroup,
+    TaskHistory,
+    TaskReservedResource,
+    Worker,
+)
+from pulpcore.constants import TASK_STATES
 
 
 class TaskTestCase(TestCase):
@@ -20,3 +33,165 @@ class TaskTestCase(TestCase):
         task.release_resources()
         task.delete()
         self.assertFalse(Task.objects.filter(id=task.id).exists())
+
+    def test_set_running(self):
+        """
+        Tests that a waiting task is set running, but a task canceled meanwhile is not.
+        """
+        task = Task.objects.create(state=TASK_STATES.WAITING)
+        self.assertTrue(task.set_running())
+        task.refresh_from_db()
+        self.assertEqual(task.state, TASK_STATES.RUNNING)
+        self.assertIsNotNone(task.started_at)
+
+        task = Task.objects.create(state=TASK_STATES.WAITING)
+        Task.objects.filter(pk=task.pk).update(state=TASK_STATES.CANCELED)
+        self.assertFalse(task.set_running())
+        task.refresh_from_db()
+        self.assertEqual(task.state, TASK_STATES.CANCELED)
+        self.assertIsNone(task.started_at)
+
+    def test_archive(self):
+        """
+        Tests that tasks in a final state without reserved resources are moved into the history.
+        """
+        worker = Worker.objects.create(name="test_worker")
+        parent = Task.objects.create(state=TASK_STATES.COMPLETED, worker=worker)
+        failed = Task.objects.create(state=TASK_STATES.FAILED, parent=parent,
+                                     error={'description': 'boom'})
+        running = Task.objects.create(state=TASK_STATES.RUNNING, parent=parent)
+        reserved = Task.objects.create(state=TASK_STATES.CANCELED)
+        resource = ReservedResource.objects.create(resource="test", worker=worker)
+        TaskReservedResource.objects.create(task=reserved, resource=resource)
+        ProgressReport.objects.create(message="test", task=failed)
+
+        self.assertEqual(list(Task.objects.all().archive(batch_size=1)), [1, 1])
+        self.assertEqual(set(Task.objects.values_list('pk', flat=True)), {running.pk, reserved.pk})
+        self.assertFalse(ProgressReport.objects.exists())
+
+        history = TaskHistory.objects.get(pk=parent.pk)
+        self.assertEqual((history.state, history.worker, history.created),
+                         (TASK_STATES.COMPLETED, "test_worker", parent.created))
+        history = TaskHistory.objects.get(pk=failed.pk)
+        self.assertEqual((history.state, history.error, history.parent),
+                         (TASK_STATES.FAILED, {'description': 'boom'}, parent.pk))
+
+    def test_archive_dependencies(self):
+        """Tests that the dependencies of tasks not in a final state are kept."""
+        failed = Task.objects.create(state=TASK_STATES.FAILED)
+        waiting = Task.objects.create(state=TASK_STATES.WAITING)
+        waiting.dependencies.add(failed)
+        completed = Task.objects.create(state=TASK_STATES.COMPLETED)
+        skipped = Task.objects.create(state=TASK_STATES.SKIPPED)
+        skipped.dependencies.add(completed)
+
+        list(Task.objects.all().archive())
+        self.assertEqual(set(Task.objects.values_list('pk', flat=True)), {failed.pk, waiting.pk})
+
+    def test_archive_groups(self):
+        """Tests that the tasks of a group are archived together."""
+        group = TaskGroup.objects.create()
+        failed = Task.objects.create(state=TASK_STATES.FAILED, task_group=group)
+        running = Task.objects.create(state=TASK_STATES.RUNNING, task_group=group)
+
+        list(Task.objects.all().archive())
+        self.assertEqual(set(group.tasks.values_list('pk', flat=True)), {failed.pk, running.pk})
+
+        Task.objects.filter(pk=running.pk).update(state=TASK_STATES.COMPLETED)
+        list(Task.objects.filter(pk=failed.pk).archive())
+        self.assertEqual(group.tasks.count(), 2)
+        list(Task.objects.all().archive())
+        self.assertFalse(group.tasks.exists())
+
+
+class TaskGroupTestCase(TestCase):
+
+    def _state(self, *states):
+        group = TaskGroup.objects.create()
+        for state in states:
+            Task.objects.create(state=state, task_group=group)
+        return group.state
+
+    def test_state(self):
+        """Tests that the state of a group is derived from the states of its tasks."""
+        self.assertEqual(self._state(TASK_STATES.WAITING, TASK_STATES.WAITING),
+                         TASK_STATES.WAITING)
+        self.assertEqual(self._state(TASK_STATES.COMPLETED, TASK_STATES.WAITING),
+                         TASK_STATES.RUNNING)
+        self.assertEqual(self._state(TASK_STATES.FAILED, TASK_STATES.RUNNING),
+                         TASK_STATES.RUNNING)
+        self.assertEqual(self._state(TASK_STATES.COMPLETED, TASK_STATES.COMPLETED),
+                         TASK_STATES.COMPLETED)
+        self.assertEqual(self._state(TASK_STATES.COMPLETED, TASK_STATES.SKIPPED),
+                         TASK_STATES.FAILED)
+
+
+class ReservationTestCase(TestCase):
+
+    def setUp(self):
+        self.worker = Worker.objects.create(name="test_worker")
+        self.other_worker = Worker.objects.create(name="other_worker")
+
+    def _reserved(self):
+        return set(ReservedResource.objects.values_list('resource', 'worker__name'))
+
+    def test_lock_and_release(self):
+        """Tests that reservations are shared by the tasks of a worker until all release them."""
+        task = Task.objects.create()
+        other_task = Task.objects.create()
+        self.worker.lock_resources(task, ['a', 'b'])
+        self.worker.lock_resources(other_task, ['b', 'c'])
+        self.assertEqual(self._reserved(),
+                         {('a', 'test_worker'), ('b', 'test_worker'), ('c', 'test_worker')})
+        self.assertEqual(Worker.objects.with_reservations(['b', 'd']), self.worker)
+
+        self.assertEqual(task.release_resources(), ['a'])
+        self.assertEqual(self._reserved(), {('b', 'test_worker'), ('c', 'test_worker')})
+        self.assertEqual(set(other_task.reserved_resources.values_list('resource', flat=True)),
+                         {'b', 'c'})
+
+        self.assertEqual(sorted(other_task.release_resources()), ['b', 'c'])
+        self.assertEqual(self._reserved(), set())
+        self.assertFalse(TaskReservedResource.objects.exists())
+        with self.assertRaises(Worker.DoesNotExist):
+            Worker.objects.with_reservations(['b'])
+
+    def test_lock_conflict(self):
+        """Tests that no resource is reserved if any is reserved by another worker."""
+        self.other_worker.lock_resources(Task.objects.create(), ['b'])
+        task = Task.objects.create()
+        with self.assertRaisesRegex(IntegrityError, 'another worker: b$'):
+            self.worker.lock_resources(task, ['a', 'b'])
+        self.assertEqual(self._reserved(), {('b', 'other_worker')})
+        self.assertFalse(task.reserved_resources.exists())
+
+        self.worker.lock_resources(task, ['a'])
+        with self.assertRaises(Worker.MultipleObjectsReturned):
+            Worker.objects.with_reservations(['a', 'b'])
+
+
+class ConcurrentReleaseTestCase(TransactionTestCase):
+
+    def test_concurrent_release(self):
+        """Tests that a resource released by two tasks at the same time is not left reserved."""
+        worker = Worker.objects.create(name="test_worker")
+        task = Task.objects.create()
+        other_task = Task.objects.create()
+        worker.lock_resources(task, ['a'])
+        worker.lock_resources(other_task, ['a'])
+        released = threading.Event()
+
+        def release():
+            with transaction.atomic():
+                task.release_resources()
+                released.set()
+                # the other task releases the resource before this transaction is committed
+                time.sleep(0.5)
+            connection.close()
+
+        thread = threading.Thread(target=release)
+        thread.start()
+        released.wait()
+        other_task.release_resources()
+        thread.join()
+        self.assertFalse(ReservedResource.objects.exists())
@@ -0,0 +1,50 @@
+from django.test import TestCase
+from rest_framework import serializers
+
+from pulpcore.app.models import Content, ContentArtifact
+from pulpcore.app.serializers.content import ContentListSerializer
+from pulpcore.app.serializers.fields import ContentArtifactsField
+
+
+class ArtifactsSerializer(serializers.Serializer):
+    artifacts = ContentArtifactsField()
+
+    class Meta:
+        list_serializer_class = ContentListSerializer
+
+
+class TestContentArtifactsField(TestCase):
+
+    def test_to_representation(self):
+        """Tests that artifacts are represented by their href, or None if not downloaded."""
+        content_artifacts = [
+            ContentArtifact(artifact_id=5, relative_path='a'),
+            ContentArtifact(artifact_id=None, relative_path='b'),
+        ]
+        self.assertEqual(ContentArtifactsField().to_representation(content_artifacts), {
+            'a': '/pulp/api/v3/artifacts/5/',
+            'b': None,
+        })
+
+
+class TestContentListSerializer(TestCase):
+
+    def create_content(self, count):
+        for i in range(count):
+            content = Content.objects.create(type='test')
+            ContentArtifact.objects.create(content=content, relative_path='a')
+
+    def serialize(self):
+        queryset = Content.objects.filter(type='test')
+        return ArtifactsSerializer(queryset, many=True).data
+
+    def test_queries(self):
+        """Tests that the number of queries does not depend on the number of content."""
+        self.create_content(1)
+        with self.assertNumQueries(2):
+            data = self.serialize()
+        self.assertEqual(data[0]['artifacts'], {'a': None})
+
+        self.create_content(4)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.serialize()), 5)
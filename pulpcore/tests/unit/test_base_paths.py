@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+
+from pulpcore.app.base_paths import BasePath, BasePathTrie
+from pulpcore.app.models import Distribution
+from pulpcore.app.views.content import ContentView, NegativeCache, PathNotResolved
+
+
+class TestBasePathTrie(TransactionTestCase):
+
+    def setUp(self):
+        self.distribution = Distribution.objects.create(base_path="trie/a/b", name="trieab")
+        self.trie = BasePathTrie()
+
+    def test_match(self):
+        """Tests that a path is matched to the distribution serving it."""
+        expected = BasePath(self.distribution.pk, 'trieab', 'trie/a/b', None)
+        self.assertEqual(self.trie.match('trie/a/b/file'), expected)
+        self.assertEqual(self.trie.match('/trie/a/b/c/file'), expected)
+        self.assertIsNone(self.trie.match('trie/a/b'))
+        self.assertIsNone(self.trie.match('trie/a/file'))
+        self.assertIsNone(self.trie.match('trie/a/bc/file'))
+
+    def test_refresh(self):
+        """Tests that the trie is rebuilt when distributions are saved or deleted."""
+        self.assertIsNone(self.trie.match('trie/c/file'))
+        distribution = Distribution.objects.create(base_path="trie/c", name="triec")
+        self.assertIsNone(self.trie.match('trie/c/file'))
+        self.trie.refresh(max_age=0)
+        self.assertEqual(self.trie.match('trie/c/file').pk, distribution.pk)
+        distribution.base_path = "trie/d"
+        distribution.save()
+        self.trie.refresh(max_age=0)
+        self.assertIsNone(self.trie.match('trie/c/file'))
+        self.assertEqual(self.trie.match('trie/d/file').pk, distribution.pk)
+        distribution.delete()
+        self.trie.refresh(max_age=0)
+        self.assertIsNone(self.trie.match('trie/d/file'))
+
+    def test_unchanged(self):
+        """Tests that the trie is not rebuilt while the distributions are unchanged."""
+        self.trie.refresh(max_age=0)
+        with self.assertNumQueries(0):
+            self.trie.refresh(max_age=0)
+
+    def test_overlapping(self):
+        """Tests that base paths nesting, or nested in, a path are found."""
+        self.trie.refresh(max_age=0)
+        self.assertEqual(self.trie.overlapping('trie').pk, self.distribution.pk)
+        self.assertEqual(self.trie.overlapping('trie/a/b/c').pk, self.distribution.pk)
+        self.assertEqual(self.trie.overlapping('/trie/a/b/').pk, self.distribution.pk)
+        self.assertIsNone(self.trie.overlapping('trie/a/c'))
+        self.assertIsNone(self.trie.overlapping('trie/a/b', exclude=self.distribution))
+
+
+class TestMatchDistribution(TestCase):
+
+    def setUp(self):
+        self.distribution = Distribution.objects.create(base_path="view/a", name="viewa")
+        self.trie = BasePathTrie()
+        self.trie.refresh()
+        patches = (mock.patch('pulpcore.app.views.content.base_paths', self.trie),
+                   mock.patch.object(ContentView, 'NOT_FOUND', NegativeCache()))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_match(self):
+        """Tests that the matched distribution is taken from the trie without a query."""
+        with self.assertNumQueries(0):
+            distribution = ContentView()._match_distribution('view/a/file')
+        self.assertEqual(distribution.pk, self.distribution.pk)
+        self.assertEqual(distribution.base_path, 'view/a')
+
+    def test_not_matched(self):
+        """Tests that a path not matched raises PathNotResolved without a query."""
+        with self.assertNumQueries(0), self.assertRaises(PathNotResolved):
+            ContentView()._match_distribution('view/b/file')
@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pulpcore.app.models import Task, User
+from pulpcore.app.viewsets import TaskViewSet
+from pulpcore.constants import TASK_STATES
+from pulpcore.tasking.constants import TASKING_CONSTANTS
+from pulpcore.tasking.tasks import _release_resources
+from pulpcore.tasking.util import cancel_tasks
+
+
+@mock.patch('pulpcore.tasking.util.Job')
+@mock.patch('pulpcore.tasking.util.connection')
+class TestCancelTasks(TestCase):
+
+    def _jobs(self, job_class, started=False):
+        def job(id, connection):
+            return mock.Mock(is_started=started, **{'get_id.return_value': id})
+        job_class.side_effect = job
+
+    def test_cancel(self, connection, job_class):
+        """Tests that the incomplete tasks are canceled and their jobs deleted."""
+        self._jobs(job_class)
+        waiting = Task.objects.create(state=TASK_STATES.WAITING)
+        completed = Task.objects.create(state=TASK_STATES.COMPLETED)
+
+        self.assertEqual(cancel_tasks(Task.objects.all()), 1)
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.state, TASK_STATES.CANCELED)
+        self.assertIsNotNone(waiting.finished_at)
+        self.assertEqual(Task.objects.get(pk=completed.pk).state, TASK_STATES.COMPLETED)
+        job_class.assert_called_once_with(id=str(waiting.pk), connection=mock.ANY)
+        redis_conn = connection.get_redis_connection.return_value
+        redis_conn.publish.assert_not_called()
+
+    def test_kill(self, connection, job_class):
+        """Tests that running tasks are killed, and the kill key is removed after the wait."""
+        self._jobs(job_class, started=True)
+        task = Task.objects.create(state=TASK_STATES.RUNNING)
+        ack_key = TASKING_CONSTANTS.KILL_ACK_KEY.format(task.pk)
+        redis_conn = connection.get_redis_connection.return_value
+        redis_conn.blpop.return_value = (ack_key.encode(), b'1')
+
+        self.assertEqual(cancel_tasks(Task.objects.all()), 1)
+        redis_conn.publish.assert_called_once_with(TASKING_CONSTANTS.KILL_CHANNEL, str(task.pk))
+        redis_conn.blpop.assert_called_once_with([ack_key], TASKING_CONSTANTS.CANCEL_TIMEOUT)
+        redis_conn.srem.assert_called_once_with(TASKING_CONSTANTS.KILL_KEY, str(task.pk))
+
+    def test_finished_meanwhile(self, connection, job_class):
+        """Tests that a task reaching a final state while being killed is not canceled."""
+        self._jobs(job_class, started=True)
+        task = Task.objects.create(state=TASK_STATES.RUNNING)
+
+        def complete(keys, timeout):
+            Task.objects.filter(pk=task.pk).update(state=TASK_STATES.COMPLETED)
+            return keys[0].encode(), b'1'
+
+        redis_conn = connection.get_redis_connection.return_value
+        redis_conn.blpop.side_effect = complete
+
+        self.assertEqual(cancel_tasks(Task.objects.all()), 0)
+        self.assertEqual(Task.objects.get(pk=task.pk).state, TASK_STATES.COMPLETED)
+
+    def test_dead_worker(self, connection, job_class):
+        """Tests that the tasks of a dead worker are canceled without killing or waiting."""
+        self._jobs(job_class, started=True)
+        task = Task.objects.create(state=TASK_STATES.RUNNING)
+
+        self.assertEqual(cancel_tasks(Task.objects.all(), timeout=0, kill=False), 1)
+        self.assertEqual(Task.objects.get(pk=task.pk).state, TASK_STATES.CANCELED)
+        redis_conn = connection.get_redis_connection.return_value
+        redis_conn.publish.assert_not_called()
+        redis_conn.blpop.assert_not_called()
+
+
+@mock.patch('pulpcore.tasking.tasks.dispatch_waiting')
+@mock.patch('pulpcore.tasking.tasks.connection')
+class TestReleaseResources(TestCase):
+
+    def test_crashed(self, connection, dispatch_waiting):
+        """Tests that a task still running when its resources are released is failed."""
+        connection.get_redis_connection.return_value.sismember.return_value = False
+        task = Task.objects.create(state=TASK_STATES.RUNNING)
+        _release_resources(str(task.pk))
+        self.assertEqual(Task.objects.get(pk=task.pk).state, TASK_STATES.FAILED)
+
+    def test_killed(self, connection, dispatch_waiting):
+        """Tests that a task killed to be canceled is not failed."""
+        connection.get_redis_connection.return_value.sismember.return_value = True
+        task = Task.objects.create(state=TASK_STATES.RUNNING)
+        _release_resources(str(task.pk))
+        self.assertEqual(Task.objects.get(pk=task.pk).state, TASK_STATES.RUNNING)
+        dispatch_waiting.assert_called_once_with(tasks=[str(task.pk)], resources=[])
+
+
+class TestBulkCancel(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='admin')
+        self.view = TaskViewSet.as_view({'post': 'bulk_cancel'})
+
+    def _post(self, url):
+        request = APIRequestFactory().post(url)
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def test_filters_required(self):
+        """Tests that tasks are not canceled unless they are filtered."""
+        Task.objects.create(state=TASK_STATES.WAITING)
+        response = self._post('/pulp/api/v3/tasks/cancel/?ordering=created')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.get().state, TASK_STATES.WAITING)
+
+    @mock.patch('pulpcore.app.viewsets.task.cancel_tasks', return_value=1)
+    def test_filtered(self, cancel_tasks):
+        """Tests that the tasks matching the filters are canceled."""
+        waiting = Task.objects.create(state=TASK_STATES.WAITING)
+        Task.objects.create(state=TASK_STATES.RUNNING)
+        response = self._post('/pulp/api/v3/tasks/cancel/?state=waiting')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'canceled': 1})
+        tasks, = cancel_tasks.call_args[0]
+        self.assertEqual(list(tasks), [waiting])
@@ -0,0 +1,234 @@
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rq.job import Job
+
+from pulpcore.app.models import ReservedResource, Task, Worker
+from pulpcore.constants import TASK_PRIORITIES, TASK_STATES
+from pulpcore.tasking.constants import TASKING_CONSTANTS
+from pulpcore.tasking.connection import get_redis_connection
+from pulpcore.tasking.tasks import (
+    _dispatch,
+    _dispatch_requested,
+    _dispatch_waiting,
+    _wait,
+    _waiting,
+    dispatch_waiting,
+)
+
+
+@override_settings(WORKER_PLACEMENT={'POLICY': 'least-loaded', 'CAPACITY': 10})
+class TestInteractiveDispatch(TestCase):
+
+    def setUp(self):
+        Worker.objects.create(name='{}-1@host'.format(TASKING_CONSTANTS.WORKER_PREFIX))
+
+    def _dispatch(self, priority, *resources):
+        task = Task.objects.create(state=TASK_STATES.WAITING)
+        job = SimpleNamespace(id=str(task.pk), meta={'priority': priority})
+        with mock.patch('pulpcore.tasking.tasks.Queue') as queue:
+            self.assertTrue(_dispatch(job, task, set(resources)))
+        return queue.return_value.enqueue_job.call_args[1]['at_front']
+
+    def test_at_front(self):
+        """Tests that an interactive task runs ahead of the tasks queued for other resources."""
+        self.assertFalse(self._dispatch(TASK_PRIORITIES.NORMAL, 'a'))
+        self.assertTrue(self._dispatch(TASK_PRIORITIES.INTERACTIVE, 'b'))
+
+    def test_same_resources(self):
+        """Tests that an interactive task does not run ahead of a task queued for its resources."""
+        self.assertFalse(self._dispatch(TASK_PRIORITIES.NORMAL, 'a', 'b'))
+        self.assertFalse(self._dispatch(TASK_PRIORITIES.INTERACTIVE, 'b'))
+
+
+class WaitingTestCase(TestCase):
+    """
+    Have the waiting tasks kept under Redis keys of their own, deleted afterwards.
+    """
+
+    def setUp(self):
+        prefix = 'test:{}:'.format(uuid.uuid4())
+        keys = {name: prefix + value for name, value in vars(TASKING_CONSTANTS).items()
+                if name.startswith(('WAITING_', 'DISPATCH_')) and name.endswith('_KEY')}
+        patcher = mock.patch.multiple(TASKING_CONSTANTS, **keys)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.redis_conn = get_redis_connection()
+        self.addCleanup(lambda: [self.redis_conn.delete(key)
+                                 for key in self.redis_conn.scan_iter(prefix + '*')])
+        self.job_ids = []
+
+    def _queue(self, resources, task_status=None, **meta):
+        """Have a task wait, and return the ID of its job."""
+        task_status = task_status or Task.objects.create(state=TASK_STATES.WAITING)
+        job_id = str(task_status.pk)
+        sequence = self.redis_conn.incr(TASKING_CONSTANTS.WAITING_SEQUENCE_KEY)
+        meta = dict(meta, resources=resources, sequence=sequence)
+        job = Job.create(print, id=job_id, meta=meta, connection=self.redis_conn)
+        job.save()
+        self.addCleanup(job.delete)
+        _wait(self.redis_conn, job_id, meta)
+        self.job_ids.append(job_id)
+        return job_id
+
+    def _waits(self, job_id):
+        return self.redis_conn.exists(TASKING_CONSTANTS.WAITING_ENTRY_KEY.format(job_id))
+
+
+class TestWaiting(WaitingTestCase):
+
+    def test_waiting(self):
+        """Tests that the waiting tasks are read in bulk, and the canceled ones removed."""
+        tasks = [Task.objects.create(state=state) for state in
+                 (TASK_STATES.WAITING, TASK_STATES.CANCELED, TASK_STATES.WAITING)]
+        job_ids = [self._queue([str(i)], task_status) for i, task_status in enumerate(tasks)]
+        canceled = str(uuid.uuid4())
+        _wait(self.redis_conn, canceled, {'sequence': 0})
+        job_ids.append(canceled)
+
+        with self.assertNumQueries(1):
+            waiting, first = _waiting(job_ids)
+        self.assertEqual([(job.id, job.meta['resources'], task_status)
+                          for job, task_status in waiting],
+                         [(job_ids[0], ['0'], tasks[0]), (job_ids[2], ['2'], tasks[2])])
+        self.assertEqual([bool(self._waits(job_id)) for job_id in job_ids],
+                         [True, False, True, False])
+
+
+@mock.patch('pulpcore.tasking.tasks._dispatch')
+class TestDispatchWaiting(WaitingTestCase):
+
+    def _dispatched(self, _dispatch):
+        dispatched = [self.job_ids.index(job.id)
+                      for (job, task_status, resources), kwargs in _dispatch.call_args_list]
+        _dispatch.reset_mock()
+        return dispatched
+
+    def test_blocked(self, _dispatch):
+        """Tests that a task waits for a task before it needing the same resources."""
+        self._queue(['a'])
+        self._queue(['a', 'b'])
+        self._queue(['c'])
+        _dispatch.side_effect = [False, True]
+        _dispatch_waiting()
+        self.assertEqual(self._dispatched(_dispatch), [0, 2])
+
+    def test_released(self, _dispatch):
+        """Tests that only the tasks waiting for the released resources are tried."""
+        self._queue(['a'])
+        self._queue(['a'])
+        self._queue(['b'])
+        _dispatch.return_value = False
+        _dispatch_waiting()
+        self.assertEqual(self._dispatched(_dispatch), [0, 2])
+
+        _dispatch.return_value = True
+        with mock.patch('pulpcore.tasking.tasks.Queue'):
+            dispatch_waiting(resources=['a'])
+        _dispatch_requested()
+        self.assertEqual(self._dispatched(_dispatch), [0, 1])
+        self.assertEqual([bool(self._waits(job_id)) for job_id in self.job_ids],
+                         [False, False, True])
+
+    def test_coalesced(self, _dispatch):
+        """Tests that the requests to dispatch made before they are handled are merged."""
+        self._queue(['a'])
+        _dispatch.return_value = False
+        _dispatch_waiting()
+        with mock.patch('pulpcore.tasking.tasks.Queue') as queue:
+            dispatch_waiting(tasks=['x'])
+            dispatch_waiting(resources=['a'])
+            dispatch_waiting(resources=['b'])
+            self.assertEqual(queue.return_value.enqueue.call_count, 1)
+
+            with mock.patch('pulpcore.tasking.tasks._dispatch_waiting') as dispatch:
+                _dispatch_requested()
+            dispatch.assert_called_once_with({self.job_ids[0]}, free=True)
+
+            dispatch_waiting()
+            self.assertEqual(queue.return_value.enqueue.call_count, 2)
+
+    def test_no_free_worker(self, _dispatch):
+        """Tests that once no worker is free, only the tasks joining a reservation are tried."""
+        worker = Worker.objects.create(name='worker')
+        ReservedResource.objects.create(resource='c', worker=worker)
+        for resource in 'abcd':
+            self._queue([resource])
+        _dispatch.side_effect = [Worker.DoesNotExist, True]
+        _dispatch_waiting()
+        self.assertEqual(self._dispatched(_dispatch), [0, 2])
+        worker_key = TASKING_CONSTANTS.WAITING_WORKER_KEY.format(TASK_PRIORITIES.NORMAL, '')
+        self.assertEqual([job_id.decode() for job_id in self.redis_conn.zrange(worker_key, 0, -1)],
+                         [self.job_ids[i] for i in (0, 1, 3)])
+
+        # the tasks waiting for a free worker are tried in order once resources are released
+        _dispatch.side_effect = [True, Worker.DoesNotExist]
+        _dispatch_waiting(set(), free=True)
+        self.assertEqual(self._dispatched(_dispatch), [0, 1])
+
+    def test_canceled(self, _dispatch):
+        """Tests that a task whose job was deleted is not dispatched, but removed."""
+        canceled = self._queue(['a'])
+        self._queue(['b'])
+        Job(id=canceled, connection=self.redis_conn).delete()
+        _dispatch.return_value = True
+        _dispatch_waiting()
+        self.assertEqual(self._dispatched(_dispatch), [1])
+        self.assertFalse(any(self._waits(job_id) for job_id in self.job_ids))
+
+    def test_dependencies(self, _dispatch):
+        """Tests that a task waits for its dependencies, and is skipped if any did not complete."""
+        running = Task.objects.create(state=TASK_STATES.RUNNING)
+        failed = Task.objects.create(state=TASK_STATES.FAILED)
+        waiting = self._queue(['a'], dependencies=[str(running.pk)])
+        skipped = self._queue(['b'], dependencies=[str(failed.pk)])
+        self._queue(['a'])
+        _dispatch.return_value = True
+        _dispatch_waiting()
+        self.assertEqual(self._dispatched(_dispatch), [2])
+        self.assertEqual(Task.objects.get(pk=waiting).state, TASK_STATES.WAITING)
+        self.assertEqual(Task.objects.get(pk=skipped).state, TASK_STATES.SKIPPED)
+
+        # the task is tried once its dependency completed
+        Task.objects.filter(pk=running.pk).update(state=TASK_STATES.COMPLETED)
+        with mock.patch('pulpcore.tasking.tasks.Queue'):
+            dispatch_waiting(tasks=[running.pk])
+        _dispatch_requested()
+        self.assertEqual(self._dispatched(_dispatch), [0])
+
+    def test_dependents_skipped(self, _dispatch):
+        """Tests that the tasks depending on a skipped task are skipped, whatever their order."""
+        failed = Task.objects.create(state=TASK_STATES.FAILED)
+        delete, publish, sync = (Task.objects.create(state=TASK_STATES.WAITING) for i in range(3))
+        self._queue(['a'], delete, dependencies=[str(publish.pk)])
+        self._queue(['b'], publish, dependencies=[str(sync.pk)])
+        self._queue(['c'], sync, dependencies=[str(failed.pk)])
+        _dispatch_waiting()
+        self.assertEqual(self._dispatched(_dispatch), [])
+        for task_status in (delete, publish, sync):
+            self.assertEqual(Task.objects.get(pk=task_status.pk).state, TASK_STATES.SKIPPED)
+
+    @mock.patch('pulpcore.tasking.tasks.Queue')
+    def test_exclusive(self, queue, _dispatch):
+        """Tests that a task needing that no resource is reserved does not hold back the others,
+        until it waited for too long."""
+        worker = Worker.objects.create(name='worker')
+        reserved = ReservedResource.objects.create(resource='a', worker=worker)
+        exclusive = self._queue([], exclusive=True)
+        self._queue(['b'])
+        _dispatch.return_value = True
+        _dispatch_waiting()
+        self.assertEqual(self._dispatched(_dispatch), [1])
+
+        with mock.patch.object(TASKING_CONSTANTS, 'EXCLUSIVE_WAIT_TIMEOUT', 0):
+            self._queue(['c'])
+            _dispatch_waiting([self.job_ids[2]])
+            self.assertEqual(self._dispatched(_dispatch), [])
+
+            reserved.delete()
+            _dispatch_waiting(set(), free=True)
+        self.assertEqual(queue.return_value.enqueue_job.call_args[0][0].id, exclusive)
+        self.assertEqual(Task.objects.get(pk=exclusive).state, TASK_STATES.COMPLETED)
+        self.assertEqual(self._dispatched(_dispatch), [2])
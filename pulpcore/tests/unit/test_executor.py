@@ -0,0 +1,102 @@
+import os
+import signal
+import time
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from rq import Queue, get_failed_queue
+from rq.job import JobStatus
+
+from pulpcore.app.models import Task
+from pulpcore.tasking import connection
+from pulpcore.tasking.constants import TASKING_CONSTANTS
+from pulpcore.tasking.worker import PulpWorker
+
+
+def succeed():
+    return os.getpid()
+
+
+def fail():
+    raise ValueError('failed')
+
+
+def die():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def cancel_late(job_id):
+    # while the kill monitor of the previous job may still be listening
+    connection.get_redis_connection().publish(TASKING_CONSTANTS.KILL_CHANNEL, job_id)
+    time.sleep(0.5)
+    return os.getpid()
+
+
+@override_settings(WORKER_EXECUTOR={'PERSISTENT': True, 'MAX_JOBS': 3})
+@mock.patch('pulpcore.tasking.worker.handle_worker_heartbeat')
+@mock.patch('pulpcore.tasking.worker.Task')
+class TestPersistentExecutor(SimpleTestCase):
+
+    def setUp(self):
+        self.redis_conn = connection.get_redis_connection()
+        name = 'test-executor-{}'.format(uuid.uuid4())
+        self.queue = Queue(name, connection=self.redis_conn)
+        self.worker = PulpWorker([self.queue], name=name, connection=self.redis_conn)
+        self.jobs = []
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        if self.worker._horse_pid:
+            self.worker._stop_executor()
+        for job in self.jobs:
+            get_failed_queue(connection=self.redis_conn).remove(job)
+            job.delete()
+
+    def _execute(self, task_class, func, *args):
+        """Execute a job in the executor, the way the worker does once it is dequeued."""
+        task_class.DoesNotExist = Task.DoesNotExist
+        task_class.objects.get.side_effect = Task.DoesNotExist
+        job = self.queue.enqueue(func, *args)
+        self.queue.remove(job)
+        self.jobs.append(job)
+        self.worker.execute_job(job, self.queue)
+        job.refresh()
+        return job
+
+    def test_success(self, task_class, handle_worker_heartbeat):
+        """Tests that jobs are executed one after the other by the same executor."""
+        first = self._execute(task_class, succeed)
+        second = self._execute(task_class, succeed)
+        self.assertEqual(first.get_status(), JobStatus.FINISHED, first.exc_info)
+        self.assertEqual(second.result, first.result)
+        self.assertEqual(first.result, self.worker._horse_pid)
+
+    def test_failure(self, task_class, handle_worker_heartbeat):
+        """Tests that a failed job is recorded, and the executor executes the next one."""
+        pid = self._execute(task_class, succeed).result
+        job = self._execute(task_class, fail)
+        self.assertEqual(job.get_status(), JobStatus.FAILED)
+        self.assertIn('ValueError', job.exc_info)
+        self.assertEqual(self._execute(task_class, succeed).result, pid)
+
+    def test_kill(self, task_class, handle_worker_heartbeat):
+        """Tests that a job whose executor is killed is failed, and a new executor is forked."""
+        pid = self._execute(task_class, succeed).result
+        job = self._execute(task_class, die)
+        self.assertEqual(job.get_status(), JobStatus.FAILED)
+        self.assertEqual(self.worker._horse_pid, 0)
+        self.assertNotEqual(self._execute(task_class, succeed).result, pid)
+
+    def test_recycle(self, task_class, handle_worker_heartbeat):
+        """Tests that the executor is replaced after executing MAX_JOBS jobs."""
+        pids = [self._execute(task_class, succeed).result for i in range(4)]
+        self.assertEqual(len(set(pids[:3])), 1)
+        self.assertNotEqual(pids[3], pids[0])
+
+    def test_cancel_done(self, task_class, handle_worker_heartbeat):
+        """Tests that canceling a job which is done does not kill the next job of the executor."""
+        first = self._execute(task_class, succeed)
+        second = self._execute(task_class, cancel_late, first.get_id())
+        self.assertEqual(second.get_status(), JobStatus.FINISHED, second.exc_info)
+        self.assertEqual(second.result, first.result)
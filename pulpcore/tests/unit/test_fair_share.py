@@ -0,0 +1,79 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from pulpcore.app.models import Task, TaskPlacement, Worker
+from pulpcore.constants import TASK_STATES
+from pulpcore.tasking.constants import TASKING_CONSTANTS
+from pulpcore.tasking.tasks import _fair_share, _tenant_usage, enqueue_with_reservation
+
+
+class TestFairShare(SimpleTestCase):
+
+    def _waiting(self, *tenants):
+        return [(SimpleNamespace(meta={'tenant': tenant}, id=i), None)
+                for i, tenant in enumerate(tenants)]
+
+    def _order(self, waiting, running, served=None):
+        served = served or {}
+        order = []
+        for i, (job, task_status) in enumerate(_fair_share(waiting, running, served)):
+            running[job.meta['tenant']] += 1
+            served[job.meta['tenant']] = datetime(2019, 1, 2, 0, 0, i)
+            order.append(job.id)
+        return order
+
+    def test_turns(self):
+        """Tests that tenants take turns, keeping the order of the tasks of each tenant."""
+        waiting = self._waiting('a', 'a', 'a', 'b', None, 'b')
+        self.assertEqual(self._order(waiting, Counter()), [0, 3, 4, 1, 5, 2])
+
+    def test_fewest_running(self):
+        """Tests that the tenant with the fewest tasks running goes first."""
+        waiting = self._waiting('a', 'a', 'b', 'c')
+        self.assertEqual(self._order(waiting, Counter({'a': 2, 'b': 1})), [3, 2, 0, 1])
+
+    def test_least_recently_served(self):
+        """Tests that the tenant served the longest time ago goes first among equally busy ones."""
+        waiting = self._waiting('a', 'a', 'b', 'c')
+        served = {'a': datetime(2019, 1, 1, 2), 'b': datetime(2019, 1, 1, 1)}
+        self.assertEqual(self._order(waiting, Counter(), served), [3, 2, 0, 1])
+
+    def test_not_dispatched(self):
+        """Tests that a tenant keeps its turn if its task is not dispatched."""
+        waiting = self._waiting('a', 'a', 'b')
+        order = [job.id for job, task_status in _fair_share(waiting, Counter(), {})]
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_unknown_priority(self):
+        """Tests that tasks of an unknown priority class are not dispatched."""
+        with self.assertRaisesRegex(ValueError, 'urgent'):
+            enqueue_with_reservation(print, ['repo'], priority='urgent')
+
+
+class TestTenantUsage(TestCase):
+
+    def test_tenant_usage(self):
+        """Tests that the running tasks and the last dispatch of the tenants are counted."""
+        worker = Worker.objects.create(name='test_worker')
+        placements = {}
+        for tenant, state in (('a', TASK_STATES.RUNNING), ('a', TASK_STATES.COMPLETED),
+                              ('b', TASK_STATES.COMPLETED), (None, TASK_STATES.WAITING),
+                              ('c', TASK_STATES.RUNNING)):
+            task = Task.objects.create(state=state, worker=worker)
+            placements[tenant] = TaskPlacement.objects.create(task=task, worker=worker,
+                                                              policy='random', tenant=tenant)
+
+        running, served = _tenant_usage({'a', 'b', None, 'd'})
+        self.assertEqual(running, Counter({'a': 1, None: 1}))
+        self.assertEqual(served, {tenant: placements[tenant].created
+                                  for tenant in ('a', 'b', None)})
+
+        # the dispatches before the window are not considered
+        TaskPlacement.objects.filter(tenant='b').update(
+            created=timezone.now() - timedelta(seconds=TASKING_CONSTANTS.FAIR_SHARE_WINDOW + 1))
+        running, served = _tenant_usage({'a', 'b'})
+        self.assertEqual(set(served), {'a'})
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pulpcore.app.models import Content, Repository, RepositoryVersion, Task, User
+from pulpcore.app.pagination import IDCursorPagination
+from pulpcore.app.viewsets import RepositoryVersionViewSet
+
+
+class TestIDCursorPagination(TestCase):
+
+    def setUp(self):
+        for i in range(5):
+            Repository.objects.create(name='page{}'.format(i))
+        self.queryset = Repository.objects.filter(name__startswith='page')
+
+    def paginate(self, url):
+        paginator = IDCursorPagination()
+        request = Request(APIRequestFactory().get(url))
+        page = paginator.paginate_queryset(self.queryset, request)
+        return [r.name for r in page], paginator.get_paginated_response([]).data
+
+    def test_pages(self):
+        """Tests that the pages seek by id and are not counted by default."""
+        names, data = self.paginate('/repositories/?page_size=2')
+        self.assertEqual(names, ['page0', 'page1'])
+        self.assertIsNone(data['count'])
+
+        names, data = self.paginate(data['next'])
+        self.assertEqual(names, ['page2', 'page3'])
+        names, data = self.paginate(data['next'])
+        self.assertEqual(names, ['page4'])
+        self.assertIsNone(data['next'])
+
+    def test_count(self):
+        """Tests that the objects are counted on request."""
+        names, data = self.paginate('/repositories/?page_size=2&count=true')
+        self.assertEqual(data['count'], 5)
+
+
+class TestVersionContentPagination(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='admin')
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job',
+                             return_value=Task.objects.create())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository = Repository.objects.create(name='pagination')
+        with RepositoryVersion.create(self.repository) as version:
+            version.add_content([Content.objects.create(type='test') for i in range(3)])
+        self.view = RepositoryVersionViewSet.as_view({'get': 'content'})
+        # the master content has no detail view to link to
+        patcher = mock.patch('pulpcore.app.viewsets.repository.ContentSerializer',
+                             lambda page, **kwargs: SimpleNamespace(data=[c.pk for c in page]))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self, **params):
+        url = '/pulp/api/v3/repositories/{}/versions/1/content/'.format(self.repository.pk)
+        request = APIRequestFactory().get(url, dict(params, page_size=2))
+        force_authenticate(request, user=self.user)
+        return self.view(request, repository_pk=self.repository.pk, number=1).data
+
+    def test_page_number(self):
+        """Tests that the content is paginated by page number by default."""
+        data = self._get()
+        self.assertEqual(data['count'], 3)
+        self.assertIn('page=2', data['next'])
+
+    def test_cursor(self):
+        """Tests that the content is paginated by keyset on request."""
+        data = self._get(pagination='cursor')
+        self.assertIsNone(data['count'])
+        self.assertIn('cursor=', data['next'])
+        self.assertIn('pagination=cursor', data['next'])
@@ -0,0 +1,79 @@
+from django.test import TestCase, override_settings
+
+from pulpcore.app.models import ReservedResource, Task, TaskPlacement, Worker
+from pulpcore.constants import TASK_STATES
+from pulpcore.tasking import placement
+from pulpcore.tasking.constants import TASKING_CONSTANTS
+
+
+class TestPlacement(TestCase):
+
+    def setUp(self):
+        self.idle, self.busy, self.loaded = [
+            Worker.objects.create(name='{}-{}@host'.format(TASKING_CONSTANTS.WORKER_PREFIX, i))
+            for i in range(3)
+        ]
+        Worker.objects.create(name=TASKING_CONSTANTS.RESOURCE_MANAGER_WORKER_NAME)
+        ReservedResource.objects.create(worker=self.busy, resource='busy')
+        self._queue(self.busy, cost=2)
+        for i in range(2):
+            self._queue(self.loaded, cost=3)
+        self._queue(self.loaded, cost=5, state=TASK_STATES.COMPLETED)
+
+    def _queue(self, worker, cost, state=TASK_STATES.RUNNING):
+        task = Task.objects.create(state=state, worker=worker)
+        TaskPlacement.objects.create(task=task, worker=worker, policy='random', cost=cost)
+
+    def _workers(self):
+        return list(Worker.objects.with_load())
+
+    def test_with_load(self):
+        """Tests that workers are annotated with their waiting and running tasks."""
+        load = {worker.pk: (worker.reserved, worker.tasks_queued, worker.cost_queued)
+                for worker in self._workers()}
+        self.assertEqual(load, {
+            self.idle.pk: (False, 0, 0),
+            self.busy.pk: (True, 1, 2),
+            self.loaded.pk: (False, 2, 6),
+        })
+
+    def test_random_unreserved(self):
+        """Tests that only workers without reservations are selected."""
+        for i in range(10):
+            self.assertIn(placement.random_unreserved(self._workers(), ['repo'], 1),
+                          [self.idle, self.loaded])
+        with self.assertRaises(Worker.DoesNotExist):
+            placement.random_unreserved([], ['repo'], 1)
+
+    def test_least_loaded(self):
+        """Tests that the unreserved worker with the fewest tasks is selected."""
+        self.assertEqual(placement.least_loaded(self._workers(), ['repo'], 1), self.idle)
+        workers = [worker for worker in self._workers() if worker != self.idle]
+        self.assertEqual(placement.least_loaded(workers, ['repo'], 1), self.loaded)
+        workers = [worker for worker in self._workers() if worker.reserved]
+        self.assertEqual(placement.least_loaded(workers, ['repo'], 1), self.busy)
+
+    def test_affinity(self):
+        """Tests that the same resources are placed on the same worker."""
+        workers = [worker for worker in self._workers() if not worker.reserved]
+        selected = placement.affinity(workers, ['a', 'b'], 1)
+        for i in range(10):
+            self.assertEqual(placement.affinity(workers[::-1], ['b', 'a'], 1), selected)
+        others = [worker for worker in self._workers() if worker != selected]
+        self.assertEqual(placement.affinity(others + [selected], ['a', 'b'], 1), selected)
+
+    @override_settings(WORKER_PLACEMENT={'POLICY': 'bin-packing', 'CAPACITY': 8})
+    def test_bin_packing(self):
+        """Tests that the most loaded unreserved worker with capacity for the task is selected."""
+        self.assertEqual(placement.bin_packing(self._workers(), ['repo'], 2), self.loaded)
+        self.assertEqual(placement.bin_packing(self._workers(), ['repo'], 3), self.idle)
+        self.assertEqual(placement.bin_packing(self._workers(), ['repo'], 9), self.idle)
+        workers = [worker for worker in self._workers() if worker.reserved]
+        self.assertEqual(placement.bin_packing(workers, ['repo'], 3), self.busy)
+
+    @override_settings(WORKER_PLACEMENT={'POLICY': 'least-loaded', 'CAPACITY': 10})
+    def test_select_worker(self):
+        """Tests that the configured policy is used."""
+        worker = placement.select_worker(['repo'])
+        self.assertEqual(worker, self.idle)
+        self.assertEqual(worker.cost_queued, 0)
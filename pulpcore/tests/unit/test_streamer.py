@@ -0,0 +1,161 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from pulpcore.app import streamer
+from pulpcore.app.models import Artifact, Content, ContentArtifact, Remote, RemoteArtifact
+from pulpcore.app.streamer import Stream
+
+
+class TestStream(SimpleTestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.working_dir.cleanup)
+        with override_settings(WORKING_DIRECTORY=self.working_dir.name):
+            self.stream = Stream(mock.Mock(size=6, url='http://example.com/file'))
+        self.addCleanup(os.close, self.stream._source)
+
+    def test_readers_share_download(self):
+        """Tests that readers joining at any time receive all of the data."""
+        first = self.stream.reader()
+        self.stream.write(b'abc')
+        second = self.stream.reader()
+        self.stream.write(b'def')
+        self.stream.finish()
+        self.assertEqual(b''.join(first), b'abcdef')
+        self.assertEqual(b''.join(second), b'abcdef')
+
+    def test_reader_waits_for_data(self):
+        """Tests that a reader blocks until the data is written."""
+        reader = self.stream.reader()
+
+        def download():
+            self.stream.write(b'abc')
+            self.stream.write(b'def')
+            self.stream.finish()
+
+        thread = threading.Thread(target=download)
+        thread.start()
+        self.assertEqual(b''.join(reader), b'abcdef')
+        thread.join()
+
+    def test_failed_download(self):
+        """Tests that a failed download aborts the readers."""
+        reader = self.stream.reader()
+        self.stream.write(b'abc')
+        self.stream.finish(ValueError('digest mismatch'))
+        with self.assertRaises(ValueError):
+            b''.join(reader)
+
+    def test_file_moved(self):
+        """Tests that a reader joining after the download file was moved receives the data."""
+        self.stream.write(b'abc')
+        self.stream.finish()
+        os.rename(self.stream.path, self.stream.path + '.moved')
+        self.assertEqual(b''.join(self.stream.reader()), b'abc')
+
+    def test_timeout(self):
+        """Tests that a reader receiving no data is aborted, and the stream no longer joined."""
+        streamer._streams[1] = self.stream
+        self.addCleanup(streamer._streams.pop, 1, None)
+        self.stream.remote_artifact.content_artifact_id = 1
+        with override_settings(CONTENT=dict(settings.CONTENT, STREAM_TIMEOUT=0.1)):
+            reader = self.stream.reader()
+        self.stream.write(b'abc')
+        self.assertEqual(next(reader), b'abc')
+        with self.assertRaises(TimeoutError):
+            next(reader)
+        self.assertNotIn(1, streamer._streams)
+
+
+@mock.patch.object(Stream, 'start')
+class TestStreamFunction(TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.working_dir.cleanup)
+        self.addCleanup(streamer._streams.clear)
+        content = Content.objects.create(type='test')
+        self.content_artifact = ContentArtifact.objects.create(content=content, relative_path='a')
+
+    def _stream(self):
+        with override_settings(WORKING_DIRECTORY=self.working_dir.name):
+            return streamer.stream(self.content_artifact)
+
+    def test_no_remote_artifact(self, start):
+        """Tests that nothing is streamed without a remote artifact."""
+        self.assertIsNone(self._stream())
+        start.assert_not_called()
+
+    def test_join(self, start):
+        """Tests that a request joins the download in progress, queried outside of the lock."""
+        remote = Remote.objects.create(name='remote', url='http://example.com/')
+        RemoteArtifact.objects.create(url='http://example.com/a', remote=remote,
+                                      content_artifact=self.content_artifact)
+        remote_artifact = RemoteArtifact.objects.get()
+
+        def first():
+            self.assertFalse(streamer._lock.locked())
+            return remote_artifact
+
+        with mock.patch.object(ContentArtifact, 'remoteartifact_set') as remoteartifacts:
+            queryset = remoteartifacts.select_related.return_value.order_by.return_value
+            queryset.first.side_effect = first
+            stream, reader = self._stream()
+            joined, joined_reader = self._stream()
+        queryset.first.assert_called_once_with()
+        self.assertIs(joined, stream)
+        start.assert_called_once_with()
+        stream.finish()
+        self.assertEqual(b''.join(joined_reader), b'')
+
+
+class TestSave(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.addCleanup(streamer._streams.clear)
+        content = Content.objects.create(type='test')
+        remote = Remote.objects.create(name='remote', url='http://example.com/')
+        self.content_artifact = ContentArtifact.objects.create(content=content, relative_path='a')
+        self.remote_artifact = RemoteArtifact.objects.create(
+            url='http://example.com/a', remote=remote, content_artifact=self.content_artifact)
+
+    def _download(self, data):
+        """Download the data into a new stream and return it with the artifact attributes."""
+        with override_settings(WORKING_DIRECTORY=self.media_root.name):
+            stream = Stream(self.remote_artifact)
+        self.addCleanup(os.close, stream._source)
+        stream.write(data)
+        stream.finish()
+        attributes = {digest: getattr(hashlib, digest)(data).hexdigest()
+                      for digest in Artifact.DIGEST_FIELDS}
+        return stream, dict(attributes, size=len(data))
+
+    def test_save(self):
+        """Tests that the artifact is saved and associated with the content artifact."""
+        stream, attributes = self._download(b'abc')
+        with override_settings(MEDIA_ROOT=self.media_root.name):
+            stream._save(attributes)
+        artifact = Artifact.objects.get()
+        self.assertEqual(artifact.sha256, attributes['sha256'])
+        self.assertEqual(ContentArtifact.objects.get().artifact, artifact)
+        self.assertFalse(os.path.exists(stream.path))
+
+    def test_existing(self):
+        """Tests that an artifact created concurrently is associated instead."""
+        stream, attributes = self._download(b'abc')
+        other, attributes = self._download(b'abc')
+        with override_settings(MEDIA_ROOT=self.media_root.name):
+            other._save(attributes)
+            ContentArtifact.objects.update(artifact=None)
+            stream._save(attributes)
+        self.assertEqual(ContentArtifact.objects.get().artifact, Artifact.objects.get())
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pulpcore.app.models import Repository, Task, TaskGroup, User
+from pulpcore.app.serializers import TaskGroupSubmissionSerializer
+from pulpcore.app.viewsets import TaskGroupViewSet
+from pulpcore.constants import TASK_STATES
+from pulpcore.tasking.tasks import (
+    _dependency_states,
+    _pending_dependencies,
+    enqueue_with_reservation,
+    submit_task_group,
+)
+
+
+class TestTaskGroup(TestCase):
+
+    def setUp(self):
+        self.repository = Repository.objects.create(name='repository')
+
+    def test_submit(self):
+        """Tests that the tasks submitted are grouped with their dependencies."""
+        with submit_task_group('pipeline') as submission:
+            parent = enqueue_with_reservation(print, [self.repository])
+            submission.dependencies = list(submission.tasks)
+            child = enqueue_with_reservation(print, [self.repository])
+
+        group = TaskGroup.objects.get(description='pipeline')
+        self.assertEqual({str(task.pk) for task in group.tasks.all()}, {parent.id, child.id})
+        dependencies = Task.objects.get(pk=child.id).dependencies.all()
+        self.assertEqual([str(task.pk) for task in dependencies], [parent.id])
+        self.assertEqual(len(submission.queued), 2)
+
+    def test_submit_failed(self):
+        """Tests that no task is submitted if the submission fails."""
+        with self.assertRaises(ValueError):
+            with submit_task_group('pipeline'):
+                enqueue_with_reservation(print, [self.repository])
+                raise ValueError()
+
+        self.assertFalse(TaskGroup.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_pending_dependencies(self):
+        """Tests that the states of the dependencies which did not complete are returned."""
+        tasks = [Task.objects.create(state=state)
+                 for state in (TASK_STATES.COMPLETED, TASK_STATES.RUNNING, TASK_STATES.FAILED)]
+        job = SimpleNamespace(meta={'dependencies': [str(task.pk) for task in tasks]})
+        dependency_states = _dependency_states([job])
+        self.assertEqual(_pending_dependencies(job, dependency_states),
+                         {TASK_STATES.RUNNING, TASK_STATES.FAILED})
+        self.assertEqual(_pending_dependencies(SimpleNamespace(meta={}), dependency_states), set())
+
+    def test_validate_operations(self):
+        """Tests that operations may only depend on the operations before them."""
+        def operation(name, *dependencies):
+            return {'name': name, 'method': 'post', 'path': '/pulp/api/v3/repositories/',
+                    'dependencies': dependencies}
+
+        for operations, valid in (([operation('a'), operation('b', 'a')], True),
+                                  ([operation('a', 'b'), operation('b')], False),
+                                  ([operation('a'), operation('a')], False),
+                                  ([operation('a', 'a')], False)):
+            serializer = TaskGroupSubmissionSerializer(data={'operations': operations})
+            self.assertEqual(serializer.is_valid(), valid, operations)
+
+
+class TestTaskGroupViewSet(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='admin')
+        self.repository = Repository.objects.create(name='repository')
+        self.view = TaskGroupViewSet.as_view({'post': 'create'})
+
+    def _post(self, *operations):
+        data = {'description': 'pipeline', 'operations': operations}
+        request = APIRequestFactory().post('/pulp/api/v3/task-groups/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def test_create(self):
+        """Tests that the operations are performed, their tasks grouped with their dependencies."""
+        path = '/pulp/api/v3/repositories/{}/'.format(self.repository.pk)
+        response = self._post(
+            {'name': 'update', 'method': 'patch', 'path': path, 'body': {'description': 'a'}},
+            {'name': 'delete', 'method': 'delete', 'path': path, 'dependencies': ['update']})
+
+        self.assertEqual(response.status_code, 202)
+        group = TaskGroup.objects.get(description='pipeline')
+        self.assertEqual(group.tasks.count(), 2)
+        (update,), (delete,) = (
+            [href.split('/')[-2] for href in response.data['tasks'][name]]
+            for name in ('update', 'delete'))
+        dependencies = Task.objects.get(pk=delete).dependencies.all()
+        self.assertEqual([str(task.pk) for task in dependencies], [update])
+
+    def test_create_rolled_back(self):
+        """Tests that nothing is submitted if an operation fails."""
+        path = '/pulp/api/v3/repositories/{}/'.format(self.repository.pk)
+        response = self._post(
+            {'name': 'delete', 'method': 'delete', 'path': path},
+            {'name': 'update', 'method': 'patch', 'path': path, 'body': {'name': ''}})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('update', response.data)
+        self.assertFalse(TaskGroup.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_create_invalid_path(self):
+        """Tests that the operations can only call the other API endpoints."""
+        response = self._post({'name': 'submit', 'method': 'post',
+                               'path': '/pulp/api/v3/task-groups/'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TaskGroup.objects.exists())
@@ -0,0 +1,68 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from pulpcore.app.models import Task, Worker
+from pulpcore.constants import TASK_STATES
+from pulpcore.tasking.constants import TASKING_CONSTANTS
+from pulpcore.tasking.services.worker_watcher import (
+    check_worker_processes,
+    handle_worker_heartbeat,
+)
+
+
+class TestWorkerWatcher(TestCase):
+
+    def setUp(self):
+        self.name = '{}-1@host'.format(TASKING_CONSTANTS.WORKER_PREFIX)
+
+    def _stale(self, **kwargs):
+        last_heartbeat = timezone.now() - timedelta(seconds=TASKING_CONSTANTS.WORKER_TTL + 1)
+        Worker.objects.filter(name=self.name).update(last_heartbeat=last_heartbeat, **kwargs)
+
+    def test_heartbeat(self):
+        """Tests that the heartbeat of a new or online worker is recorded."""
+        handle_worker_heartbeat(self.name)
+        worker = Worker.objects.get(name=self.name)
+        self.assertTrue(worker.online)
+
+        handle_worker_heartbeat(self.name)
+        self.assertGreater(Worker.objects.get(name=self.name).last_heartbeat,
+                           worker.last_heartbeat)
+
+    def test_back_online(self):
+        """Tests that a worker cleaned up or gone missing is back online on heartbeat."""
+        handle_worker_heartbeat(self.name)
+        self._stale(gracefully_stopped=True, cleaned_up=True)
+
+        handle_worker_heartbeat(self.name)
+        worker = Worker.objects.get(name=self.name)
+        self.assertTrue(worker.online)
+        self.assertFalse(worker.gracefully_stopped)
+        self.assertFalse(worker.cleaned_up)
+
+    def test_check_worker_processes(self):
+        """Tests that missing workers are cleaned up."""
+        handle_worker_heartbeat(self.name)
+        self._stale()
+
+        check_worker_processes()
+        worker = Worker.objects.get(name=self.name)
+        self.assertTrue(worker.cleaned_up)
+        self.assertFalse(worker.gracefully_stopped)
+
+    @mock.patch('pulpcore.tasking.services.worker_watcher.cancel_tasks')
+    def test_missing_worker_tasks(self, cancel_tasks):
+        """Tests that the tasks of a missing worker are canceled without waiting to kill them."""
+        handle_worker_heartbeat(self.name)
+        worker = Worker.objects.get(name=self.name)
+        task = Task.objects.create(state=TASK_STATES.RUNNING, worker=worker)
+        Task.objects.create(state=TASK_STATES.COMPLETED, worker=worker)
+        self._stale()
+
+        check_worker_processes()
+        tasks = cancel_tasks.call_args[0][0]
+        self.assertEqual(list(tasks), [task])
+        self.assertEqual(cancel_tasks.call_args[1], {'timeout': 0, 'kill': False})
@@ -0,0 +1,104 @@
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.test import SimpleTestCase, override_settings
+
+from pulpcore.app.views.content import ContentView, NegativeCache
+
+
+def negative_cache_settings(**kwargs):
+    negative_cache = dict(settings.CONTENT['NEGATIVE_CACHE'], **kwargs)
+    return override_settings(CONTENT=dict(settings.CONTENT, NEGATIVE_CACHE=negative_cache))
+
+
+class TestNegativeCache(SimpleTestCase):
+
+    def test_add(self):
+        """Tests that added keys are contained until they expire."""
+        cache = NegativeCache()
+        with negative_cache_settings(TTL=10), mock.patch('time.monotonic', return_value=100):
+            cache.add((1, 2, 'a'))
+            self.assertIn((1, 2, 'a'), cache)
+            self.assertNotIn((1, 3, 'a'), cache)
+        with negative_cache_settings(TTL=10), mock.patch('time.monotonic', return_value=111):
+            self.assertNotIn((1, 2, 'a'), cache)
+
+    def test_disabled(self):
+        """Tests that nothing is recorded when the cache is disabled."""
+        cache = NegativeCache()
+        with negative_cache_settings(ENABLED=False):
+            cache.add(('a',))
+            self.assertNotIn(('a',), cache)
+
+    def test_max_entries(self):
+        """Tests that the cache does not grow beyond MAX_ENTRIES."""
+        cache = NegativeCache()
+        with negative_cache_settings(MAX_ENTRIES=2):
+            cache.add(('a',))
+            cache.add(('b',))
+            cache.add(('c',))
+            self.assertNotIn(('a',), cache)
+            self.assertIn(('c',), cache)
+
+
+@mock.patch('pulpcore.app.views.content.streamer')
+class TestStream(SimpleTestCase):
+
+    def test_stream(self, streamer):
+        """Tests that the streamed data is returned with the expected headers."""
+        streamer.stream.return_value = (SimpleNamespace(size=6), iter([b'abc', b'def']))
+        content_artifact = SimpleNamespace(relative_path='a/b.txt')
+        response = ContentView()._stream(content_artifact)
+        streamer.stream.assert_called_once_with(content_artifact)
+        self.assertEqual(b''.join(response.streaming_content), b'abcdef')
+        self.assertEqual(response['Content-Length'], '6')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename=b.txt')
+
+    def test_unknown_size(self, streamer):
+        """Tests that the length is not set when the size is unknown."""
+        streamer.stream.return_value = (SimpleNamespace(size=None), iter([b'abc']))
+        response = ContentView()._stream(SimpleNamespace(relative_path='a'))
+        self.assertNotIn('Content-Length', response)
+
+    def test_no_remote_artifact(self, streamer):
+        """Tests that nothing is returned when there is nothing to stream."""
+        streamer.stream.return_value = None
+        self.assertIsNone(ContentView()._stream(SimpleNamespace(relative_path='a')))
+
+
+class TestDjango(SimpleTestCase):
+
+    def setUp(self):
+        working_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(working_dir.cleanup)
+        self.working_dir = working_dir.name
+
+    def _serve(self, name, file_wrapper):
+        path = os.path.join(self.working_dir, name)
+        with open(path, 'wb') as file:
+            file.write(b'abc')
+        view = ContentView()
+        view.request = SimpleNamespace(META={'wsgi.file_wrapper': file_wrapper})
+        response = view._django(path)
+        self.addCleanup(response.close)
+        return response
+
+    def test_streamed(self):
+        """Tests that a streamed file is returned with the content type of its name."""
+        response = self._serve('a.txt', None)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(b''.join(response.streaming_content), b'abc')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Content-Length'], '3')
+
+    def test_file_wrapper(self):
+        """Tests that a file handed over to the file wrapper has an explicit content type."""
+        response = self._serve('a', object())
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename=a')
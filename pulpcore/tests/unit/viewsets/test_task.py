@@ -0,0 +1,76 @@
+import threading
+import time
+
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pulpcore.app.models import Task, User
+from pulpcore.app.viewsets import TaskViewSet
+from pulpcore.constants import TASK_STATES
+
+
+class TestWait(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='admin')
+        self.task = Task.objects.create(state=TASK_STATES.WAITING)
+        self.view = TaskViewSet.as_view({'get': 'wait'})
+
+    def _get(self, etag=None, **params):
+        url = '/pulp/api/v3/tasks/{}/wait/'.format(self.task.pk)
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = APIRequestFactory().get(url, params, **headers)
+        force_authenticate(request, user=self.user)
+        return self.view(request, pk=self.task.pk)
+
+    def test_wait(self):
+        """Tests that the task is returned right away without a matching entity tag."""
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['state'], TASK_STATES.WAITING)
+        self.assertTrue(response['ETag'])
+        self.assertEqual(self._get(etag='"other"')['ETag'], response['ETag'])
+
+    def test_not_modified(self):
+        """Tests that the response is 304 Not Modified once the timeout elapsed."""
+        etag = self._get()['ETag']
+        started = time.monotonic()
+        response = self._get(etag=etag, timeout=1)
+        self.assertGreaterEqual(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_changed(self):
+        """Tests that a waiting request returns once the task changed and was notified."""
+        etag = self._get()['ETag']
+
+        def run():
+            time.sleep(0.5)
+            Task.objects.filter(pk=self.task.pk).update(state=TASK_STATES.RUNNING)
+            Task.notify_changed(self.task.pk)
+            connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        started = time.monotonic()
+        response = self._get(etag=etag, timeout=10)
+        thread.join()
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['state'], TASK_STATES.RUNNING)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_finished(self):
+        """Tests that a request for a finished task does not wait."""
+        Task.objects.filter(pk=self.task.pk).update(state=TASK_STATES.COMPLETED)
+        etag = self._get()['ETag']
+        started = time.monotonic()
+        self.assertEqual(self._get(etag=etag, timeout=10).status_code, 304)
+        self.assertLess(time.monotonic() - started, 10)
+
+    def test_invalid_timeout(self):
+        """Tests that the timeout must be an integer."""
+        response = self._get(timeout='soon')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('timeout', response.data)